@@ -0,0 +1,168 @@
+import json
+import math
+from collections.abc import Mapping
+import numpy as np
+
+# Μέγεθος κελιού του πλέγματος anchors (μέτρα), της τάξης της εμβέλειας ενός anchor
+ANCHOR_CELL_SIZE = 10.0
+
+# Κλειδί κελιού (cx, cy) ως ένας ακέραιος: cx * _CELL_KEY_STRIDE + cy
+_CELL_KEY_STRIDE = 1 << 31
+
+
+class AnchorRegistry(Mapping):
+    """Τα anchors ενός site, με τα ids interned σε ακέραιους δείκτες.
+
+    Συμπεριφέρεται όπως το dict ANCHOR_POSITIONS (anchor_id -> np.array([x, y]))
+    και περνά όπου περνούσε εκείνο. Επιπλέον κρατά τις θέσεις σε πίνακα
+    (n, 2) με τη σειρά των δεικτών, τη ζώνη κάθε anchor και ένα ομοιόμορφο
+    πλέγμα, ώστε το "ποια anchors είναι κοντά σε ένα σημείο" να κοστίζει
+    ανάλογα με την πυκνότητα των anchors και όχι με το μέγεθος του site.
+    """
+
+    def __init__(self, anchor_positions=None, zones=None, cell_size=ANCHOR_CELL_SIZE):
+        anchor_positions, zones = anchor_positions or {}, zones or {}
+        self.cell_size = cell_size
+        self.ids = list(anchor_positions)
+        self.index = {anchor_id: i for i, anchor_id in enumerate(self.ids)}
+        self.zones = [zones.get(anchor_id) for anchor_id in self.ids]
+        self.coords = np.array([anchor_positions[anchor_id] for anchor_id in self.ids], dtype=float).reshape(-1, 2)
+        self._cells = {}
+        for index, position in enumerate(self.coords):
+            self._cells.setdefault(self._cell_of(position), []).append(index)
+        self._table = None
+
+    def __getitem__(self, anchor_id):
+        return self.coords[self.index[anchor_id]]
+
+    def __setitem__(self, anchor_id, position):
+        if anchor_id in self.index:
+            self.move(anchor_id, position)
+        else:
+            self.add(anchor_id, position)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _cell_of(self, position):
+        return (math.floor(position[0] / self.cell_size), math.floor(position[1] / self.cell_size))
+
+    def add(self, anchor_id, position, zone=None):
+        """Καταχωρεί νέο anchor· επιστρέφει τον δείκτη του."""
+        if anchor_id in self.index:
+            raise ValueError(f"duplicate anchor id {anchor_id!r}")
+        position = np.asarray(position, dtype=float)
+        index = self.index[anchor_id] = len(self.ids)
+        self.ids.append(anchor_id)
+        self.zones.append(zone)
+        self.coords = np.concatenate([self.coords, position[None, :]])
+        self._cells.setdefault(self._cell_of(position), []).append(index)
+        self._table = None
+        return index
+
+    def move(self, anchor_id, position):
+        """Αλλάζει τη θέση ενός υπάρχοντος anchor."""
+        index = self.index[anchor_id]
+        position = np.asarray(position, dtype=float)
+        old_cell, cell = self._cell_of(self.coords[index]), self._cell_of(position)
+        if old_cell != cell:
+            members = self._cells[old_cell]
+            members.remove(index)
+            if not members:
+                del self._cells[old_cell]
+            self._cells.setdefault(cell, []).append(index)
+            self._table = None
+        self.coords[index] = position
+
+    def indices(self, anchor_ids):
+        """Δείκτες για μια λίστα ids (-1 για άγνωστα anchors)."""
+        return np.array([self.index.get(anchor_id, -1) for anchor_id in anchor_ids], dtype=np.intp)
+
+    def zone_of(self, anchor_id):
+        return self.zones[self.index[anchor_id]]
+
+    def near(self, point, radius):
+        """Δείκτες των anchors σε απόσταση <= radius από το point, από το πλησιέστερο."""
+        cx, cy = self._cell_of(point)
+        reach = math.ceil(radius / self.cell_size)
+        candidates = [index
+                      for x in range(cx - reach, cx + reach + 1)
+                      for y in range(cy - reach, cy + reach + 1)
+                      for index in self._cells.get((x, y), ())]
+        if not candidates:
+            return np.empty(0, dtype=np.intp)
+        candidates = np.array(candidates, dtype=np.intp)
+        distances = np.hypot(*(self.coords[candidates] - np.asarray(point, dtype=float)).T)
+        order = np.argsort(distances, kind='stable')
+        return candidates[order[distances[order] <= radius]]
+
+    def _cell_table(self):
+        """Το πλέγμα σε μορφή πινάκων: ταξινομημένα κλειδιά κελιών και (κελιά, πλάτος) δείκτες anchors με -1."""
+        if self._table is None:
+            keys = np.array([x * _CELL_KEY_STRIDE + y for x, y in self._cells], dtype=np.int64)
+            members = list(self._cells.values())
+            order = np.argsort(keys)
+            table = np.full((len(members), max((len(m) for m in members), default=0)), -1, dtype=np.intp)
+            for row, cell in enumerate(order.tolist()):
+                table[row, :len(members[cell])] = members[cell]
+            self._table = (keys[order], table)
+        return self._table
+
+    def near_many(self, points, radius):
+        """Όπως το near για πολλά σημεία μαζί: πίνακας (n, k) δεικτών anchors με -1 στις κενές θέσεις.
+
+        Κοιτάζει μόνο τα κελιά γύρω από κάθε σημείο· σημεία με NaN δεν έχουν
+        anchors. Η σειρά μέσα σε κάθε γραμμή δεν είναι κατά απόσταση.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        keys, table = self._cell_table()
+        if len(points) == 0 or len(keys) == 0:
+            return np.full((len(points), 0), -1, dtype=np.intp)
+
+        valid = ~np.isnan(points).any(axis=1)
+        cells = np.floor(np.where(valid[:, None], points, 0.0) / self.cell_size).astype(np.int64)
+        reach = math.ceil(radius / self.cell_size)
+        offsets = np.arange(-reach, reach + 1)
+        neighbour_keys = ((cells[:, 0, None, None] + offsets[:, None]) * _CELL_KEY_STRIDE
+                          + cells[:, 1, None, None] + offsets[None, :]).reshape(len(points), -1)
+
+        slots = np.minimum(np.searchsorted(keys, neighbour_keys), len(keys) - 1)
+        found = (keys[slots] == neighbour_keys) & valid[:, None]
+        candidates = np.where(found[..., None], table[slots], -1).reshape(len(points), -1)
+
+        diff = self.coords[np.maximum(candidates, 0)] - points[:, None, :]
+        candidates[np.hypot(diff[..., 0], diff[..., 1]) > radius] = -1
+        return candidates
+
+    def bounds(self):
+        """(min_x, min_y, max_x, max_y) όλων των anchors."""
+        (min_x, min_y), (max_x, max_y) = self.coords.min(axis=0), self.coords.max(axis=0)
+        return min_x, min_y, max_x, max_y
+
+    def stats(self):
+        return {
+            'anchors': len(self.ids),
+            'zones': len(set(zone for zone in self.zones if zone is not None)),
+            'cells': len(self._cells)
+        }
+
+
+def load_site(path, cell_size=ANCHOR_CELL_SIZE):
+    """Φορτώνει site file (JSON) της μορφής {"anchors": [{"id", "x", "y", "zone"}, ...]}."""
+    with open(path, encoding='utf-8') as f:
+        site = json.load(f)
+
+    # Πρώτα όλες οι εγγραφές και μετά ένας πίνακας συντεταγμένων για όλο το site
+    positions, zones = {}, {}
+    for entry in site["anchors"]:
+        anchor_id = str(entry["id"])
+        if anchor_id in positions:
+            raise ValueError(f"duplicate anchor id {anchor_id!r}")
+        positions[anchor_id] = (float(entry["x"]), float(entry["y"]))
+        zones[anchor_id] = entry.get("zone")
+    if not positions:
+        raise ValueError(f"site file {path} has no anchors")
+    return AnchorRegistry(positions, zones, cell_size)
@@ -0,0 +1,440 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+import numpy as np
+import rtls_server as server
+import tag_simulator
+import replay
+from recording import RangeRecorder, RecordingReader, FRAME_BATCH
+from motor_commands import MotorCommandDispatcher
+from statistics_logger import RTLSStatisticsLogger
+from tag_store import TagStateStore
+from trilateration import trilaterate_position
+from wire_format import encode_batch
+
+# --- Διαμόρφωση Benchmark ---
+BENCHMARK_RESULTS_FILE = "benchmark_results.json"
+BENCHMARK_BASELINE_FILE = "benchmark_baseline.json"
+BENCHMARKS = ('trilateration', 'ingest', 'proximity', 'stats', 'end_to_end')
+# Μεταβολή προς το χειρότερο πέρα από αυτό το ποσοστό θεωρείται regression
+REGRESSION_TOLERANCE = 0.25
+REPEAT = 5
+
+PROXIMITY_TAG_COUNTS = (10, 100, 1000, 10000)
+# Πυκνότητα tags (ανά m²) στο benchmark εγγύτητας, όσο στο load test του warehouse
+PROXIMITY_DENSITY = 0.25
+PROXIMITY_STEP_METERS = 0.1
+
+END_TO_END_SITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "site_warehouse.json")
+END_TO_END_TAGS = 1000
+END_TO_END_RATE = 10000
+END_TO_END_SECONDS = 5.0
+END_TO_END_TRANSIT_SECONDS = 0.002
+# Στάδια του stats logger (βλ. LATENCY_STAGES) που αναφέρονται χωριστά στο end-to-end benchmark
+END_TO_END_STAGES = ('batch_decode', 'solve', 'proximity', 'motor_publish')
+
+
+def metric(value, unit, better):
+    """Μία μέτρηση των αποτελεσμάτων· better είναι 'higher' ή 'lower'."""
+    return {'value': float(value), 'unit': unit, 'better': better}
+
+@contextmanager
+def measuring():
+    """Χωρίς έξοδο και χωρίς garbage collector όσο μετράμε (όπως το timeit)."""
+    gc.collect()
+    gc.disable()
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            yield
+    finally:
+        gc.enable()
+
+def best_time(fn, repeat=REPEAT):
+    """Ο μικρότερος χρόνος (s) από repeat εκτελέσεις του fn (λιγότερος θόρυβος από το μέσο όρο)."""
+    best = float('inf')
+    for _ in range(repeat):
+        with measuring():
+            start = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def fresh_pipeline(*options):
+    """Νέο pipeline του rtls_server με ορίσματα όπως της γραμμής εντολών και σιωπηλά στατιστικά."""
+    parser = argparse.ArgumentParser()
+    server.add_pipeline_arguments(parser)
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        server.configure_pipeline(parser.parse_args(list(options)))
+    server.stats_logger = quiet_stats_logger()
+    server.clock = time.time
+    server.first_message_at = None
+
+def quiet_stats_logger():
+    """Stats logger χωρίς αρχεία και μηνύματα."""
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        return RTLSStatisticsLogger(log_file=os.devnull, metrics_dir=None)
+
+def random_points(rng, n):
+    """Σημεία μέσα στην περιοχή των anchors του pipeline."""
+    min_x, min_y, max_x, max_y = server.anchor_registry.bounds()
+    return rng.uniform((min_x, min_y), (max_x, max_y), size=(n, 2))
+
+def noisy_ranges(rng, points):
+    anchors = server.anchor_registry.coords
+    distances = np.hypot(*(points[:, None, :] - anchors[None, :, :]).transpose(2, 0, 1))
+    return np.round(distances + rng.uniform(-0.05, 0.05, size=distances.shape), 2)
+
+
+# --- Benchmarks ---
+def bench_trilateration(scale):
+    """Λύσεις/s: trilaterate_position ανά tag και οι batch solvers για πολλά tags μαζί."""
+    results = {}
+    rng = np.random.default_rng(1)
+    fresh_pipeline()
+
+    n = int(20000 * scale)
+    points = random_points(rng, n)
+    ranges = noisy_ranges(rng, points)
+    anchor_ids = server.anchor_registry.ids
+    reports = [dict(zip(anchor_ids, row)) for row in ranges.tolist()]
+
+    def solve_each():
+        for distances in reports:
+            trilaterate_position(distances, server.geometry_cache, server.MIN_ANCHORS_FOR_POSITIONING)
+
+    results['trilaterate_position.solves_per_s'] = metric(n / best_time(solve_each), 'solves/s', 'higher')
+
+    # Οι batch solvers δέχονται τις αποστάσεις στη μορφή του TagStateStore
+    store = TagStateStore(anchor_ids, n)
+    tag_index, anchor_index = (column.ravel() for column in np.indices(ranges.shape))
+    store.set_ranges([f"bench_tag{i+1}" for i in range(n)], anchor_ids, tag_index, anchor_index,
+                     ranges.ravel().astype(np.float32), time.time())
+    initial = points + rng.normal(0, 0.1, size=points.shape)
+    for solver in server.SOLVERS:
+        fresh_pipeline('--solver', solver)
+        seconds = best_time(lambda: server.batch_solver.solve(store.ranges[:n], store.range_anchors[:n], anchor_ids,
+                                                              initial))
+        results[f'batch_solve.{solver}.solves_per_s'] = metric(n / seconds, 'solves/s', 'higher')
+    return results
+
+def bench_ingest(scale):
+    """Αναφορές/s στο on_message (JSON και binary batches) και στο apply_pending_reports."""
+    results = {}
+    rng = np.random.default_rng(2)
+    num_tags = 1000
+    tag_ids = [f"bench_tag{i+1}" for i in range(num_tags)]
+    fresh_pipeline()
+    anchor_ids = server.anchor_registry.ids
+
+    n = int(50000 * scale)
+    rounds = -(-n // (num_tags * len(anchor_ids)))
+    ranges = noisy_ranges(rng, random_points(rng, num_tags))
+    now = time.time()
+    json_messages = [
+        replay.ReplayMessage(server.MQTT_DATA_TOPIC, json.dumps({
+            "anchor_id": anchor_id, "tag_id": tag_id, "distance": ranges[t, a],
+            "seq": seq, "sent_at": now}).encode())
+        for seq in range(rounds)
+        for t, tag_id in enumerate(tag_ids)
+        for a, anchor_id in enumerate(anchor_ids)
+    ][:n]
+
+    chunk = tag_simulator.LOAD_PUBLISH_CHUNK
+    tag_index, anchor_index = (column.ravel() for column in np.indices(ranges.shape))
+    distances = ranges.ravel()
+    batch_messages = []
+    for seq in range(rounds):
+        for start in range(0, len(distances), chunk):
+            part = slice(start, start + chunk)
+            payload = encode_batch(tag_ids, anchor_ids, tag_index[part], anchor_index[part], distances[part], seq, now)
+            batch_messages.append(replay.ReplayMessage(server.MQTT_BATCH_TOPIC, payload))
+    batch_reports = rounds * len(distances)
+
+    # FIFO χωρίς όριο ώστε κάθε αναφορά να φτάνει στο apply (χωρίς coalescing)
+    options = ('--ingest-policy', 'drop_oldest', '--ingest-capacity', str(10 * n))
+
+    def ingest(messages):
+        for message in messages:
+            server.on_message(None, None, message)
+
+    def timed_round(messages, stage):
+        fresh_pipeline(*options)
+        with measuring():
+            start = time.perf_counter()
+            ingest(messages)
+            queued = time.perf_counter()
+            server.apply_pending_reports()
+        return (queued - start) if stage == 'on_message' else (time.perf_counter() - queued)
+
+    json_seconds = min(timed_round(json_messages, 'on_message') for _ in range(REPEAT))
+    batch_seconds = min(timed_round(batch_messages, 'on_message') for _ in range(REPEAT))
+    apply_seconds = min(timed_round(json_messages, 'apply') for _ in range(REPEAT))
+
+    results['ingest.on_message_json.msgs_per_s'] = metric(len(json_messages) / json_seconds, 'msgs/s', 'higher')
+    results['ingest.on_message_batch.reports_per_s'] = metric(batch_reports / batch_seconds, 'reports/s', 'higher')
+    results['ingest.apply.reports_per_s'] = metric(len(json_messages) / apply_seconds, 'reports/s', 'higher')
+    return results
+
+def bench_proximity(scale):
+    """Κόστος (ms) του check_proximity_and_control_motors ανά πλήθος tags, με σταθερή πυκνότητα."""
+    results = {}
+    rng = np.random.default_rng(3)
+    dispatcher = MotorCommandDispatcher(replay.MotorCommandLog(time.time), server.MQTT_MOTOR_CMD_TOPIC_PREFIX, qos=0)
+
+    for num_tags in PROXIMITY_TAG_COUNTS:
+        fresh_pipeline()
+        tag_ids = [f"bench_tag{i+1}" for i in range(num_tags)]
+        for tag_id in tag_ids:
+            server.tag_store.row_for(tag_id)
+        side = np.sqrt(num_tags / PROXIMITY_DENSITY)
+        positions = rng.uniform(0, side, size=(num_tags, 2))
+
+        iterations = max(3, int(min(50, 20000 / num_tags) * scale))
+        timings = []
+        with measuring():
+            for _ in range(iterations + 1):
+                positions = np.clip(positions + rng.uniform(-PROXIMITY_STEP_METERS, PROXIMITY_STEP_METERS,
+                                                            size=positions.shape), 0, side)
+                now = time.time()
+                server.proximity_grid.update_many(tag_ids, positions, now)
+                start = time.perf_counter()
+                server.check_proximity_and_control_motors(dispatcher)
+                timings.append(time.perf_counter() - start)
+                dispatcher.dispatch(now)
+
+        # Ο πρώτος έλεγχος ανοίγει όλα τα encounters, οι επόμενοι είναι η σταθερή κατάσταση
+        results[f'proximity.check_ms.tags_{num_tags}'] = metric(min(timings[1:]) * 1000, 'ms', 'lower')
+    return results
+
+def bench_stats(scale):
+    """Κόστος (µs) των κλήσεων του RTLSStatisticsLogger στη διαδρομή κάθε αναφοράς."""
+    results = {}
+    rng = np.random.default_rng(4)
+    n = int(100000 * scale)
+    tag_ids = [f"bench_tag{i+1}" for i in range(1000)]
+    anchor_ids = ["anchor1", "anchor2", "anchor3", "anchor4"]
+    tags = [tag_ids[i % len(tag_ids)] for i in range(n)]
+    anchors = [anchor_ids[i % len(anchor_ids)] for i in range(n)]
+    positions = rng.uniform(0, 10, size=(n, 2))
+    now = time.time()
+
+    def per_call(fn, count):
+        seconds = float('inf')
+        for _ in range(REPEAT):
+            logger = quiet_stats_logger()
+            with measuring():
+                seconds = min(seconds, fn(logger))
+        return metric(seconds / count * 1e6, 'us', 'lower')
+
+    def message_received(logger):
+        start = time.perf_counter()
+        for i, (tag_id, anchor_id) in enumerate(zip(tags, anchors)):
+            logger.log_message_received(tag_id, now, now + i * 1e-5)
+        return time.perf_counter() - start
+
+    records = np.zeros(n, dtype=[('tag', '<u4'), ('anchor', '<u2'), ('seq', '<u4'), ('distance', '<f4'),
+                                 ('sent_at', '<f8')])
+    records['tag'] = np.arange(n) % len(tag_ids)
+    records['anchor'] = np.arange(n) % len(anchor_ids)
+    records['seq'] = np.arange(n) // 4000
+    records['sent_at'] = now
+    chunk = tag_simulator.LOAD_PUBLISH_CHUNK
+
+    def batch_received(logger):
+        start = time.perf_counter()
+        for offset in range(0, n, chunk):
+            logger.log_batch_received(tag_ids, records[offset:offset + chunk], now + offset * 1e-5)
+        return time.perf_counter() - start
+
+    def positioning_attempt(logger):
+        start = time.perf_counter()
+        for tag_id, position in zip(tags, positions):
+            logger.log_positioning_attempt(tag_id, True, position)
+        return time.perf_counter() - start
+
+    def stage_latency(logger):
+        start = time.perf_counter()
+        for i in range(n):
+            logger.log_stage_latency('solve', 1.0)
+        return time.perf_counter() - start
+
+    results['stats.log_message_received.us_per_call'] = per_call(message_received, n)
+    results['stats.log_batch_received.us_per_report'] = per_call(batch_received, n)
+    results['stats.log_positioning_attempt.us_per_call'] = per_call(positioning_attempt, n)
+    results['stats.log_stage_latency.us_per_call'] = per_call(stage_latency, n)
+    return results
+
+def generate_recording(path, site, num_tags, rate, seconds, seed=0):
+    """Συνθετική καταγραφή με ό,τι θα έστελνε ο load generator (binary batches) σε εικονικό χρόνο."""
+    tag_simulator.use_site(site)
+    tag_ids = [f"{tag_simulator.LOAD_TAG_PREFIX}{i+1}" for i in range(num_tags)]
+    fleet = tag_simulator.VectorizedTagFleet(tag_ids, tag_simulator.ANCHOR_POSITIONS, seed=seed)
+    anchor_ids = fleet.anchor_ids
+    chunk_size = tag_simulator.LOAD_PUBLISH_CHUNK
+
+    recorder = RangeRecorder(path)
+    sent_at = 0.0
+    try:
+        while sent_at < seconds:
+            fleet.step()
+            ranges = fleet.ranges()
+            tag_index, anchor_index = np.nonzero(~np.isnan(ranges))
+            distances = ranges[tag_index, anchor_index]
+            sequences = fleet.next_sequences(tag_index, anchor_index)
+            for start in range(0, len(distances), chunk_size):
+                chunk = slice(start, min(start + chunk_size, len(distances)))
+                first_tag, last_tag = tag_index[chunk.start], tag_index[chunk.stop - 1]
+                chunk_anchors, chunk_anchor_index = np.unique(anchor_index[chunk], return_inverse=True)
+                payload = encode_batch(tag_ids[first_tag:last_tag + 1], [anchor_ids[a] for a in chunk_anchors],
+                                       tag_index[chunk] - first_tag, chunk_anchor_index,
+                                       distances[chunk], sequences[chunk], sent_at)
+                recorder.record(FRAME_BATCH, sent_at + END_TO_END_TRANSIT_SECONDS, payload)
+                sent_at += (chunk.stop - chunk.start) / rate
+    finally:
+        recorder.close()
+    return recorder.frames
+
+def bench_end_to_end(scale):
+    """Replay συνθετικής κίνησης: latency από την αναφορά ως την απόφαση για τους κινητήρες.
+
+    Τα percentiles έρχονται από τον stats logger του pipeline: end_to_end
+    είναι από το sent_at της αναφοράς ως την απόφαση, decision από τη λήψη
+    ως την απόφαση (στον χρόνο της καταγραφής, άρα μεταφορά και αναμονή
+    για τον κύκλο εκτίμησης), και τα στάδια επεξεργασίας σε πραγματικά ms.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.uwbr")
+        generate_recording(path, END_TO_END_SITE, END_TO_END_TAGS, END_TO_END_RATE, END_TO_END_SECONDS * scale)
+
+        fresh_pipeline('--site', END_TO_END_SITE)
+        with measuring():
+            _, counts = replay.replay(RecordingReader(path), speed=0)
+
+    stats = server.stats_logger.get_real_time_stats()
+    latencies = stats['stage_latency_ms']
+    for percentile in ('p50', 'p95', 'p99'):
+        results[f'end_to_end.latency_ms.{percentile}'] = metric(latencies['end_to_end'][percentile], 'ms', 'lower')
+    for percentile in ('p50', 'p95', 'p99'):
+        results[f'end_to_end.decision_ms.{percentile}'] = metric(
+            stats['performance_metrics'][f'{percentile}_report_to_command_ms'], 'ms', 'lower')
+    for stage in END_TO_END_STAGES:
+        if latencies[stage]['count']:
+            for percentile in ('p50', 'p99'):
+                results[f'end_to_end.{stage}_ms.{percentile}'] = metric(latencies[stage][percentile], 'ms', 'lower')
+    reports = server.stats_logger.total_messages
+    results['end_to_end.reports_per_s'] = metric(reports / counts['wall_seconds'], 'reports/s', 'higher')
+    return results
+
+BENCHMARK_FUNCTIONS = {
+    'trilateration': bench_trilateration,
+    'ingest': bench_ingest,
+    'proximity': bench_proximity,
+    'stats': bench_stats,
+    'end_to_end': bench_end_to_end
+}
+
+
+# --- Αποτελέσματα και σύγκριση ---
+def run_benchmarks(names, scale=1.0):
+    metrics = {}
+    for name in names:
+        start = time.perf_counter()
+        results = BENCHMARK_FUNCTIONS[name](scale)
+        print(f" {name}: {len(results)} metrics in {time.perf_counter() - start:.1f} s")
+        metrics.update(results)
+    return {
+        'created': datetime.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'scale': scale,
+        'metrics': metrics
+    }
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Επιστρέφει [(όνομα, baseline, τρέχουσα τιμή, μεταβολή, κατάσταση)] για τις κοινές μετρήσεις.
+
+    Η μεταβολή είναι θετική όταν η τιμή βελτιώθηκε, ανεξάρτητα από το αν
+    καλύτερο σημαίνει μεγαλύτερο (ρυθμοί) ή μικρότερο (χρόνοι).
+    """
+    rows = []
+    for name, current in results['metrics'].items():
+        reference = baseline['metrics'].get(name)
+        if reference is None or reference['value'] == 0:
+            continue
+        change = (current['value'] - reference['value']) / reference['value']
+        if current['better'] == 'lower':
+            change = -change
+        if change < -tolerance:
+            status = 'REGRESSION'
+        elif change > tolerance:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append((name, reference['value'], current['value'], change, status))
+    return rows
+
+def print_results(results, comparison=None):
+    comparison = {row[0]: row for row in comparison or ()}
+    print(f"\n {'metric':<46}{'value':>14}  {'unit':<10}{'baseline':>14}{'change':>9}")
+    for name, current in results['metrics'].items():
+        line = f" {name:<46}{current['value']:>14.3f}  {current['unit']:<10}"
+        if name in comparison:
+            _, reference, _, change, status = comparison[name]
+            line += f"{reference:>14.3f}{change * 100:>+8.1f}%  {status}"
+        print(line)
+
+def save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks του RTLS pipeline (χωρίς broker)")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="ποια benchmarks θα τρέξουν")
+    parser.add_argument("--quick", action="store_true",
+                        help="μικρότερα μεγέθη για γρήγορο έλεγχο (δεν συγκρίνεται με πλήρες baseline)")
+    parser.add_argument("--output", default=BENCHMARK_RESULTS_FILE, help="αρχείο αποτελεσμάτων (JSON)")
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_FILE, help="αρχείο baseline (JSON)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="αποθήκευση των αποτελεσμάτων ως νέο baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="επιτρεπτή χειροτέρευση ως κλάσμα (0.25 = 25%%) πριν θεωρηθεί regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only, 0.2 if args.quick else 1.0)
+    save_json(args.output, results)
+    print(f" Results saved to {args.output}")
+
+    comparison = None
+    if args.save_baseline:
+        save_json(args.baseline, results)
+        print(f" Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != results['scale']:
+            print(f" Baseline {args.baseline} was run with scale {baseline.get('scale')}, not compared")
+        else:
+            comparison = compare(results, baseline, args.tolerance)
+    else:
+        print(f" No baseline at {args.baseline} (create one with --save-baseline)")
+
+    print_results(results, comparison)
+
+    regressions = [row[0] for row in comparison or () if row[4] == 'REGRESSION']
+    if regressions:
+        print(f"\n {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
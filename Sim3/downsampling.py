@@ -0,0 +1,69 @@
+import numpy as np
+
+# Μείωση χρονοσειρών στην ανάλυση της οθόνης πριν από το plot: το matplotlib
+# δεν μπορεί να δείξει περισσότερα από ~2 σημεία ανά pixel, οπότε μια
+# εβδομάδα δειγμάτων ανά δευτερόλεπτο (~600k) γίνεται μερικές χιλιάδες σημεία.
+
+
+def lttb(x, y, points):
+    """Largest-Triangle-Three-Buckets: κρατά τα points σημεία που διατηρούν καλύτερα το σχήμα της καμπύλης.
+
+    Το πρώτο και το τελευταίο σημείο μένουν· από κάθε ενδιάμεσο bucket
+    επιλέγεται το σημείο που σχηματίζει το μεγαλύτερο τρίγωνο με το
+    προηγούμενο επιλεγμένο και με τον μέσο όρο του επόμενου bucket.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if points >= n or points < 3:
+        return x, y
+
+    # Bucket i: [edges[i], edges[i + 1]), χωρίς το πρώτο και το τελευταίο σημείο
+    edges = (np.arange(points - 1) * ((n - 2) / (points - 2))).astype(np.intp) + 1
+    # Ο χρόνος σχετικά με το πρώτο σημείο, για ακρίβεια στα αθροίσματα των timestamps
+    offset_x = x.astype(float) - float(x[0])
+    sums_x = np.concatenate(([0.0], np.cumsum(offset_x)))
+    sums_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = np.diff(edges)
+    # Μέσοι όροι κάθε bucket και, ως «επόμενο bucket» του τελευταίου, το τελευταίο σημείο
+    mean_x = np.append((sums_x[edges[1:]] - sums_x[edges[:-1]]) / sizes, offset_x[-1])
+    mean_y = np.append((sums_y[edges[1:]] - sums_y[edges[:-1]]) / sizes, y[-1])
+
+    selected = np.empty(points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(points - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        ax, ay = offset_x[previous], y[previous]
+        area = np.abs((ax - mean_x[bucket + 1]) * (y[lo:hi] - ay) - (ax - offset_x[lo:hi]) * (mean_y[bucket + 1] - ay))
+        previous = lo + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
+
+
+def minmax(x, y, pixels):
+    """Το ελάχιστο και το μέγιστο κάθε ενός από pixels ισομεγέθη buckets (με τη σειρά τους).
+
+    Γρηγορότερο από το lttb και κρατά πάντα τις ακραίες τιμές (π.χ. spikes
+    καθυστέρησης), με έως 2 * pixels σημεία.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= 2 * pixels or pixels < 1:
+        return x, y
+
+    size = n // pixels
+    full = pixels * size
+    buckets = y[:full].reshape(pixels, size)
+    starts = np.arange(0, full, size)
+    indices = [starts + np.argmin(buckets, axis=1), starts + np.argmax(buckets, axis=1), [0, n - 1]]
+    if full < n:
+        # Τα υπόλοιπα σημεία ως ένα ακόμη (μικρότερο) bucket
+        indices.append([full + int(np.argmin(y[full:])), full + int(np.argmax(y[full:]))])
+    selected = np.unique(np.concatenate(indices))
+    return x[selected], y[selected]
+
+
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': minmax}
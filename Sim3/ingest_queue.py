@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+
+INGEST_POLICIES = ('latest', 'drop_oldest')
+
+
+class IngestQueue:
+    """Bounded buffer ανάμεσα στο MQTT thread (put) και στο main loop (drain).
+
+    Η χωρητικότητα μετριέται σε αναφορές (ένα binary batch μετρά όσο τα
+    records του). Πολιτικές:
+      'latest'      : κρατά μόνο την πιο πρόσφατη αναφορά ανά (tag, anchor)
+                      και όταν γεμίσει πετά τις παλαιότερες
+      'drop_oldest' : FIFO που πετά τις παλαιότερες αναφορές όταν γεμίσει
+    Έτσι σε υπερφόρτωση χάνονται παλιά δεδομένα αντί να μεγαλώνει η
+    καθυστέρηση. Τα batches δεν συγχωνεύονται, μόνο πετιούνται ολόκληρα.
+    """
+
+    def __init__(self, capacity=100000, policy='latest'):
+        if policy not in INGEST_POLICIES:
+            raise ValueError(f"unknown ingest policy {policy!r}, expected one of {INGEST_POLICIES}")
+        self.capacity = capacity
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._next_key = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return self.depth
+
+    def put_report(self, tag_id, anchor_id, item):
+        """Μία αναφορά· με 'latest' αντικαθιστά την εκκρεμή του ίδιου (tag, anchor)."""
+        with self._lock:
+            self.enqueued += 1
+            if self.policy == 'latest':
+                key = (tag_id, anchor_id)
+                if key in self._items:
+                    # Η νεότερη τιμή παίρνει και τη θέση της νεότερης (δεν πετιέται πρώτη)
+                    self._items[key] = (item, 1)
+                    self._items.move_to_end(key)
+                    self.coalesced += 1
+                    return
+            else:
+                key = self._new_key()
+            self._append(key, item, 1)
+
+    def put_batch(self, item, size):
+        """Ένα binary batch με size αναφορές."""
+        with self._lock:
+            self.enqueued += size
+            self._append(self._new_key(), item, size)
+
+    def _new_key(self):
+        self._next_key += 1
+        return self._next_key
+
+    def _append(self, key, item, size):
+        self._items[key] = (item, size)
+        self.depth += size
+        # Το νεότερο στοιχείο μένει πάντα, ακόμη κι αν μόνο του ξεπερνά τη χωρητικότητα
+        while self.depth > self.capacity and len(self._items) > 1:
+            _, (_, dropped_size) = self._items.popitem(last=False)
+            self.depth -= dropped_size
+            self.dropped += dropped_size
+        if self.depth > self.max_depth:
+            self.max_depth = self.depth
+
+    def drain(self):
+        """Επιστρέφει όλα τα εκκρεμή στοιχεία (με σειρά άφιξης) και αδειάζει την ουρά."""
+        with self._lock:
+            items, self._items = self._items, OrderedDict()
+            self.depth = 0
+        return [item for item, _ in items.values()]
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'capacity': self.capacity,
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced
+        }
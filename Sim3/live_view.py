@@ -0,0 +1,218 @@
+import json
+import time
+import numpy as np
+import matplotlib
+matplotlib.use('TkAgg')
+import matplotlib.pyplot as plt
+
+# --- Διαμόρφωση (για αυτόνομη εκτέλεση) ---
+MQTT_BROKER_HOST = "localhost"
+MQTT_BROKER_PORT = 1883
+MQTT_POSITIONS_TOPIC = "uwb/positions"
+
+ANCHOR_POSITIONS = {
+    "anchor1": np.array([0.0, 0.0]),
+    "anchor2": np.array([5.0, 0.0]),
+    "anchor3": np.array([0.0, 7.0]),
+    "anchor4": np.array([5.0, 7.0])
+}
+
+
+class LiveView:
+    """Real-time γράφημα των θέσεων των tags.
+
+    Χρησιμοποιείται είτε μέσα στο rtls_server.py (όταν δεν τρέχει με
+    --headless) είτε αυτόνομα, διαβάζοντας τις θέσεις από το MQTT.
+
+    Τα tags είναι δύο scatter collections (κανονικά / σε εγγύτητα, με ενιαίο
+    στυλ το καθένα ώστε να ζωγραφίζονται γρήγορα) και οι ετικέτες ένα
+    σταθερό σύνολο Text artists που επαναχρησιμοποιούνται. Κάθε frame κάνει
+    blit πάνω στο cached background (άξονες, anchors, legend) και ο ρυθμός
+    frames περιορίζεται στα max_fps ανεξάρτητα από το πόσο συχνά καλείται
+    η update(). Με περισσότερα από max_labels tags εμφανίζονται ετικέτες
+    μόνο για τα tags σε εγγύτητα. Τα anchors έχουν ετικέτα και δική τους
+    γραμμή στο legend μόνο όταν είναι έως max_anchor_labels.
+    """
+
+    def __init__(self, anchor_positions, max_fps=10, max_labels=30, max_anchor_labels=12):
+        self.min_frame_interval = 1.0 / max_fps
+        self.max_labels = max_labels
+        self.max_anchor_labels = max_anchor_labels
+        self._last_frame = 0.0
+        self._background = None
+        self.setup_plot(anchor_positions)
+
+    def setup_plot(self, anchor_positions):
+        """Ρυθμίζει το αρχικό γράφημα."""
+        plt.ion()
+        self.fig, self.ax = plt.subplots(figsize=(10, 8))
+        ax = self.ax
+        ax.set_xlabel("Συντεταγμένη X (m)")
+        ax.set_ylabel("Συντεταγμένη Y (m)")
+        ax.set_title("Σύστημα Εντοπισμού Θέσης UWB - Real Time")
+        ax.grid(True)
+        ax.set_aspect('equal', adjustable='box')
+
+        anchor_x_coords = [pos[0] for pos in anchor_positions.values()]
+        anchor_y_coords = [pos[1] for pos in anchor_positions.values()]
+
+        if anchor_x_coords and anchor_y_coords:
+            ax.set_xlim(min(anchor_x_coords) - 1, max(anchor_x_coords) + 1)
+            ax.set_ylim(min(anchor_y_coords) - 1, max(anchor_y_coords) + 1)
+
+        if len(anchor_positions) <= self.max_anchor_labels:
+            for anchor_id, pos in anchor_positions.items():
+                ax.plot(pos[0], pos[1], 's', markersize=12, label=f"Anchor: {anchor_id}", color='black', markeredgecolor='gray')
+                ax.text(pos[0] + 0.1, pos[1] + 0.1, anchor_id, fontsize=9, color='black')
+        else:
+            # Μεγάλο site: όλα τα anchors σε ένα artist, χωρίς ετικέτες
+            ax.scatter(anchor_x_coords, anchor_y_coords, marker='s', s=6**2, color='black',
+                       label=f"Anchors ({len(anchor_positions)})")
+
+        ax.legend(loc='upper right')
+
+        # Animated artists: δεν μπαίνουν στο background, ζωγραφίζονται με blit
+        # (μέγεθος scatter = markersize²)
+        self.tag_points = ax.scatter(np.empty(0), np.empty(0), s=7**2, color='blue', zorder=3, animated=True)
+        self.proximity_points = ax.scatter(np.empty(0), np.empty(0), s=10**2, color='red', zorder=5, animated=True)
+        self.labels = [ax.text(0, 0, "", fontsize=8, zorder=5, animated=True, visible=False)
+                       for _ in range(self.max_labels)]
+
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        plt.show()
+        self.fig.canvas.draw()
+
+    def _on_draw(self, event):
+        """Κρατά το νέο background μετά από πλήρη σχεδίαση (π.χ. resize)."""
+        canvas = self.fig.canvas
+        if canvas.supports_blit:
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        self.ax.draw_artist(self.tag_points)
+        self.ax.draw_artist(self.proximity_points)
+        for label in self.labels:
+            if label.get_visible():
+                self.ax.draw_artist(label)
+
+    def is_open(self):
+        return plt.fignum_exists(self.fig.number)
+
+    def update(self, tag_ids, positions, tags_in_proximity_set):
+        """Ενημερώνει το γράφημα με προστασία από interrupts.
+
+        tag_ids: λίστα με τα tags που εμφανίζονται, positions: πίνακας (n, 2).
+        """
+        now = time.perf_counter()
+        if now - self._last_frame < self.min_frame_interval:
+            return
+
+        try:
+            # Έλεγχος αν το figure είναι ακόμα ανοιχτό
+            if not self.is_open():
+                return
+            self._last_frame = now
+
+            positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+            in_proximity = np.fromiter((tag_id in tags_in_proximity_set for tag_id in tag_ids),
+                                       dtype=bool, count=len(tag_ids))
+
+            self.tag_points.set_offsets(positions[~in_proximity])
+            self.proximity_points.set_offsets(positions[in_proximity])
+
+            # Ετικέτες: όλα τα tags αν χωράνε, αλλιώς μόνο όσα είναι σε εγγύτητα
+            if len(tag_ids) <= self.max_labels:
+                labelled = np.arange(len(tag_ids))
+            else:
+                labelled = np.flatnonzero(in_proximity)[:self.max_labels]
+
+            for label, index in zip(self.labels, labelled):
+                pos = positions[index]
+                color = 'red' if in_proximity[index] else 'blue'
+                label.set_position((pos[0] + 0.08, pos[1] + 0.08))
+                label.set_text(tag_ids[index])
+                label.set_color(color)
+                label.set_visible(True)
+            for label in self.labels[len(labelled):]:
+                label.set_visible(False)
+
+            self._render()
+
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except Exception as e:
+            pass
+
+    def _render(self):
+        canvas = self.fig.canvas
+        if self._background is None:
+            # Πλήρης σχεδίαση· το _on_draw κρατά το background για τα επόμενα frames
+            canvas.draw_idle()
+        else:
+            canvas.restore_region(self._background)
+            self._draw_animated()
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def close(self):
+        try:
+            plt.close('all')
+            plt.ioff()
+        except:
+            pass
+
+
+# --- Αυτόνομος consumer: διαβάζει τις θέσεις που δημοσιεύει ο server ---
+if __name__ == "__main__":
+    import argparse
+    import paho.mqtt.client as mqtt
+    from anchor_registry import load_site
+
+    parser = argparse.ArgumentParser(description="UWB live view (θέσεις από το MQTT)")
+    parser.add_argument("--site", metavar="FILE", help="site file (JSON) με τα anchors, όπως στον server")
+    args = parser.parse_args()
+    anchor_positions = load_site(args.site) if args.site else ANCHOR_POSITIONS
+
+    latest_snapshot = {"tags": [], "proximity": []}
+
+    def on_connect(client, userdata, flags, rc):
+        print(f"Live View: Connected to MQTT Broker with result code {rc}")
+        client.subscribe(MQTT_POSITIONS_TOPIC)
+
+    def on_message(client, userdata, msg):
+        global latest_snapshot
+        try:
+            latest_snapshot = json.loads(msg.payload.decode())
+        except Exception as e:
+            print(f"Live View: Error decoding positions: {e}")
+
+    try:
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
+    except AttributeError:
+        client = mqtt.Client()
+
+    client.on_connect = on_connect
+    client.on_message = on_message
+
+    try:
+        client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT, 60)
+    except Exception as e:
+        print(f"Live View: Could not connect to MQTT Broker: {e}")
+        exit(1)
+
+    client.loop_start()
+    view = LiveView(anchor_positions)
+
+    try:
+        while view.is_open():
+            snapshot = latest_snapshot
+            view.update([tag[0] for tag in snapshot["tags"]], [tag[1:] for tag in snapshot["tags"]],
+                        set(snapshot["proximity"]))
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        view.close()
+        client.loop_stop()
+        client.disconnect()
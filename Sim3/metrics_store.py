@@ -0,0 +1,259 @@
+import os
+import json
+import queue
+import threading
+import time
+import numpy as np
+
+# Columnar time-series store για τα στατιστικά του server:
+#
+#   <directory>/tag_names.txt             interned tag ids, ένα ανά γραμμή (δείκτης = αριθμός γραμμής)
+#   <directory>/<table>/schema.json       τα πεδία του πίνακα ([όνομα, dtype] ανά στήλη)
+#   <directory>/<table>/000001/<col>.bin  οι τιμές κάθε στήλης, little-endian, append-only
+#
+# Κάθε πίνακας γράφεται σε segments που αλλάζουν όταν ξεπεράσουν σε μέγεθος ή
+# διάρκεια τα όρια, οπότε τα παλιά αρχεία κλείνουν οριστικά (και μπορούν να
+# αρχειοθετηθούν ή να σβηστούν) χωρίς να αγγίζονται τα νέα. Μετά από crash οι
+# στήλες ενός segment μπορεί να έχουν διαφορετικό μήκος· ο reader κρατά το
+# κοινό τους μήκος.
+#
+# Κάθε πίνακας έχει στήλη timestamp και τα records γράφονται σε αύξουσα χρονική
+# σειρά, οπότε ο reader βρίσκει ένα χρονικό διάστημα με δυαδική αναζήτηση και
+# διαβάζει (memory-mapped) μόνο τα segments που το επικαλύπτουν.
+
+METRICS_SEGMENT_BYTES = 64 * 1024 * 1024
+METRICS_SEGMENT_SECONDS = 3600.0
+METRICS_READ_CHUNK_ROWS = 1 << 20
+TAG_NAMES_FILE = "tag_names.txt"
+SCHEMA_FILE = "schema.json"
+
+
+class ColumnarTable:
+    """Ένας πίνακας του store: ένα αρχείο ανά στήλη σε κάθε segment."""
+
+    def __init__(self, directory, dtype, segment_bytes=METRICS_SEGMENT_BYTES, segment_seconds=METRICS_SEGMENT_SECONDS):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.dtype.descr, f)
+
+        # Η αρίθμηση συνεχίζει μετά από ό,τι υπάρχει ήδη (π.χ. επανεκκίνηση στον ίδιο φάκελο)
+        existing = [int(name) for name in os.listdir(directory) if name.isdigit()]
+        self.segment = max(existing, default=0)
+        self._files = None
+        self._segment_started = None
+        self._segment_size = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def _open_segment(self, now):
+        self.segment += 1
+        path = os.path.join(self.directory, f"{self.segment:06d}")
+        os.makedirs(path, exist_ok=True)
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), 'ab') for name in self.dtype.names}
+        self._segment_started = now
+        self._segment_size = 0
+
+    def _close_segment(self):
+        if self._files is not None:
+            for f in self._files.values():
+                f.close()
+            self._files = None
+
+    def append(self, records):
+        """Προσθέτει records (structured array με τα πεδία του πίνακα)."""
+        if len(records) == 0:
+            return
+        now = time.time()
+        if (self._files is None or self._segment_size >= self.segment_bytes
+                or now - self._segment_started >= self.segment_seconds):
+            self._close_segment()
+            self._open_segment(now)
+
+        for name, f in self._files.items():
+            f.write(np.ascontiguousarray(records[name], dtype=self.dtype[name]).tobytes())
+        size = len(records) * self.dtype.itemsize
+        self._segment_size += size
+        self.bytes += size
+        self.rows += len(records)
+
+    def flush(self):
+        if self._files is not None:
+            for f in self._files.values():
+                f.flush()
+
+    def close(self):
+        self._close_segment()
+
+
+class MetricsStore:
+    """Columnar store με background writer.
+
+    Τα append()/append_names() μόνο βάζουν τα δεδομένα σε ουρά· ένα thread
+    τα γράφει στους πίνακες και κάνει flush μετά από κάθε παρτίδα, οπότε
+    το I/O δεν καθυστερεί ποτέ τον καλούντα και ό,τι έχει γραφτεί μένει
+    στο δίσκο ακόμη κι αν η διεργασία τερματιστεί απότομα.
+    """
+
+    def __init__(self, directory, tables, segment_bytes=METRICS_SEGMENT_BYTES,
+                 segment_seconds=METRICS_SEGMENT_SECONDS):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.tables = {name: ColumnarTable(os.path.join(directory, name), dtype, segment_bytes, segment_seconds)
+                       for name, dtype in tables.items()}
+        self._names = open(os.path.join(directory, TAG_NAMES_FILE), 'a', encoding='utf-8')
+        self._queue = queue.SimpleQueue()
+        self.batches = 0
+        self.errors = 0
+        self._writer = threading.Thread(target=self._run, daemon=True)
+        self._writer.start()
+
+    def append(self, table, records):
+        self._queue.put((table, records))
+
+    def append_names(self, names):
+        """Νέα interned tag ids, με τη σειρά των δεικτών τους."""
+        if names:
+            self._queue.put((None, list(names)))
+
+    def _write(self, table, data):
+        if table is None:
+            self._names.write("".join(f"{name}\n" for name in data))
+        else:
+            self.tables[table].append(data)
+
+    def _flush(self):
+        self._names.flush()
+        for table in self.tables.values():
+            table.flush()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            # Ό,τι περιμένει ήδη στην ουρά γράφεται μαζί, με ένα flush στο τέλος
+            while item is not None:
+                try:
+                    self._write(*item)
+                    self.batches += 1
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Metrics store write failed: {e}")
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._flush()
+            if item is None:
+                return
+
+    def close(self):
+        """Γράφει ό,τι εκκρεμεί και κλείνει τα αρχεία."""
+        self._queue.put(None)
+        self._writer.join()
+        self._names.close()
+        for table in self.tables.values():
+            table.close()
+
+    def stats(self):
+        return {
+            'directory': self.directory,
+            'rows': {name: table.rows for name, table in self.tables.items()},
+            'bytes': sum(table.bytes for table in self.tables.values()),
+            'segments': {name: table.segment for name, table in self.tables.items()},
+            'pending': self._queue.qsize(),
+            'errors': self.errors
+        }
+
+
+class MetricsReader:
+    """Διαβάζει έναν φάκελο του MetricsStore· οι στήλες ανοίγουν memory-mapped."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.tables = {}
+        for name in sorted(os.listdir(directory)):
+            schema = os.path.join(directory, name, SCHEMA_FILE)
+            if os.path.exists(schema):
+                with open(schema, encoding='utf-8') as f:
+                    self.tables[name] = np.dtype([tuple(field) for field in json.load(f)])
+
+        names_path = os.path.join(directory, TAG_NAMES_FILE)
+        self.tag_names = []
+        if os.path.exists(names_path):
+            with open(names_path, encoding='utf-8') as f:
+                self.tag_names = f.read().splitlines()
+
+    def segments(self, table):
+        """Οι φάκελοι των segments ενός πίνακα, με σειρά εγγραφής."""
+        directory = os.path.join(self.directory, table)
+        return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.isdigit()]
+
+    def _segment_length(self, table, segment):
+        dtype = self.tables[table]
+        sizes = [os.path.getsize(os.path.join(segment, f"{name}.bin")) // dtype[name].itemsize
+                 if os.path.exists(os.path.join(segment, f"{name}.bin")) else 0
+                 for name in dtype.names]
+        return min(sizes)
+
+    def _column(self, table, segment, name, length):
+        return np.memmap(os.path.join(segment, f"{name}.bin"), dtype=self.tables[table][name], mode='r',
+                         shape=(length,))
+
+    def _segment_slices(self, table, columns, start, end):
+        """Παράγει {στήλη: memmap} για τις γραμμές κάθε segment με timestamp στο [start, end)."""
+        for segment in self.segments(table):
+            length = self._segment_length(table, segment)
+            if length == 0:
+                continue
+            first, last = 0, length
+            if start is not None or end is not None:
+                timestamps = self._column(table, segment, 'timestamp', length)
+                if start is not None:
+                    if timestamps[-1] < start:
+                        continue
+                    first = int(np.searchsorted(timestamps, start, side='left'))
+                if end is not None:
+                    if timestamps[0] >= end:
+                        break
+                    last = int(np.searchsorted(timestamps, end, side='left'))
+                if first >= last:
+                    continue
+            yield {name: self._column(table, segment, name, length)[first:last] for name in columns}
+
+    def time_range(self, table):
+        """(πρώτο, τελευταίο) timestamp του πίνακα, ή None αν είναι κενός."""
+        bounds = []
+        for segment in self.segments(table):
+            length = self._segment_length(table, segment)
+            if length:
+                timestamps = self._column(table, segment, 'timestamp', length)
+                bounds.append((float(timestamps[0]), float(timestamps[-1])))
+        if not bounds:
+            return None
+        return bounds[0][0], bounds[-1][1]
+
+    def read(self, table, columns=None, start=None, end=None):
+        """Επιστρέφει {στήλη: πίνακας} με τις γραμμές του πίνακα στο [start, end) (προεπιλογή: όλες).
+
+        Από ένα segment επιστρέφονται memmap views χωρίς αντιγραφή· από
+        περισσότερα, οι στήλες ενώνονται σε μνήμη.
+        """
+        dtype = self.tables[table]
+        columns = list(columns or dtype.names)
+        parts = list(self._segment_slices(table, columns, start, end))
+        if not parts:
+            return {name: np.empty(0, dtype=dtype[name]) for name in columns}
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name in columns}
+
+    def chunks(self, table, columns=None, start=None, end=None, rows=METRICS_READ_CHUNK_ROWS):
+        """Όπως το read, σε κομμάτια έως rows γραμμών (για υπολογισμούς σε σταθερή μνήμη)."""
+        columns = list(columns or self.tables[table].names)
+        for part in self._segment_slices(table, columns, start, end):
+            length = len(part[columns[0]])
+            for offset in range(0, length, rows):
+                yield {name: values[offset:offset + rows] for name, values in part.items()}
@@ -0,0 +1,206 @@
+import time
+import threading
+from collections import namedtuple
+
+# Αποστολή των εντολών κινητήρων εκτός του main loop:
+#
+#   submit()    : main loop, μόνο καταχωρεί την επιθυμητή κατάσταση (χωρίς I/O)
+#   dispatch()  : thread του dispatcher (ή το replay.py συγχρονισμένα), κάνει τα publish
+#   on_publish(): thread του MQTT client, PUBACK για QoS 1
+#
+# Ανά tag στέλνεται το πολύ μία εντολή ανά coalesce_seconds: η πρώτη αλλαγή
+# φεύγει αμέσως, όσες ακολουθούν μέσα στο παράθυρο συγχωνεύονται στην πιο
+# πρόσφατη, και αν αυτή είναι ίδια με ό,τι στάλθηκε ήδη (ON→OFF→ON) δεν
+# στέλνεται τίποτα.
+#
+# Με QoS 1 την επανάληψη την κάνει ο MQTT client: κρατά κάθε εντολή χωρίς
+# PUBACK και την ξαναστέλνει με το ίδιο mid μετά από επανασύνδεση, οπότε ο
+# broker δεν τη διανέμει δεύτερη φορά. Εδώ το ack_timeout μόνο αναφέρει τις
+# εντολές που δεν επιβεβαιώθηκαν εγκαίρως (unacknowledged) και μετρά όσες
+# επιβεβαιώθηκαν αργότερα (late_acks). Μετά από late_ack_grace ακόμη
+# δευτερόλεπτα παύουμε να τις περιμένουμε (abandoned), ώστε σε διακοπή του
+# broker οι εγγραφές να μη μαζεύονται επ' αόριστον.
+
+MOTOR_COALESCE_SECONDS = 0.25
+MOTOR_COMMAND_QOS = 1
+MOTOR_ACK_TIMEOUT_SECONDS = 1.0
+# Πόσο ακόμη μετά το ack timeout μετράει ένα PUBACK ως late_ack
+MOTOR_LATE_ACK_GRACE_SECONDS = 10.0
+# Πόσο περιμένει το close() τα PUBACK των τελευταίων εντολών
+MOTOR_CLOSE_TIMEOUT_SECONDS = 2.0
+
+# Μία εντολή που περιμένει PUBACK (overdue: έχει ήδη αναφερθεί ως καθυστερημένη)
+InFlightCommand = namedtuple('InFlightCommand', ['tag_id', 'command', 'submitted_at', 'sent_at', 'overdue'])
+
+
+class MotorCommandDispatcher:
+    """Στέλνει τις εντολές ON/OFF των κινητήρων από δικό του thread, με coalescing και επιβεβαίωση παράδοσης."""
+
+    def __init__(self, client, topic_prefix, coalesce_seconds=MOTOR_COALESCE_SECONDS, qos=MOTOR_COMMAND_QOS,
+                 ack_timeout=MOTOR_ACK_TIMEOUT_SECONDS, late_ack_grace=MOTOR_LATE_ACK_GRACE_SECONDS,
+                 clock=time.time, verbose=True):
+        self.client = client
+        self.topic_prefix = topic_prefix
+        self.coalesce_seconds = coalesce_seconds
+        self.qos = qos
+        self.ack_timeout = ack_timeout
+        self.late_ack_grace = late_ack_grace
+        self.clock = clock
+        self.verbose = verbose
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._submitted = []
+        self._acks = {}
+        self._latencies = []
+
+        # Κατάσταση του dispatcher (μόνο από το δικό του thread)
+        self._topics = {}
+        self._desired = {}
+        self._last_sent = {}
+        self._in_flight = {}
+        self.counters = {'submitted': 0, 'published': 0, 'coalesced': 0, 'acked': 0, 'superseded': 0,
+                         'unacknowledged': 0, 'late_acks': 0, 'abandoned': 0}
+
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, tag_id, on):
+        """Main loop: νέα επιθυμητή κατάσταση κινητήρα για ένα tag."""
+        with self._lock:
+            self._submitted.append((tag_id, "ON" if on else "OFF", self.clock()))
+        self._wakeup.set()
+
+    def on_publish(self, client, userdata, mid):
+        """Callback του MQTT client (και για μηνύματα που δεν είναι εντολές)· ο dispatcher αγνοεί τα άγνωστα mid."""
+        now = self.clock()
+        with self._lock:
+            self._acks[mid] = now
+        self._wakeup.set()
+
+    def drain_latencies(self):
+        """Καθυστερήσεις (ms) από το submit μέχρι την επιβεβαίωση, από την προηγούμενη κλήση."""
+        with self._lock:
+            latencies, self._latencies = self._latencies, []
+        return latencies
+
+    def _topic(self, tag_id):
+        topic = self._topics.get(tag_id)
+        if topic is None:
+            topic = self._topics[tag_id] = f"{self.topic_prefix}{tag_id}/motor"
+        return topic
+
+    def _publish(self, tag_id, command, submitted_at, now):
+        info = self.client.publish(self._topic(tag_id), command, qos=self.qos)
+        self._last_sent[tag_id] = (command, now)
+        self.counters['published'] += 1
+        if self.verbose:
+            print(f"Εντολή: Κινητήρας {command} για {tag_id}")
+        if self.qos == 0:
+            with self._lock:
+                self._latencies.append((now - submitted_at) * 1000)
+            return
+        # Και χωρίς σύνδεση ο client κρατά την εντολή και τη στέλνει μετά την επανασύνδεση
+        self._in_flight[info.mid] = InFlightCommand(tag_id, command, submitted_at, now, False)
+
+    def dispatch(self, now, flush=False):
+        """Ένα πέρασμα: acks, νέες εντολές, έλεγχος των PUBACK που αργούν.
+
+        Με flush οι εντολές που περιμένουν το παράθυρο coalescing φεύγουν
+        αμέσως. Επιστρέφει πότε χρειάζεται το επόμενο πέρασμα (ή None).
+        """
+        with self._lock:
+            submitted, self._submitted = self._submitted, []
+            acks, self._acks = self._acks, {}
+
+        for mid, acked_at in acks.items():
+            command = self._in_flight.pop(mid, None)
+            if command is not None:
+                self.counters['late_acks' if command.overdue else 'acked'] += 1
+                with self._lock:
+                    self._latencies.append((acked_at - command.submitted_at) * 1000)
+
+        for tag_id, command, submitted_at in submitted:
+            self.counters['submitted'] += 1
+            if tag_id in self._desired:
+                self.counters['coalesced'] += 1
+            self._desired[tag_id] = (command, submitted_at)
+
+        next_wakeup = None
+        for tag_id, (command, submitted_at) in list(self._desired.items()):
+            last = self._last_sent.get(tag_id)
+            if last is not None and last[0] == command:
+                # Επέστρεψε στην κατάσταση που έχει ήδη σταλεί
+                del self._desired[tag_id]
+                self.counters['coalesced'] += 1
+            elif flush or last is None or now - last[1] >= self.coalesce_seconds:
+                del self._desired[tag_id]
+                self._publish(tag_id, command, submitted_at, now)
+            else:
+                deadline = last[1] + self.coalesce_seconds
+                next_wakeup = deadline if next_wakeup is None else min(next_wakeup, deadline)
+
+        for mid, command in list(self._in_flight.items()):
+            if command.overdue:
+                if now >= command.sent_at + self.ack_timeout + self.late_ack_grace:
+                    del self._in_flight[mid]
+                    self.counters['abandoned'] += 1
+                continue
+            deadline = command.sent_at + self.ack_timeout
+            if now < deadline:
+                next_wakeup = deadline if next_wakeup is None else min(next_wakeup, deadline)
+                continue
+            # Μένει in-flight για late_ack_grace ακόμη, ώστε ένα αργοπορημένο PUBACK να μετρηθεί (late_acks)
+            self._in_flight[mid] = command._replace(overdue=True)
+            if self._last_sent[command.tag_id][0] != command.command:
+                self.counters['superseded'] += 1
+            else:
+                self.counters['unacknowledged'] += 1
+                print(f"Η εντολή {command.command} για {command.tag_id} δεν επιβεβαιώθηκε "
+                      f"μέσα σε {self.ack_timeout:.1f} s")
+
+        return next_wakeup
+
+    def _run(self):
+        while self._running:
+            next_wakeup = self.dispatch(self.clock())
+            timeout = max(0.0, next_wakeup - self.clock()) if next_wakeup is not None else None
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def close(self, timeout=MOTOR_CLOSE_TIMEOUT_SECONDS):
+        """Σταματά το thread, στέλνει όσες εντολές περιμένουν ακόμη και περιμένει τα PUBACK τους.
+
+        Περιμένει μόνο εντολές που δεν έχουν ξεπεράσει το ack_timeout, και το
+        πολύ timeout δευτερόλεπτα (πραγματικού χρόνου)· ο MQTT client πρέπει
+        να τρέχει ακόμη. Επιστρέφει πόσες εντολές έμειναν χωρίς επιβεβαίωση.
+        """
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+
+        give_up = time.monotonic() + timeout
+        next_wakeup = self.dispatch(self.clock(), flush=True)
+        while self._awaiting_ack() and time.monotonic() < give_up:
+            wait = give_up - time.monotonic()
+            if next_wakeup is not None:
+                wait = min(wait, next_wakeup - self.clock())
+            self._wakeup.wait(max(0.0, wait))
+            self._wakeup.clear()
+            next_wakeup = self.dispatch(self.clock(), flush=True)
+
+        if self._in_flight:
+            print(f"{len(self._in_flight)} εντολές κινητήρων έμειναν χωρίς επιβεβαίωση κατά τον τερματισμό")
+        return len(self._in_flight)
+
+    def _awaiting_ack(self):
+        return any(not command.overdue for command in self._in_flight.values())
+
+    def stats(self):
+        return dict(self.counters, pending=len(self._desired), in_flight=len(self._in_flight))
@@ -0,0 +1,86 @@
+from collections import namedtuple
+
+# Ολοκληρωμένο encounter: έναρξη, διάρκεια (s) και ελάχιστη απόσταση (m)
+Encounter = namedtuple('Encounter', ['tag1', 'tag2', 'start', 'duration', 'min_distance'])
+
+
+class _ActiveEncounter:
+    __slots__ = ('start', 'min_distance', 'distance')
+
+    def __init__(self, start, distance):
+        self.start = start
+        self.min_distance = distance
+        self.distance = distance
+
+
+class EncounterTracker:
+    """Κατάσταση ανά ζεύγος tags, ώστε η εγγύτητα να δίνει γεγονότα έναρξης/λήξης.
+
+    Ένα ζεύγος μπαίνει σε encounter μόλις η απόσταση πέσει κάτω από το
+    enter_threshold και βγαίνει όταν ξεπεράσει το (μεγαλύτερο)
+    exit_threshold ή χαθεί από τα ζεύγη (π.χ. έληξε η θέση ενός tag).
+    Κάθε encounter κρατά τουλάχιστον min_dwell δευτερόλεπτα, οπότε ο
+    θόρυβος γύρω από τα όρια δεν ανοιγοκλείνει κινητήρες. Το κόστος ανά
+    έλεγχο είναι ανάλογο των κοντινών ζευγών, όχι των tags.
+    """
+
+    def __init__(self, enter_threshold, exit_threshold, min_dwell):
+        if exit_threshold < enter_threshold:
+            raise ValueError("exit_threshold must not be smaller than enter_threshold")
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.min_dwell = min_dwell
+        self._active = {}
+        self._tag_encounters = {}
+
+    def __len__(self):
+        return len(self._active)
+
+    def update(self, close_pairs, now):
+        """Ενημερώνει με τα ζεύγη [(tag1, tag2, distance)] σε απόσταση < exit_threshold.
+
+        Η σειρά των tags σε κάθε ζεύγος δεν έχει σημασία (το spatial index
+        μπορεί να τη δώσει ανάποδα, π.χ. αφού ένα tag λήξει και ξαναμπεί)·
+        το κλειδί είναι πάντα (μικρότερο id, μεγαλύτερο id). Επιστρέφει
+        (entered, exited): τα νέα ζεύγη ως (tag1, tag2, distance) και τα
+        encounters που έληξαν ως Encounter.
+        """
+        entered = []
+        seen = set()
+        for tag1, tag2, distance in close_pairs:
+            key = (tag1, tag2) if tag1 <= tag2 else (tag2, tag1)
+            encounter = self._active.get(key)
+            if encounter is not None:
+                if distance <= self.exit_threshold:
+                    seen.add(key)
+                    encounter.distance = distance
+                    if distance < encounter.min_distance:
+                        encounter.min_distance = distance
+            elif distance < self.enter_threshold:
+                seen.add(key)
+                self._active[key] = _ActiveEncounter(now, distance)
+                for tag_id in key:
+                    self._tag_encounters[tag_id] = self._tag_encounters.get(tag_id, 0) + 1
+                entered.append((key[0], key[1], distance))
+
+        exited = [self._close(key, now) for key, encounter in list(self._active.items())
+                  if key not in seen and now - encounter.start >= self.min_dwell]
+        return entered, exited
+
+    def close_all(self, now):
+        """Κλείνει όλα τα ενεργά encounters (π.χ. στον τερματισμό)."""
+        return [self._close(key, now) for key in list(self._active)]
+
+    def _close(self, key, now):
+        encounter = self._active.pop(key)
+        for tag_id in key:
+            remaining = self._tag_encounters[tag_id] - 1
+            if remaining:
+                self._tag_encounters[tag_id] = remaining
+            else:
+                del self._tag_encounters[tag_id]
+        return Encounter(key[0], key[1], encounter.start, now - encounter.start, encounter.min_distance)
+
+    def active_tags(self):
+        """Tags με τουλάχιστον ένα ενεργό encounter."""
+        return set(self._tag_encounters)
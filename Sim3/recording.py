@@ -0,0 +1,123 @@
+import os
+import struct
+from bisect import bisect_right
+
+# Append-only καταγραφή των μηνυμάτων αποστάσεων που φτάνουν στον server:
+#
+#   αρχείο   : magic "UWBR", version (u8), και μετά frames μέχρι το τέλος
+#   frame    : kind (u8), received_at (f8), μήκος payload (u32), payload
+#   index    : <αρχείο>.idx με (received_at (f8), offset (u64)) ανά INDEX_INTERVAL_SECONDS
+#
+# Το payload είναι το μήνυμα όπως ήρθε (JSON αναφορά, binary batch του
+# wire_format.py ή JSON νέας θέσης anchor), οπότε το replay περνά από τον
+# ίδιο κώδικα αποκωδικοποίησης.
+# Το index επιτρέπει να ξεκινά η ανάγνωση από οποιαδήποτε χρονική στιγμή· αν
+# λείπει ή είναι κομμένο, η ανάγνωση απλώς σαρώνει από την αρχή. Ένα μισό
+# frame στο τέλος (π.χ. μετά από crash) αγνοείται.
+
+RECORDING_MAGIC = b"UWBR"
+RECORDING_VERSION = 1
+INDEX_INTERVAL_SECONDS = 1.0
+
+FRAME_REPORT = 0
+FRAME_BATCH = 1
+FRAME_ANCHOR = 2
+
+_FILE_HEADER = struct.Struct("<4sB")
+_FRAME_HEADER = struct.Struct("<BdI")
+_INDEX_ENTRY = struct.Struct("<dQ")
+
+
+class RangeRecorder:
+    """Γράφει κάθε εισερχόμενο μήνυμα αποστάσεων σε αρχείο καταγραφής.
+
+    Το MQTT thread κρατά τα frames πριν από την ουρά εισόδου και το main
+    loop τα γράφει εδώ, ώστε η καταγραφή να περιέχει όσα έφτασαν και όχι
+    όσα επέζησαν του load shedding. Κάθε record() είναι ένα buffered write
+    χωρίς κωδικοποίηση.
+    """
+
+    def __init__(self, path, index_interval=INDEX_INTERVAL_SECONDS):
+        self.path = path
+        self.index_interval = index_interval
+        self._file = open(path, 'wb')
+        self._index = open(path + '.idx', 'wb')
+        self._file.write(_FILE_HEADER.pack(RECORDING_MAGIC, RECORDING_VERSION))
+        self._offset = _FILE_HEADER.size
+        self._next_index_at = None
+        self.frames = 0
+
+    def record(self, kind, received_at, payload):
+        if self._next_index_at is None or received_at >= self._next_index_at:
+            self._index.write(_INDEX_ENTRY.pack(received_at, self._offset))
+            self._next_index_at = received_at + self.index_interval
+
+        self._file.write(_FRAME_HEADER.pack(kind, received_at, len(payload)))
+        self._file.write(payload)
+        self._offset += _FRAME_HEADER.size + len(payload)
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+        self._index.close()
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'frames': self.frames,
+            'bytes': self._offset
+        }
+
+
+class RecordingReader:
+    """Διαβάζει ένα αρχείο του RangeRecorder με τη σειρά καταγραφής."""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            header = f.read(_FILE_HEADER.size)
+            if len(header) < _FILE_HEADER.size:
+                raise ValueError(f"{path}: not a recording")
+            magic, version = _FILE_HEADER.unpack(header)
+            if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+                raise ValueError(f"{path}: unsupported recording format {magic!r} v{version}")
+            frame = f.read(_FRAME_HEADER.size)
+            self.start_time = _FRAME_HEADER.unpack(frame)[1] if len(frame) == _FRAME_HEADER.size else None
+        self._index_times, self._index_offsets = self._load_index()
+
+    def _load_index(self):
+        times, offsets = [], []
+        try:
+            with open(self.path + '.idx', 'rb') as f:
+                data = f.read()
+        except OSError:
+            return times, offsets
+        for received_at, offset in _INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % _INDEX_ENTRY.size]):
+            if offset >= self.size:
+                break
+            times.append(received_at)
+            offsets.append(offset)
+        return times, offsets
+
+    def _offset_for(self, start):
+        """Offset του frame από το οποίο αρκεί να ξεκινήσει η σάρωση για το start."""
+        position = bisect_right(self._index_times, start) - 1
+        return self._index_offsets[position] if position >= 0 else _FILE_HEADER.size
+
+    def frames(self, start=None, end=None):
+        """Παράγει (kind, received_at, payload) για received_at στο [start, end)."""
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset_for(start) if start is not None else _FILE_HEADER.size)
+            while True:
+                header = f.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    return
+                kind, received_at, length = _FRAME_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    return
+                if end is not None and received_at >= end:
+                    return
+                if start is None or received_at >= start:
+                    yield kind, received_at, payload
@@ -0,0 +1,178 @@
+import time
+import argparse
+import hashlib
+import numpy as np
+from collections import namedtuple
+import rtls_server as server
+from recording import RecordingReader, FRAME_BATCH, FRAME_ANCHOR
+from statistics_logger import RTLSStatisticsLogger
+from motor_commands import MotorCommandDispatcher
+
+# Ό,τι χρειάζεται το on_message από ένα MQTT μήνυμα
+ReplayMessage = namedtuple('ReplayMessage', ['topic', 'payload'])
+
+
+class ReplayClock:
+    """Ο χρόνος της καταγραφής· μπαίνει στη θέση του rtls_server.clock."""
+
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+class MotorCommandLog:
+    """Στη θέση του MQTT client: κρατά τις εντολές κινητήρων αντί να τις δημοσιεύει."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.commands = []
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        # Χωρίς broker δεν υπάρχει PUBACK· ο dispatcher του replay στέλνει με QoS 0
+        self.commands.append((self.clock(), topic, payload))
+
+
+def replay(reader, speed=1.0, start=None, end=None):
+    """Τροφοδοτεί το pipeline του rtls_server με τα frames μιας καταγραφής, χωρίς broker.
+
+    Ο κύριος βρόχος αναπαράγεται σε εικονικό χρόνο: κάθε κύκλος με νέα
+    δεδομένα γίνεται στη στιγμή άφιξης του πρώτου frame (ή όταν το επιτρέψει
+    το --max-eval-rate) και παίρνει όσα frames έφτασαν έως τότε, ενώ
+    στα κενά τρέχουν κύκλοι λήξεων ανά EXPIRY_TICK_SECONDS. Έτσι θέσεις,
+    encounters και εντολές κινητήρων δεν εξαρτώνται από την ταχύτητα ή το
+    μηχάνημα. speed=1 αναπαράγει σε πραγματικό χρόνο, speed=N N φορές
+    γρηγορότερα και speed=0 όσο γρηγορότερα γίνεται.
+
+    Επιστρέφει (MotorCommandLog, στατιστικά του replay)· τα στατιστικά
+    περιέχουν και το πραγματικό κόστος (ms) κάθε κύκλου με νέα δεδομένα.
+    """
+    frame_topics = {FRAME_BATCH: server.MQTT_BATCH_TOPIC, FRAME_ANCHOR: server.MQTT_ANCHOR_TOPIC}
+    frames = reader.frames(start, end)
+    pending = next(frames, None)
+    clock = ReplayClock(pending[1] if pending is not None else 0.0)
+    server.clock = clock
+    server.stats_logger.clock = clock
+    commands = MotorCommandLog(clock)
+    # Ο dispatcher τρέχει συγχρονισμένα μετά από κάθε κύκλο, στον ίδιο εικονικό χρόνο
+    dispatcher = MotorCommandDispatcher(commands, server.MQTT_MOTOR_CMD_TOPIC_PREFIX, qos=0, clock=clock)
+
+    evaluation_interval = server.min_evaluation_interval
+    tick = server.EXPIRY_TICK_SECONDS
+    recording_start = clock.now
+    wall_start = time.perf_counter()
+    last_evaluation = float('-inf')
+    counts = {'frames': 0, 'cycles': 0, 'expiry_cycles': 0}
+    cycle_ms = []
+
+    def wait_until(timestamp):
+        if speed > 0:
+            delay = wall_start + (timestamp - recording_start) / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    while pending is not None:
+        # Χωρίς δεδομένα ο βρόχος ξυπνά κάθε tick μόνο για τις λήξεις
+        while clock.now + tick < pending[1]:
+            clock.now += tick
+            wait_until(clock.now)
+            server.run_cycle(dispatcher, False)
+            dispatcher.dispatch(clock.now)
+            counts['expiry_cycles'] += 1
+
+        cycle_at = max(pending[1], last_evaluation + evaluation_interval)
+        wait_until(cycle_at)
+        cycle_start = time.perf_counter()
+        while pending is not None and pending[1] <= cycle_at:
+            kind, received_at, payload = pending
+            clock.now = received_at
+            topic = frame_topics.get(kind, server.MQTT_DATA_TOPIC)
+            server.on_message(None, None, ReplayMessage(topic, payload))
+            counts['frames'] += 1
+            pending = next(frames, None)
+
+        clock.now = cycle_at
+        if server.run_cycle(dispatcher, True) is not None:
+            last_evaluation = cycle_at
+        dispatcher.dispatch(clock.now)
+        cycle_ms.append((time.perf_counter() - cycle_start) * 1000)
+        counts['cycles'] += 1
+
+    counts['recorded_seconds'] = clock.now - recording_start
+    counts['wall_seconds'] = time.perf_counter() - wall_start
+    counts['cycle_ms'] = cycle_ms
+    return commands, counts
+
+
+def replay_digest(commands):
+    """SHA-256 των εντολών κινητήρων και των τελικών θέσεων, για σύγκριση δύο replays."""
+    digest = hashlib.sha256()
+    for timestamp, topic, payload in commands.commands:
+        digest.update(f"{timestamp:.6f} {topic} {payload}\n".encode())
+    rows = server.tag_store.positioned_rows()
+    for row in rows.tolist():
+        digest.update(server.tag_store.tag_ids[row].encode())
+    digest.update(server.tag_store.positions[rows].tobytes())
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay μιας καταγραφής (rtls_server.py --record) χωρίς broker")
+    parser.add_argument("recording", help="αρχείο καταγραφής")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="ταχύτητα ως προς τον πραγματικό χρόνο, 0 = όσο γρηγορότερα γίνεται")
+    parser.add_argument("--start", type=float, default=0.0,
+                        help="έναρξη σε s από την αρχή της καταγραφής")
+    parser.add_argument("--end", type=float, default=None,
+                        help="τέλος σε s από την αρχή της καταγραφής (προεπιλογή: ως το τέλος)")
+    parser.add_argument("--commands", metavar="FILE",
+                        help="αποθήκευση των εντολών κινητήρων (timestamp,topic,command)")
+    parser.add_argument("--metrics-dir", default=None,
+                        help="φάκελος metrics store για τα στατιστικά του replay (σε χρόνο καταγραφής)")
+    server.add_pipeline_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        reader = RecordingReader(args.recording)
+    except (OSError, ValueError) as e:
+        print(f"Δεν ήταν δυνατό το άνοιγμα της καταγραφής {args.recording}: {e}")
+        raise SystemExit(1)
+    if reader.start_time is None:
+        print(f"Η καταγραφή {args.recording} είναι κενή")
+        raise SystemExit(1)
+
+    server.configure_pipeline(args)
+    try:
+        server.stats_logger = RTLSStatisticsLogger(metrics_dir=args.metrics_dir)
+    except OSError as e:
+        print(f"Δεν ήταν δυνατή η δημιουργία του metrics store στο {args.metrics_dir}: {e}")
+        raise SystemExit(1)
+    start = reader.start_time + args.start
+    end = reader.start_time + args.end if args.end is not None else None
+
+    try:
+        commands, counts = replay(reader, args.speed, start, end)
+    except KeyboardInterrupt:
+        print("\n Replay interrupted")
+        raise SystemExit(1)
+
+    for encounter in server.encounters.close_all(server.clock()):
+        server.stats_logger.log_proximity_exit(encounter)
+    server.stats_logger.close()
+    server.stats_logger.save_detailed_log()
+    server.stats_logger.print_summary()
+
+    if args.commands:
+        with open(args.commands, 'w', encoding='utf-8') as f:
+            for timestamp, topic, payload in commands.commands:
+                f.write(f"{timestamp:.6f},{topic},{payload}\n")
+
+    speedup = counts['recorded_seconds'] / counts['wall_seconds'] if counts['wall_seconds'] > 0 else float('inf')
+    print(f" Replay: {counts['frames']} frames, {counts['cycles']} cycles (+{counts['expiry_cycles']} expiry), "
+          f"{counts['recorded_seconds']:.1f} s recorded in {counts['wall_seconds']:.1f} s ({speedup:.1f}x)")
+    if counts['cycle_ms']:
+        p50, p95, p99 = np.percentile(counts['cycle_ms'], (50, 95, 99))
+        print(f" Cycle cost: p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms")
+    print(f" Motor commands: {len(commands.commands)}")
+    print(f" Digest: {replay_digest(commands)}")
@@ -1,330 +1,786 @@
-import paho.mqtt.client as mqtt
-import json
-import time
-import numpy as np
-from math import sqrt
-import matplotlib
-matplotlib.use('TkAgg')
-import matplotlib.pyplot as plt
-import threading
-import signal
-import sys
-from statistics_logger import RTLSStatisticsLogger
-
-# Signal handler για clean shutdown
-def signal_handler(sig, frame):
-    print("\n Shutting down gracefully...")
-    global running
-    running = False
-
-# Global flag για clean shutdown
-running = True
-
-# --- Διαμόρφωση Χρήστη ---
-MQTT_BROKER_HOST = "localhost"
-MQTT_BROKER_PORT = 1883
-MQTT_DATA_TOPIC = "uwb/anchor_data"
-MQTT_MOTOR_CMD_TOPIC_PREFIX = "uwb/tags/"
-
-ANCHOR_POSITIONS = {
-    "anchor1": np.array([0.0, 0.0]),
-    "anchor2": np.array([5.0, 0.0]),
-    "anchor3": np.array([0.0, 7.0]),
-    "anchor4": np.array([5.0, 7.0])
-}
-
-MIN_ANCHORS_FOR_POSITIONING = 3
-PROXIMITY_THRESHOLD = 1.0
-
-# --- Στατιστικά ---
-stats_logger = RTLSStatisticsLogger()
-stats_update_interval = 10
-
-# --- Global Variables ---
-tag_distances = {}
-tag_positions = {}
-motor_states = {}
-
-# --- Matplotlib Global Variables ---
-fig, ax = None, None
-tag_plot_artists = {}
-
-
-def setup_plot():
-    """Ρυθμίζει το αρχικό γράφημα."""
-    global fig, ax
-    plt.ion()
-    fig, ax = plt.subplots(figsize=(10, 8))
-    ax.set_xlabel("Συντεταγμένη X (m)")
-    ax.set_ylabel("Συντεταγμένη Y (m)")
-    ax.set_title("Σύστημα Εντοπισμού Θέσης UWB - Real Time")
-    ax.grid(True)
-    ax.set_aspect('equal', adjustable='box')
-
-    anchor_x_coords = [pos[0] for pos in ANCHOR_POSITIONS.values()]
-    anchor_y_coords = [pos[1] for pos in ANCHOR_POSITIONS.values()]
-    
-    if anchor_x_coords and anchor_y_coords:
-        ax.set_xlim(min(anchor_x_coords) - 1, max(anchor_x_coords) + 1)
-        ax.set_ylim(min(anchor_y_coords) - 1, max(anchor_y_coords) + 1)
-
-    for anchor_id, pos in ANCHOR_POSITIONS.items():
-        ax.plot(pos[0], pos[1], 's', markersize=12, label=f"Anchor: {anchor_id}", color='black', markeredgecolor='gray')
-        ax.text(pos[0] + 0.1, pos[1] + 0.1, anchor_id, fontsize=9, color='black')
-
-    ax.legend(loc='upper right')
-    plt.show()
-
-def update_plot(tags_in_proximity_set):
-    """Ενημερώνει το γράφημα με προστασία από interrupts."""
-    global ax, tag_plot_artists
-    
-    try:
-        # Έλεγχος αν το figure είναι ακόμα ανοιχτό
-        if not plt.fignum_exists(fig.number):
-            return
-        
-        for tag_id in list(tag_plot_artists.keys()):
-            artists = tag_plot_artists.pop(tag_id, [])
-            for artist in artists:
-                try:
-                    artist.remove()
-                except:
-                    pass
-
-        for tag_id, data in tag_positions.items():
-            if time.time() - data["timestamp"] < 5.0:
-                pos = data["position"]
-                is_in_proximity = tag_id in tags_in_proximity_set
-                color = 'red' if is_in_proximity else 'blue'
-                marker_size = 10 if is_in_proximity else 7
-                z_order = 5 if is_in_proximity else 3
-
-                try:
-                    point = ax.plot(pos[0], pos[1], 'o', markersize=marker_size, color=color, zorder=z_order)
-                    text = ax.text(pos[0] + 0.08, pos[1] + 0.08, tag_id, fontsize=8, color=color, zorder=z_order)
-                    tag_plot_artists[tag_id] = point + [text]
-                except:
-                    pass
-
-        try:
-            fig.canvas.draw_idle()
-            plt.pause(0.01)
-        except (KeyboardInterrupt, SystemExit):
-            raise
-        except:
-            pass
-            
-    except (KeyboardInterrupt, SystemExit):
-        raise
-    except Exception as e:
-        pass
-
-def on_connect(client, userdata, flags, rc):
-    print(f"Connected to MQTT Broker with result code {rc}")
-    client.subscribe(MQTT_DATA_TOPIC)
-    print(f"Subscribed to {MQTT_DATA_TOPIC}")
-
-def trilaterate_position(distances_to_anchors, anchor_coords):
-    A = []
-    b = []
-    anchor_ids_used = []
-
-    for anchor_id, dist in distances_to_anchors.items():
-        if anchor_id not in anchor_coords:
-            continue
-        anchor_ids_used.append(anchor_id)
-
-    if len(anchor_ids_used) < MIN_ANCHORS_FOR_POSITIONING:
-        return None
-
-    ref_anchor_id = anchor_ids_used[0]
-    x_ref, y_ref = anchor_coords[ref_anchor_id]
-    d_ref_sq = distances_to_anchors[ref_anchor_id]**2
-
-    for i in range(1, len(anchor_ids_used)):
-        current_anchor_id = anchor_ids_used[i]
-        x_i, y_i = anchor_coords[current_anchor_id]
-        d_i_sq = distances_to_anchors[current_anchor_id]**2
-
-        A.append([2 * (x_i - x_ref), 2 * (y_i - y_ref)])
-        b.append(d_ref_sq - d_i_sq - (x_ref**2 - x_i**2) - (y_ref**2 - y_i**2))
-
-    if not A or len(A[0]) == 0:
-        return None
-
-    A_matrix = np.array(A)
-    b_vector = np.array(b)
-
-    try:
-        position, _, _, _ = np.linalg.lstsq(A_matrix, b_vector, rcond=None)
-        return position
-    except np.linalg.LinAlgError:
-        print("Trilateration failed: LinAlgError")
-        return None
-
-def on_message(client, userdata, msg):
-    try:
-        payload = json.loads(msg.payload.decode())
-        anchor_id = payload.get("anchor_id")
-        tag_id = payload.get("tag_id")
-        distance = payload.get("distance")
-
-        if not all([anchor_id, tag_id, isinstance(distance, (int, float))]):
-            return
-
-        # Καταγραφή λήψης μηνύματος
-        stats_logger.log_message_received(tag_id, anchor_id)
-
-        if tag_id not in tag_distances:
-            tag_distances[tag_id] = {}
-
-        tag_distances[tag_id][anchor_id] = distance
-
-        if len(tag_distances[tag_id]) >= MIN_ANCHORS_FOR_POSITIONING:
-            current_anchor_coords = {aid: ANCHOR_POSITIONS[aid] for aid in tag_distances[tag_id] if aid in ANCHOR_POSITIONS}
-            position = trilaterate_position(tag_distances[tag_id], current_anchor_coords)
-            
-            if position is not None:
-                tag_positions[tag_id] = {"position": position, "timestamp": time.time()}
-                
-                # Καταγραφή επιτυχούς positioning
-                stats_logger.log_positioning_attempt(tag_id, True, position)
-            else:
-                # Καταγραφή αποτυχημένου positioning
-                stats_logger.log_positioning_attempt(tag_id, False)
-
-    except Exception as e:
-        print(f"Error processing message: {e}")
-
-def check_proximity_and_control_motors(client_mqtt):
-    """Ελέγχει την εγγύτητα και στέλνει εντολές στους κινητήρες."""
-    active_tags = list(tag_positions.keys())
-    tags_currently_in_proximity = set()
-
-    for i in range(len(active_tags)):
-        for j in range(i + 1, len(active_tags)):
-            tag_id1 = active_tags[i]
-            tag_id2 = active_tags[j]
-
-            if time.time() - tag_positions[tag_id1]["timestamp"] > 2.0 or \
-               time.time() - tag_positions[tag_id2]["timestamp"] > 2.0:
-                continue
-
-            pos1 = tag_positions[tag_id1]["position"]
-            pos2 = tag_positions[tag_id2]["position"]
-            distance_between_tags = np.linalg.norm(pos1 - pos2)
-
-            if distance_between_tags < PROXIMITY_THRESHOLD:
-                print(f"⚠️ ΕΓΓΥΤΗΤΑ: {tag_id1} και {tag_id2} είναι κοντά ({distance_between_tags:.2f}m)!")
-                
-                # Καταγραφή proximity event
-                stats_logger.log_proximity_event(tag_id1, tag_id2, distance_between_tags)
-                
-                tags_currently_in_proximity.add(tag_id1)
-                tags_currently_in_proximity.add(tag_id2)
-
-    all_known_tags = set(motor_states.keys()).union(set(tag_positions.keys()))
-
-    for t_id in all_known_tags:
-        topic = f"{MQTT_MOTOR_CMD_TOPIC_PREFIX}{t_id}/motor"
-        current_motor_state = motor_states.get(t_id, "OFF")
-
-        if t_id in tags_currently_in_proximity:
-            if current_motor_state == "OFF":
-                client_mqtt.publish(topic, "ON")
-                motor_states[t_id] = "ON"
-                print(f"Εντολή: Κινητήρας ON για {t_id}")
-        else:
-            if current_motor_state == "ON":
-                client_mqtt.publish(topic, "OFF")
-                motor_states[t_id] = "OFF"
-                print(f"Εντολή: Κινητήρας OFF για {t_id}")
-
-    return tags_currently_in_proximity
-
-def periodic_stats_update():
-    """Περιοδική ενημέρωση και εκτύπωση στατιστικών"""
-    while running:
-        time.sleep(stats_update_interval)
-        if running:
-            stats_logger.save_to_csv()
-            
-            # Εκτύπωση στατιστικών κάθε 30 δευτερόλεπτα
-            if int(time.time()) % 30 == 0:
-                stats_logger.print_summary()
-
-# --- Κύριο Πρόγραμμα ---
-if __name__ == "__main__":
-    # Ρύθμιση signal handler
-    signal.signal(signal.SIGINT, signal_handler)
-    
-    try:
-        # Δημιουργία MQTT client με compatibility
-        try:
-            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
-        except AttributeError:
-            client = mqtt.Client()
-
-        client.on_connect = on_connect
-        client.on_message = on_message
-
-        try:
-            client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT, 60)
-        except Exception as e:
-            print(f"Δεν ήταν δυνατή η σύνδεση στον MQTT Broker: {e}")
-            sys.exit(1)
-
-        client.loop_start()
-
-        # Ξεκίνησε το thread για στατιστικά
-        stats_thread = threading.Thread(target=periodic_stats_update, daemon=True)
-        stats_thread.start()
-
-        setup_plot()
-
-        # Main loop με καλύτερο error handling
-        while running:
-            try:
-                tags_in_alarm = check_proximity_and_control_motors(client)
-                update_plot(tags_in_alarm)
-                
-                # Μικρή παύση για να επιτρέψουμε interrupt handling
-                time.sleep(0.01)
-                
-            except KeyboardInterrupt:
-                break
-            except Exception as e:
-                print(f"Error in main loop: {e}")
-                continue
-
-    except KeyboardInterrupt:
-        print("\n Keyboard interrupt received...")
-    
-    finally:
-        print(" Cleaning up...")
-        running = False
-        
-        # Αποθήκευση στατιστικών
-        try:
-            stats_logger.save_detailed_log()
-            stats_logger.print_summary()
-        except:
-            pass
-        
-        # Κλείσιμο matplotlib
-        try:
-            plt.close('all')
-            plt.ioff()
-        except:
-            pass
-        
-        # Κλείσιμο MQTT
-        try:
-            client.loop_stop()
-            client.disconnect()
-        except:
-            pass
-        
-        print(" Program terminated cleanly.")
-
+import time
+PROCESS_START = time.time()
+
+import paho.mqtt.client as mqtt
+import json
+import argparse
+import numpy as np
+import threading
+import signal
+import sys
+from collections import deque, namedtuple
+from statistics_logger import RTLSStatisticsLogger
+from trilateration import AnchorGeometryCache, SOLVERS, ANCHOR_SELECTIONS, make_solver
+from anchor_registry import AnchorRegistry, load_site
+from spatial_index import ProximityGrid
+from proximity_encounters import EncounterTracker
+from tag_store import TagStateStore
+from wire_format import decode_batch
+from shard_workers import ShardDispatcher
+from ingest_queue import IngestQueue, INGEST_POLICIES
+from sequence_tracker import SequenceTracker
+from timing_wheel import TimingWheel
+from tracker import KalmanTracker
+from recording import RangeRecorder, FRAME_REPORT, FRAME_BATCH, FRAME_ANCHOR
+from motor_commands import MotorCommandDispatcher, MOTOR_COMMAND_QOS
+
+# Signal handler για clean shutdown
+def signal_handler(sig, frame):
+    print("\n Shutting down gracefully...")
+    global running
+    running = False
+
+# Global flag για clean shutdown
+running = True
+
+# --- Διαμόρφωση Χρήστη ---
+MQTT_BROKER_HOST = "localhost"
+MQTT_BROKER_PORT = 1883
+MQTT_DATA_TOPIC = "uwb/anchor_data"
+MQTT_BATCH_TOPIC = "uwb/anchor_data/batch"
+MQTT_MOTOR_CMD_TOPIC_PREFIX = "uwb/tags/"
+MQTT_POSITIONS_TOPIC = "uwb/positions"
+MQTT_ANCHOR_TOPIC = "uwb/anchors/position"
+
+ANCHOR_POSITIONS = {
+    "anchor1": np.array([0.0, 0.0]),
+    "anchor2": np.array([5.0, 0.0]),
+    "anchor3": np.array([0.0, 7.0]),
+    "anchor4": np.array([5.0, 7.0])
+}
+
+MIN_ANCHORS_FOR_POSITIONING = 3
+PROXIMITY_THRESHOLD = 1.0
+PROXIMITY_EXIT_THRESHOLD = 1.2
+PROXIMITY_MIN_DWELL_SECONDS = 1.0
+PROXIMITY_MAX_AGE_SECONDS = 2.0
+MAX_EVALUATION_RATE_HZ = 20
+RANGE_TTL_SECONDS = 5.0
+POSITION_TTL_SECONDS = 5.0
+EXPIRY_TICK_SECONDS = 0.1
+PLOT_INTERVAL_SECONDS = 0.1
+INGEST_QUEUE_CAPACITY = 100000
+INGEST_POLICY = 'latest'
+POSITION_SOLVER = 'linear'
+MAX_ANCHORS_PER_SOLVE = 8
+ANCHOR_SELECTION = 'nearest'
+ANCHOR_REACH_METERS = 20.0
+
+# --- Στατιστικά ---
+# Χωρίς metrics store μέχρι να ζητηθεί (βλ. --metrics-dir), ώστε το import να μη γράφει αρχεία
+stats_logger = RTLSStatisticsLogger(metrics_dir=None)
+METRICS_DIR = "rtls_metrics"
+stats_update_interval = 10
+
+# --- Global Variables ---
+# Ρολόι του pipeline· το replay.py το αντικαθιστά με τον χρόνο της καταγραφής
+clock = time.time
+
+# Ελάχιστο διάστημα ανάμεσα σε δύο εκτιμήσεις θέσεων/εγγύτητας (--max-eval-rate)
+min_evaluation_interval = 1.0 / MAX_EVALUATION_RATE_HZ
+
+# Τα anchors του site (ANCHOR_POSITIONS ή site file με --site)
+anchor_registry = AnchorRegistry(ANCHOR_POSITIONS)
+tag_store = TagStateStore(anchor_registry.ids)
+
+# --- Batch Trilateration ---
+geometry_cache = AnchorGeometryCache(anchor_registry)
+batch_solver = make_solver(POSITION_SOLVER, geometry_cache, MIN_ANCHORS_FOR_POSITIONING, MAX_ANCHORS_PER_SOLVE,
+                           ANCHOR_SELECTION, ANCHOR_REACH_METERS)
+dirty_rows = set()
+oldest_pending_report = None
+oldest_pending_sent = None
+
+# --- Handoff από το MQTT thread ---
+# Το on_message μόνο αποκωδικοποιεί και βάζει records στην (bounded) ουρά· το
+# main loop είναι ο μοναδικός owner του tag_store και τα εφαρμόζει μαζικά, οπότε
+# η κατάσταση δεν χρειάζεται locks.
+ingest_queue = IngestQueue(INGEST_QUEUE_CAPACITY, INGEST_POLICY)
+
+# Κενά στα sequence numbers, πριν από την ουρά: ό,τι πετά η πολιτική της
+# ουράς δεν μετρά ως χαμένο στο δίκτυο (μόνο το MQTT thread τον ενημερώνει)
+sequence_tracker = SequenceTracker()
+
+# Σήμα προς το main loop ότι υπάρχουν νέες αναφορές στην ουρά
+new_data_event = threading.Event()
+
+# Immutable εικόνα των θέσεων για readers (γράφημα, δημοσίευση, άλλα threads).
+# Αντικαθίσταται ολόκληρη από το main loop, ποτέ δεν τροποποιείται.
+PositionSnapshot = namedtuple('PositionSnapshot', ['timestamp', 'tag_ids', 'positions', 'proximity'])
+current_snapshot = PositionSnapshot(0.0, (), np.empty((0, 2)), frozenset())
+
+# Νέες θέσεις anchors (anchor_id, (x, y)) από το on_message, για το main loop
+anchor_updates = deque()
+
+# --- Sharded mode (--workers N): οι αποστάσεις και η επίλυση ζουν σε διεργασίες ---
+shard_dispatcher = None
+shard_collector = None
+shard_results = deque()
+
+# --- Λήξεις (TTL): αποστάσεις, συμμετοχή στην εγγύτητα και θέσεις ---
+# Κάθε timing wheel δίνει μόνο τις γραμμές που λήγουν, χωρίς σάρωση όλων των tags
+range_expiry = TimingWheel(EXPIRY_TICK_SECONDS)
+proximity_expiry = TimingWheel(EXPIRY_TICK_SECONDS)
+position_expiry = TimingWheel(EXPIRY_TICK_SECONDS)
+expired_counts = {'ranges': 0, 'proximity': 0, 'positions': 0}
+
+# --- Spatial index για proximity ---
+proximity_grid = ProximityGrid(PROXIMITY_EXIT_THRESHOLD)
+
+# Encounters ανά ζεύγος: ON στο PROXIMITY_THRESHOLD, OFF πάνω από το PROXIMITY_EXIT_THRESHOLD
+encounters = EncounterTracker(PROXIMITY_THRESHOLD, PROXIMITY_EXIT_THRESHOLD, PROXIMITY_MIN_DWELL_SECONDS)
+
+# --- Tracking (Kalman ανά tag, με --tracker) ---
+tracker = None
+
+# --- Καταγραφή εισερχόμενων μηνυμάτων για replay (με --record) ---
+# Το MQTT thread μόνο προσθέτει τα frames (όλα, πριν από την ουρά εισόδου)
+# και το main loop τα γράφει στο αρχείο
+recorder = None
+recorded_frames = deque()
+
+# --- Εντολές κινητήρων (thread αποστολής με coalescing και QoS 1) ---
+motor_dispatcher = None
+
+# --- Cold start ---
+first_message_at = None
+
+# --- Οπτικοποίηση (matplotlib φορτώνεται μόνο αν δεν τρέχουμε --headless) ---
+live_view = None
+
+
+def visible_tags(now):
+    """Επιστρέφει (tag_ids, positions) για τα tags με θέση που δεν έχει λήξει.
+
+    Με tracker οι θέσεις είναι η πρόβλεψή του για το now, χωρίς νέα λύση.
+    """
+    rows = tag_store.positioned_rows()
+    positions = tracker.predict_positions(rows, now) if tracker is not None else tag_store.positions[rows]
+    return [tag_store.tag_ids[row] for row in rows], positions
+
+def publish_snapshot(tags_in_proximity_set):
+    """Owner thread: δημιουργεί νέο immutable snapshot για τους readers."""
+    global current_snapshot
+
+    now = clock()
+    tag_ids, positions = visible_tags(now)
+    positions.flags.writeable = False
+    current_snapshot = PositionSnapshot(now, tuple(tag_ids), positions, frozenset(tags_in_proximity_set))
+
+def update_plot(snapshot):
+    """Ενημερώνει το τοπικό γράφημα, αν υπάρχει."""
+    if live_view is not None:
+        live_view.update(snapshot.tag_ids, snapshot.positions, snapshot.proximity)
+
+def publish_positions(client_mqtt, snapshot):
+    """Δημοσιεύει τις τρέχουσες θέσεις για τον αυτόνομο consumer (live_view.py)."""
+    message = {
+        "timestamp": snapshot.timestamp,
+        "tags": [[tag_id, x, y] for tag_id, (x, y) in zip(snapshot.tag_ids, snapshot.positions.tolist())],
+        "proximity": sorted(snapshot.proximity)
+    }
+    client_mqtt.publish(MQTT_POSITIONS_TOPIC, json.dumps(message))
+
+def on_connect(client, userdata, flags, rc):
+    print(f"Connected to MQTT Broker with result code {rc}")
+    client.subscribe([(MQTT_DATA_TOPIC, 0), (MQTT_BATCH_TOPIC, 0), (MQTT_ANCHOR_TOPIC, 1)])
+    print(f"Subscribed to {MQTT_DATA_TOPIC}, {MQTT_BATCH_TOPIC} and {MQTT_ANCHOR_TOPIC}")
+    print(f" Ready {(time.time() - PROCESS_START) * 1000:.0f} ms after start")
+
+def note_first_message():
+    """Cold start: χρόνος από την εκκίνηση ως την πρώτη αναφορά που εφαρμόστηκε.
+
+    Μετριέται με το ρολόι του συστήματος και όχι με το received_at, που στο
+    replay είναι ο εικονικός χρόνος της καταγραφής.
+    """
+    global first_message_at
+
+    if first_message_at is None:
+        first_message_at = time.time()
+        cold_start_ms = (first_message_at - PROCESS_START) * 1000
+        stats_logger.log_cold_start(cold_start_ms)
+        print(f" First message processed {cold_start_ms:.0f} ms after start")
+
+def mark_dirty(rows, received_at, sent_at):
+    """Σημειώνει γραμμές για επίλυση."""
+    global oldest_pending_report, oldest_pending_sent
+
+    if not dirty_rows:
+        oldest_pending_report = received_at
+        oldest_pending_sent = sent_at if sent_at is not None else received_at
+    dirty_rows.update(rows)
+
+def on_message(client, userdata, msg):
+    if msg.topic == MQTT_BATCH_TOPIC:
+        on_batch_message(msg)
+        return
+    if msg.topic == MQTT_ANCHOR_TOPIC:
+        on_anchor_message(msg)
+        return
+
+    try:
+        received_at = clock()
+        if recorder is not None:
+            recorded_frames.append((FRAME_REPORT, received_at, msg.payload))
+        decode_start = time.perf_counter()
+        payload = json.loads(msg.payload.decode())
+        decode_ms = (time.perf_counter() - decode_start) * 1000
+
+        anchor_id = payload.get("anchor_id")
+        tag_id = payload.get("tag_id")
+        distance = payload.get("distance")
+
+        if not all([anchor_id, tag_id, isinstance(distance, (int, float))]):
+            return
+
+        # Χρόνος αποστολής και sequence number από τον simulator (αν υπάρχουν)
+        sent_at = payload.get("sent_at")
+        if not isinstance(sent_at, (int, float)):
+            sent_at = None
+        seq = payload.get("seq")
+        if not isinstance(seq, int):
+            seq = None
+        else:
+            sequence_tracker.check(tag_id, anchor_id, seq)
+
+        ingest_queue.put_report(tag_id, anchor_id,
+                                ('report', tag_id, anchor_id, distance, seq, sent_at, received_at, decode_ms))
+        new_data_event.set()
+
+    except Exception as e:
+        print(f"Error processing message: {e}")
+
+def on_batch_message(msg):
+    """Binary batch (βλ. wire_format.py): πολλές αναφορές σε ένα μήνυμα, χωρίς JSON."""
+    try:
+        received_at = clock()
+        if recorder is not None:
+            recorded_frames.append((FRAME_BATCH, received_at, msg.payload))
+        decode_start = time.perf_counter()
+        tag_ids, anchor_ids, records = decode_batch(msg.payload)
+        decode_ms = (time.perf_counter() - decode_start) * 1000
+
+        if len(records) == 0:
+            return
+        sequence_tracker.check_batch(tag_ids, anchor_ids, records)
+
+        ingest_queue.put_batch(('batch', tag_ids, anchor_ids, records, received_at, decode_ms), len(records))
+        new_data_event.set()
+
+    except Exception as e:
+        print(f"Error processing batch message: {e}")
+
+def on_anchor_message(msg):
+    """Νέα θέση anchor ({"anchor_id", "x", "y"}), π.χ. μετά από επαναβαθμονόμηση του site."""
+    try:
+        if recorder is not None:
+            recorded_frames.append((FRAME_ANCHOR, clock(), msg.payload))
+        payload = json.loads(msg.payload.decode())
+        anchor_id = payload.get("anchor_id")
+        position = (payload.get("x"), payload.get("y"))
+        if anchor_id not in anchor_registry or not all(isinstance(v, (int, float)) for v in position):
+            print(f"Ignoring anchor update for {anchor_id!r}: unknown anchor or missing x/y")
+            return
+        anchor_updates.append((anchor_id, position))
+        new_data_event.set()
+
+    except Exception as e:
+        print(f"Error processing anchor message: {e}")
+
+def update_anchor_position(anchor_id, position):
+    """Αλλάζει τη θέση ενός anchor και ακυρώνει την cached γεωμετρία του (και στα shards)."""
+    geometry_cache.update_anchor(anchor_id, position)
+    if shard_dispatcher is not None:
+        shard_dispatcher.update_anchor(anchor_id, position)
+    print(f" Anchor {anchor_id} moved to ({position[0]:.2f}, {position[1]:.2f})")
+
+def write_recorded_frames():
+    """Owner thread: γράφει στην καταγραφή τα frames που έχει λάβει το on_message."""
+    while recorded_frames:
+        recorder.record(*recorded_frames.popleft())
+
+def apply_pending_reports():
+    """Owner thread: εφαρμόζει μαζικά όσες αναφορές έχει βάλει το on_message στην ουρά."""
+    touched_rows = []
+    oldest_received = oldest_sent = None
+
+    if recorder is not None:
+        write_recorded_frames()
+
+    # Οι αναφορές της ουράς λύνονται με τις νέες θέσεις anchors
+    while anchor_updates:
+        update_anchor_position(*anchor_updates.popleft())
+
+    stats_logger.log_ingest(len(ingest_queue), ingest_queue.stats(), sequence_tracker.stats())
+
+    for item in ingest_queue.drain():
+        if item[0] == 'batch':
+            _, tag_ids, anchor_ids, records, received_at, decode_ms = item
+            stats_logger.log_stage_latency('batch_decode', decode_ms)
+            stats_logger.log_batch_received(tag_ids, records, received_at)
+            sent_at = float(records['sent_at'].min())
+            if shard_dispatcher is not None:
+                shard_dispatcher.submit_batch(tag_ids, anchor_ids, records, received_at)
+            else:
+                touched_rows.extend(tag_store.set_ranges(tag_ids, anchor_ids, records['tag'], records['anchor'],
+                                                         records['distance'], received_at).tolist())
+        else:
+            _, tag_id, anchor_id, distance, seq, sent_at, received_at, decode_ms = item
+            stats_logger.log_stage_latency('json_decode', decode_ms)
+            stats_logger.log_message_received(tag_id, sent_at, received_at)
+            if shard_dispatcher is not None:
+                shard_dispatcher.submit(tag_id, anchor_id, seq or 0, distance,
+                                        sent_at if sent_at is not None else received_at, received_at)
+            else:
+                row = tag_store.set_range(tag_id, anchor_id, distance, received_at)
+                if row is not None:
+                    touched_rows.append(row)
+
+        note_first_message()
+        if oldest_received is None:
+            oldest_received = received_at
+            oldest_sent = sent_at
+
+    # Η λύση γίνεται μαζικά στο solve_pending_positions
+    if touched_rows:
+        rows = np.unique(np.array(touched_rows, dtype=np.intp))
+        range_expiry.schedule(rows, clock() + RANGE_TTL_SECONDS)
+        rows = rows[tag_store.range_counts(rows) >= MIN_ANCHORS_FOR_POSITIONING]
+        if len(rows):
+            mark_dirty(rows.tolist(), oldest_received, oldest_sent)
+
+def solve_pending_positions():
+    """Λύνει μαζικά τις θέσεις όλων των tags που άλλαξαν από την προηγούμενη κλήση.
+
+    Επιστρέφει (χρόνο λήψης, χρόνο αποστολής) της παλαιότερης αναφοράς της
+    παρτίδας, ή None αν δεν υπήρχε τίποτα προς επίλυση.
+    """
+    global dirty_rows
+
+    if shard_dispatcher is not None:
+        return apply_shard_results()
+
+    if not dirty_rows:
+        return None
+    batch_times = (oldest_pending_report, oldest_pending_sent)
+    rows = np.fromiter(dirty_rows, dtype=np.intp, count=len(dirty_rows))
+    rows.sort()
+    dirty_rows = set()
+
+    solve_start = time.perf_counter()
+    # Οι προηγούμενες (ή με tracker οι προβλεπόμενες) θέσεις είναι το warm start του επαναληπτικού solver
+    if tracker is not None:
+        initial = tracker.predict_positions(rows, clock())
+    else:
+        initial = tag_store.positions[rows]
+    positions = batch_solver.solve(tag_store.ranges[rows], tag_store.range_anchors[rows], tag_store.anchor_ids, initial)
+    solved = ~np.isnan(positions[:, 0])
+    timestamp = clock()
+
+    positions[solved] = store_positions(rows[solved], positions[solved], timestamp)
+    stats_logger.log_stage_latency('solve', (time.perf_counter() - solve_start) * 1000)
+
+    record_solved([tag_store.tag_ids[row] for row in rows], positions, solved, timestamp)
+    return batch_times
+
+def store_positions(rows, positions, timestamp):
+    """Γράφει νέες θέσεις στο store (φιλτραρισμένες, αν υπάρχει tracker) και τις επιστρέφει."""
+    if tracker is not None:
+        positions = tracker.update(rows, positions, timestamp)
+    tag_store.set_positions(rows, positions, timestamp)
+    schedule_tag_expiry(rows, timestamp)
+    return positions
+
+def schedule_tag_expiry(rows, timestamp):
+    proximity_expiry.schedule(rows, timestamp + PROXIMITY_MAX_AGE_SECONDS)
+    position_expiry.schedule(rows, timestamp + POSITION_TTL_SECONDS)
+
+def expire_stale_state(now):
+    """Εφαρμόζει τις λήξεις που έφτασαν στα timing wheels.
+
+    Επιστρέφει True αν κάποιο tag βγήκε από το proximity grid, ώστε να
+    επανεκτιμηθεί η εγγύτητα (και να σβήσει ο κινητήρας του).
+    """
+    # Κάθε γραμμή έχει μία εγγραφή ανά τροχό· όσες ανανεώθηκαν στο μεταξύ
+    # ξαναμπαίνουν με την πραγματική τους λήξη
+    rows = range_expiry.advance(now)
+    if len(rows):
+        expired_counts['ranges'] += tag_store.expire_ranges(rows, now - RANGE_TTL_SECONDS)
+        oldest = tag_store.oldest_range_timestamps(rows)
+        live = ~np.isnan(oldest)
+        range_expiry.schedule(rows[live], oldest[live] + RANGE_TTL_SECONDS)
+
+    removed = False
+    rows = proximity_expiry.advance(now)
+    if len(rows):
+        timestamps = tag_store.position_timestamps[rows]
+        live = timestamps > now - PROXIMITY_MAX_AGE_SECONDS
+        for row in rows[~live].tolist():
+            if proximity_grid.remove(tag_store.tag_ids[row]):
+                expired_counts['proximity'] += 1
+                removed = True
+        proximity_expiry.schedule(rows[live], timestamps[live] + PROXIMITY_MAX_AGE_SECONDS)
+
+    rows = position_expiry.advance(now)
+    if len(rows):
+        expired = tag_store.expire_positions(rows, now - POSITION_TTL_SECONDS)
+        expired_counts['positions'] += len(expired)
+        if tracker is not None:
+            tracker.reset(expired)
+        timestamps = tag_store.position_timestamps[rows]
+        live = ~np.isnan(timestamps)
+        position_expiry.schedule(rows[live], timestamps[live] + POSITION_TTL_SECONDS)
+
+    return removed
+
+def record_solved(tag_ids, positions, solved, timestamp):
+    """Ενημερώνει το proximity grid και τα στατιστικά με τα αποτελέσματα μιας λύσης."""
+    proximity_grid.update_many([tag_id for tag_id, success in zip(tag_ids, solved) if success],
+                               positions[solved], timestamp)
+    for tag_id, position, success in zip(tag_ids, positions, solved):
+        if success:
+            # Καταγραφή επιτυχούς positioning
+            stats_logger.log_positioning_attempt(tag_id, True, position)
+        else:
+            # Καταγραφή αποτυχημένου positioning
+            stats_logger.log_positioning_attempt(tag_id, False)
+
+def collect_shard_results():
+    """Thread: παραλαμβάνει τις λύσεις των shards για το main loop."""
+    for result in iter(shard_dispatcher.results.get, None):
+        shard_results.append(result)
+        new_data_event.set()
+
+def apply_shard_results():
+    """Όπως το solve_pending_positions, για τις λύσεις που έστειλαν τα shards."""
+    batch_times = None
+
+    while shard_results:
+        shard, tag_ids, positions, timestamp, solve_ms, received_at, sent_at = shard_results.popleft()
+        solved = ~np.isnan(positions[:, 0])
+
+        rows = np.array([tag_store.row_for(tag_id) for tag_id in tag_ids], dtype=np.intp)
+        positions[solved] = store_positions(rows[solved], positions[solved], timestamp)
+        stats_logger.log_stage_latency('solve', solve_ms)
+
+        record_solved(tag_ids, positions, solved, timestamp)
+        if batch_times is None or received_at < batch_times[0]:
+            batch_times = (received_at, sent_at)
+
+    return batch_times
+
+def check_proximity_and_control_motors(motor_commands):
+    """Ελέγχει την εγγύτητα και δίνει τις αλλαγές κατάστασης κινητήρων στον dispatcher (χωρίς network I/O)."""
+    proximity_start = time.perf_counter()
+    now = clock()
+
+    # Μόνο γειτονικά κελιά του πλέγματος, αντί για όλα τα ζεύγη tags
+    close_pairs = proximity_grid.find_close_pairs(PROXIMITY_EXIT_THRESHOLD, now, PROXIMITY_MAX_AGE_SECONDS)
+
+    # Γεγονότα μόνο στην έναρξη και στη λήξη κάθε encounter
+    entered, exited = encounters.update(close_pairs, now)
+    for tag_id1, tag_id2, distance_between_tags in entered:
+        print(f"⚠️ ΕΓΓΥΤΗΤΑ: {tag_id1} και {tag_id2} είναι κοντά ({distance_between_tags:.2f}m)!")
+        stats_logger.log_proximity_enter(tag_id1, tag_id2, distance_between_tags)
+    for encounter in exited:
+        print(f" Τέλος εγγύτητας: {encounter.tag1} και {encounter.tag2} "
+              f"({encounter.duration:.1f}s, ελάχιστη απόσταση {encounter.min_distance:.2f}m)")
+        stats_logger.log_proximity_exit(encounter)
+
+    tags_currently_in_proximity = encounters.active_tags()
+
+    # Σύγκριση επιθυμητής/τρέχουσας κατάστασης κινητήρα πάνω στη στήλη του store
+    count = tag_store.count
+    in_proximity = np.zeros(count, dtype=bool)
+    in_proximity[[tag_store.tag_index[t_id] for t_id in tags_currently_in_proximity]] = True
+    changed_rows = np.flatnonzero(in_proximity != tag_store.motor_on[:count])
+
+    tag_store.motor_on[changed_rows] = in_proximity[changed_rows]
+
+    publish_start = time.perf_counter()
+    stats_logger.log_stage_latency('proximity', (publish_start - proximity_start) * 1000)
+
+    for row in changed_rows.tolist():
+        motor_commands.submit(tag_store.tag_ids[row], in_proximity[row])
+
+    if len(changed_rows):
+        stats_logger.log_stage_latency('motor_publish', (time.perf_counter() - publish_start) * 1000)
+
+    return tags_currently_in_proximity
+
+def run_cycle(motor_commands, has_new_data):
+    """Ένας κύκλος του main loop: αναφορές της ουράς, επίλυση, λήξεις και εγγύτητα.
+
+    Επιστρέφει τα tags σε εγγύτητα αν η εγγύτητα επανεκτιμήθηκε, αλλιώς None.
+    """
+    batch_times = None
+    if has_new_data:
+        apply_pending_reports()
+        batch_times = solve_pending_positions()
+
+    # Χωρίς νέα δεδομένα η εγγύτητα αλλάζει μόνο όταν λήξει κάποιο tag
+    tags_expired = expire_stale_state(clock())
+    for latency_ms in motor_commands.drain_latencies():
+        stats_logger.log_stage_latency('motor_ack', latency_ms)
+    stats_logger.record_interval()
+    if batch_times is None and not tags_expired:
+        return None
+
+    tags_in_alarm = check_proximity_and_control_motors(motor_commands)
+    if batch_times is not None:
+        evaluated_at = clock()
+        batch_received_at, batch_sent_at = batch_times
+        stats_logger.log_decision_latency((evaluated_at - batch_received_at) * 1000)
+        stats_logger.log_stage_latency('end_to_end', (evaluated_at - batch_sent_at) * 1000)
+    return tags_in_alarm
+
+def add_pipeline_arguments(parser):
+    """Ορίσματα του pipeline θέσεων, κοινά για τον server και το replay.py."""
+    parser.add_argument("--ingest-policy", choices=INGEST_POLICIES, default=INGEST_POLICY,
+                        help="τι κρατά η ουρά εισόδου σε υπερφόρτωση: την πιο πρόσφατη απόσταση "
+                             "ανά (tag, anchor) ή FIFO που πετά τις παλαιότερες")
+    parser.add_argument("--ingest-capacity", type=int, default=INGEST_QUEUE_CAPACITY,
+                        help="μέγιστες εκκρεμείς αναφορές στην ουρά εισόδου")
+    parser.add_argument("--solver", choices=SOLVERS, default=POSITION_SOLVER,
+                        help="linear: γραμμικοποιημένη λύση ως προς anchor αναφοράς, gauss-newton: "
+                             "μη γραμμικά ελάχιστα τετράγωνα με warm start από την προηγούμενη θέση")
+    parser.add_argument("--site", metavar="FILE",
+                        help="site file (JSON) με τα anchors, αντί για τα ANCHOR_POSITIONS")
+    parser.add_argument("--max-anchors", type=int, default=MAX_ANCHORS_PER_SOLVE,
+                        help="μέγιστα anchors ανά tag σε κάθε λύση, 0 = όλα όσα ακούστηκαν")
+    parser.add_argument("--anchor-selection", choices=ANCHOR_SELECTIONS, default=ANCHOR_SELECTION,
+                        help="ποια anchors κρατιούνται: τα πλησιέστερα ή όσα δίνουν το μικρότερο GDOP")
+    parser.add_argument("--anchor-reach", type=float, default=ANCHOR_REACH_METERS, metavar="METERS",
+                        help="με --max-anchors προτιμώνται τα anchors έως τόσα μέτρα από την προηγούμενη "
+                             "θέση του tag (πλέγμα του site), 0 = μόνο κατά μετρημένη απόσταση")
+    parser.add_argument("--max-eval-rate", type=float, default=MAX_EVALUATION_RATE_HZ, metavar="HZ",
+                        help="μέγιστος ρυθμός εκτιμήσεων θέσεων και εγγύτητας· οι αναφορές που φτάνουν "
+                             "στο μεταξύ συγχωνεύονται στην επόμενη εκτίμηση")
+    parser.add_argument("--tracker", action="store_true",
+                        help="φίλτρο Kalman σταθερής ταχύτητας ανά tag: ομαλότερες θέσεις για την εγγύτητα "
+                             "και πρόβλεψη θέσεων για το γράφημα ανάμεσα στις αναφορές")
+
+def configure_pipeline(args):
+    """Στήνει νέο pipeline από τα ορίσματα του add_pipeline_arguments· επιστρέφει τα solver options.
+
+    Όλη η κατάσταση (tags, λήξεις, encounters) ξεκινά από την αρχή, οπότε
+    μπορεί να κληθεί ξανά για ανεξάρτητες εκτελέσεις (π.χ. benchmark.py).
+    """
+    global anchor_registry, tag_store, geometry_cache, tracker, batch_solver, ingest_queue, sequence_tracker
+    global dirty_rows, oldest_pending_report, oldest_pending_sent, range_expiry, proximity_expiry, position_expiry
+    global expired_counts, proximity_grid, encounters, min_evaluation_interval
+
+    if args.max_eval_rate <= 0:
+        print(f"Μη έγκυρο --max-eval-rate {args.max_eval_rate}: πρέπει να είναι θετικό")
+        sys.exit(1)
+    min_evaluation_interval = 1.0 / args.max_eval_rate
+
+    if args.site:
+        try:
+            anchor_registry = load_site(args.site)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Δεν ήταν δυνατή η φόρτωση του site file {args.site}: {e}")
+            sys.exit(1)
+        print(f" Site {args.site}: {anchor_registry.stats()}")
+    tag_store = TagStateStore(anchor_registry.ids)
+    geometry_cache = AnchorGeometryCache(anchor_registry)
+
+    anchor_updates.clear()
+    dirty_rows = set()
+    oldest_pending_report = oldest_pending_sent = None
+    range_expiry = TimingWheel(EXPIRY_TICK_SECONDS)
+    proximity_expiry = TimingWheel(EXPIRY_TICK_SECONDS)
+    position_expiry = TimingWheel(EXPIRY_TICK_SECONDS)
+    expired_counts = {'ranges': 0, 'proximity': 0, 'positions': 0}
+    proximity_grid = ProximityGrid(PROXIMITY_EXIT_THRESHOLD)
+    encounters = EncounterTracker(PROXIMITY_THRESHOLD, PROXIMITY_EXIT_THRESHOLD, PROXIMITY_MIN_DWELL_SECONDS)
+    tracker = KalmanTracker() if args.tracker else None
+
+    solver_options = {'max_anchors': args.max_anchors or None, 'selection': args.anchor_selection,
+                      'anchor_reach': args.anchor_reach or None}
+    batch_solver = make_solver(args.solver, geometry_cache, MIN_ANCHORS_FOR_POSITIONING, **solver_options)
+    ingest_queue = IngestQueue(args.ingest_capacity, args.ingest_policy)
+    sequence_tracker = SequenceTracker()
+    return solver_options
+
+def periodic_stats_update():
+    """Περιοδική ενημέρωση και εκτύπωση στατιστικών"""
+    while running:
+        time.sleep(stats_update_interval)
+        if running:
+            stats_logger.save_summary()
+            
+            # Εκτύπωση στατιστικών κάθε 30 δευτερόλεπτα
+            if int(time.time()) % 30 == 0:
+                stats_logger.print_summary()
+
+# --- Κύριο Πρόγραμμα ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UWB RTLS positioning server")
+    parser.add_argument("--headless", action="store_true",
+                        help="χωρίς τοπικό γράφημα (δεν φορτώνεται matplotlib/Tk)")
+    parser.add_argument("--publish-positions", action="store_true",
+                        help=f"δημοσίευση θέσεων στο {MQTT_POSITIONS_TOPIC} για το live_view.py")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="πλήθος διεργασιών επίλυσης (shards ανά tag_id), 0 = όλα στην ίδια διεργασία")
+    parser.add_argument("--record", metavar="FILE",
+                        help="καταγραφή όλων των εισερχόμενων μηνυμάτων για το replay.py")
+    parser.add_argument("--motor-qos", type=int, choices=(0, 1), default=MOTOR_COMMAND_QOS,
+                        help="QoS των εντολών κινητήρων: 1 με επιβεβαίωση (PUBACK), 0 χωρίς")
+    parser.add_argument("--metrics-dir", default=METRICS_DIR,
+                        help="φάκελος του columnar metrics store (ένας υποφάκελος ανά session)")
+    add_pipeline_arguments(parser)
+    args = parser.parse_args()
+
+    solver_options = configure_pipeline(args)
+    try:
+        stats_logger = RTLSStatisticsLogger(metrics_dir=args.metrics_dir)
+    except OSError as e:
+        print(f"Δεν ήταν δυνατή η δημιουργία του metrics store στο {args.metrics_dir}: {e}")
+        sys.exit(1)
+    if args.record:
+        try:
+            recorder = RangeRecorder(args.record)
+        except OSError as e:
+            print(f"Δεν ήταν δυνατή η δημιουργία της καταγραφής {args.record}: {e}")
+            sys.exit(1)
+        print(f" Recording to {args.record}")
+
+    # Ρύθμιση signal handler
+    signal.signal(signal.SIGINT, signal_handler)
+    
+    try:
+        # Δημιουργία MQTT client με compatibility
+        try:
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
+        except AttributeError:
+            client = mqtt.Client()
+
+        client.on_connect = on_connect
+        client.on_message = on_message
+
+        # Τα publish των εντολών γίνονται από το thread του dispatcher, ποτέ από το main loop
+        motor_dispatcher = MotorCommandDispatcher(client, MQTT_MOTOR_CMD_TOPIC_PREFIX, qos=args.motor_qos)
+        client.on_publish = motor_dispatcher.on_publish
+
+        # Οι workers ξεκινούν με spawn (βλ. shard_workers), άρα δεν κληρονομούν τα threads του server
+        if args.workers > 0:
+            shard_dispatcher = ShardDispatcher(args.workers, anchor_registry, MIN_ANCHORS_FOR_POSITIONING,
+                                               RANGE_TTL_SECONDS, args.solver, solver_options)
+            shard_collector = threading.Thread(target=collect_shard_results, daemon=True)
+            shard_collector.start()
+            print(f" Sharded mode: {args.workers} positioning worker(s)")
+
+        try:
+            client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT, 60)
+        except Exception as e:
+            print(f"Δεν ήταν δυνατή η σύνδεση στον MQTT Broker: {e}")
+            sys.exit(1)
+
+        client.loop_start()
+        motor_dispatcher.start()
+
+        # Ξεκίνησε το thread για στατιστικά
+        stats_thread = threading.Thread(target=periodic_stats_update, daemon=True)
+        stats_thread.start()
+
+        if not args.headless:
+            from live_view import LiveView
+            live_view = LiveView(anchor_registry)
+
+        render_enabled = live_view is not None or args.publish_positions
+        wait_timeout = min(EXPIRY_TICK_SECONDS, PLOT_INTERVAL_SECONDS) if render_enabled else EXPIRY_TICK_SECONDS
+        last_evaluation = 0.0
+        last_plot = 0.0
+        tags_in_alarm = set()
+
+        # Event-driven main loop: ξυπνά με νέα δεδομένα ή για ανανέωση γραφήματος
+        while running:
+            try:
+                has_new_data = new_data_event.wait(timeout=wait_timeout)
+
+                if has_new_data:
+                    # Όριο ρυθμού: οι αναφορές που φτάνουν στο μεταξύ συγχωνεύονται στην ίδια παρτίδα
+                    remaining = last_evaluation + min_evaluation_interval - time.time()
+                    if remaining > 0:
+                        time.sleep(remaining)
+                    new_data_event.clear()
+
+                result = run_cycle(motor_dispatcher, has_new_data)
+                now = time.time()
+                evaluated = result is not None
+                if evaluated:
+                    tags_in_alarm = result
+                    last_evaluation = now
+
+                render_due = render_enabled and now - last_plot >= PLOT_INTERVAL_SECONDS
+                if evaluated or render_due:
+                    publish_snapshot(tags_in_alarm)
+
+                if render_due:
+                    update_plot(current_snapshot)
+                    if args.publish_positions:
+                        publish_positions(client, current_snapshot)
+                    last_plot = now
+
+            except KeyboardInterrupt:
+                break
+            except Exception as e:
+                print(f"Error in main loop: {e}")
+                continue
+
+    except KeyboardInterrupt:
+        print("\n Keyboard interrupt received...")
+    
+    finally:
+        print(" Cleaning up...")
+        running = False
+        # Πριν από το loop_stop, ώστε να φτάσουν τα PUBACK των τελευταίων εντολών
+        if motor_dispatcher is not None:
+            motor_dispatcher.close()
+        
+        # Αποθήκευση στατιστικών
+        try:
+            # Τα encounters που είναι ακόμη ενεργά καταγράφονται με τη διάρκειά τους μέχρι τώρα
+            for encounter in encounters.close_all(clock()):
+                stats_logger.log_proximity_exit(encounter)
+            stats_logger.close()
+            stats_logger.save_detailed_log()
+            stats_logger.print_summary()
+            print(f" Metrics store: {stats_logger.store.stats()}")
+            print(f" Geometry cache: {geometry_cache.stats()}")
+            if shard_dispatcher is None and hasattr(batch_solver, 'stats'):
+                print(f" Solver ({args.solver}): {batch_solver.stats()}")
+            print(f" Tag store: {tag_store.memory_stats()}")
+            if tracker is not None:
+                print(f" Tracker: {tracker.stats()}")
+            print(f" Expired: {expired_counts}")
+            if motor_dispatcher is not None:
+                print(f" Motor commands: {motor_dispatcher.stats()}")
+        except:
+            pass
+        
+        # Κλείσιμο matplotlib
+        if live_view is not None:
+            live_view.close()
+        
+        # Κλείσιμο MQTT
+        try:
+            client.loop_stop()
+            client.disconnect()
+        except:
+            pass
+
+        # Μετά το loop_stop δεν έρχονται πια frames από το MQTT thread
+        if recorder is not None:
+            write_recorded_frames()
+            recorder.close()
+            print(f" Recording: {recorder.stats()}")
+
+        if shard_dispatcher is not None:
+            shard_dispatcher.close()
+            shard_collector.join(timeout=1.0)
+            print(f" Shards: {shard_dispatcher.stats()}")
+        
+        print(" Program terminated cleanly.")
+
@@ -0,0 +1,127 @@
+import numpy as np
+
+# Νέα streams από αναφορές JSON μένουν σε dict μέχρι να μαζευτούν τόσα και
+# μετά μπαίνουν μαζικά στους ταξινομημένους πίνακες
+_MERGE_STREAMS = 4096
+
+
+class SequenceTracker:
+    """Εντοπίζει χαμένα μηνύματα από τα κενά στα sequence numbers ανά (tag, anchor).
+
+    Καλείται από το MQTT thread πριν από την ουρά εισόδου, ώστε όσα πετά η
+    πολιτική της ουράς (βλ. IngestQueue) να μη μετρούν ως χαμένα στο δίκτυο.
+    Μόνο εκείνο το thread τον ενημερώνει· οι μετρητές (lost, out_of_order)
+    διαβάζονται από το main loop.
+
+    Ο τελευταίος αριθμός κάθε stream ζει σε ταξινομημένους πίνακες με κλειδί
+    (tag << 32 | anchor) των interned ids, οπότε ένα binary batch ελέγχεται
+    ολόκληρο με λίγες πράξεις NumPy αντί για μία αναζήτηση ανά record.
+    """
+
+    def __init__(self):
+        self._tag_index = {}
+        self._anchor_index = {}
+        self._keys = np.empty(0, dtype=np.int64)
+        self._last = np.empty(0, dtype=np.int64)
+        self._new_streams = {}
+        self.checked = 0
+        self.lost = 0
+        self.out_of_order = 0
+
+    def _intern(self, index, identifier):
+        position = index.get(identifier)
+        if position is None:
+            position = index[identifier] = len(index)
+        return position
+
+    def check(self, tag_id, anchor_id, seq):
+        """Μία αναφορά (JSON)."""
+        self.checked += 1
+        key = self._intern(self._tag_index, tag_id) << 32 | self._intern(self._anchor_index, anchor_id)
+
+        last = self._new_streams.get(key)
+        if last is None:
+            i = int(np.searchsorted(self._keys, key))
+            if i == len(self._keys) or self._keys[i] != key:
+                self._new_streams[key] = seq
+                if len(self._new_streams) >= _MERGE_STREAMS:
+                    self._merge_new_streams()
+                return
+            last = int(self._last[i])
+            if seq > last:
+                self._last[i] = seq
+        elif seq > last:
+            self._new_streams[key] = seq
+
+        if seq > last + 1:
+            self.lost += seq - last - 1
+        elif seq <= last:
+            self.out_of_order += 1
+
+    def check_batch(self, tag_ids, anchor_ids, records):
+        """Όλα τα records ενός binary batch (βλ. wire_format), με τη σειρά τους."""
+        if len(records) == 0:
+            return
+        self.checked += len(records)
+        self._merge_new_streams()
+
+        tag_rows = np.array([self._intern(self._tag_index, tag_id) for tag_id in tag_ids], dtype=np.int64)
+        anchor_rows = np.array([self._intern(self._anchor_index, a) for a in anchor_ids], dtype=np.int64)
+        keys = tag_rows[records['tag']] << 32 | anchor_rows[records['anchor']]
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        seq = records['seq'][order].astype(np.int64)
+
+        # Κάθε stream ως συνεχόμενη ομάδα, με τα records του στη σειρά του batch
+        first = np.concatenate(([True], keys[1:] != keys[:-1]))
+        group = np.cumsum(first) - 1
+        streams = keys[first]
+        ends = np.append(np.flatnonzero(first)[1:], len(keys)) - 1
+
+        at = np.searchsorted(self._keys, streams)
+        known = at < len(self._keys)
+        known[known] = self._keys[at[known]] == streams[known]
+        previous = np.full(len(streams), -1, dtype=np.int64)
+        previous[known] = self._last[at[known]]
+
+        # Ο μεγαλύτερος αριθμός πριν από κάθε record: το τρέχον μέγιστο της
+        # ομάδας (χωρίς να περνά από ομάδα σε ομάδα) ή ο τελευταίος γνωστός
+        offset = group << 33
+        running = np.maximum.accumulate(seq + offset) - offset
+        before = np.empty_like(seq)
+        before[0] = -1
+        before[1:] = running[:-1]
+        before[first] = -1
+        before = np.maximum(before, previous[group])
+
+        seen = before >= 0
+        gap = seq - before
+        self.lost += int(np.sum(gap[seen & (gap > 1)] - 1))
+        self.out_of_order += int(np.count_nonzero(seen & (gap <= 0)))
+
+        last = np.maximum(running[ends], previous)
+        self._last[at[known]] = last[known]
+        self._insert(at[~known], streams[~known], last[~known])
+
+    def _merge_new_streams(self):
+        if not self._new_streams:
+            return
+        keys = np.fromiter(self._new_streams.keys(), dtype=np.int64, count=len(self._new_streams))
+        last = np.fromiter(self._new_streams.values(), dtype=np.int64, count=len(self._new_streams))
+        self._new_streams = {}
+        order = np.argsort(keys)
+        keys, last = keys[order], last[order]
+        self._insert(np.searchsorted(self._keys, keys), keys, last)
+
+    def _insert(self, at, keys, last):
+        if len(keys):
+            self._keys = np.insert(self._keys, at, keys)
+            self._last = np.insert(self._last, at, last)
+
+    def stats(self):
+        return {
+            'checked': self.checked,
+            'streams': len(self._keys) + len(self._new_streams),
+            'lost': self.lost,
+            'out_of_order': self.out_of_order
+        }
@@ -0,0 +1,272 @@
+import signal
+import threading
+import time
+import zlib
+import multiprocessing
+import numpy as np
+from tag_store import TagStateStore
+from trilateration import AnchorGeometryCache, make_solver
+from wire_format import encode_batch, decode_batch
+from timing_wheel import TimingWheel
+
+# Ο dispatcher μαζεύει τις αναφορές κάθε shard και τις στέλνει ως binary batch
+# όταν φτάσουν τις SHARD_FLUSH_RECORDS ή το αργότερο κάθε SHARD_FLUSH_SECONDS.
+SHARD_FLUSH_RECORDS = 512
+SHARD_FLUSH_SECONDS = 0.005
+SHARD_EXPIRY_TICK_SECONDS = 0.1
+
+# Οι workers ξεκινούν με spawn: ο server έχει ήδη threads (metrics store,
+# MQTT) και ένα fork θα αντέγραφε locks που μπορεί να κρατά κάποιο από αυτά
+_CONTEXT = multiprocessing.get_context('spawn')
+
+
+def shard_for(tag_id, num_shards):
+    """Σταθερό (ανεξάρτητο από PYTHONHASHSEED) shard ενός tag."""
+    return zlib.crc32(tag_id.encode()) % num_shards
+
+
+class _ShardBuffer:
+    """Αναφορές που περιμένουν να σταλούν σε ένα shard, με interned ids."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.tag_ids = []
+        self.tag_index = {}
+        self.anchor_ids = []
+        self.anchor_index = {}
+        self.columns = ([], [], [], [], [])
+        self.chunks = []
+        self.size = 0
+        self.oldest_received = None
+
+    def _intern(self, ids, index, identifier):
+        position = index.get(identifier)
+        if position is None:
+            position = index[identifier] = len(ids)
+            ids.append(identifier)
+        return position
+
+    def _touch(self, received_at, count):
+        if self.oldest_received is None:
+            self.oldest_received = received_at
+        self.size += count
+
+    def add(self, tag_id, anchor_id, seq, distance, sent_at, received_at):
+        tags, anchors, seqs, distances, sent = self.columns
+        tags.append(self._intern(self.tag_ids, self.tag_index, tag_id))
+        anchors.append(self._intern(self.anchor_ids, self.anchor_index, anchor_id))
+        seqs.append(seq)
+        distances.append(distance)
+        sent.append(sent_at)
+        self._touch(received_at, 1)
+
+    def add_records(self, tag_ids, anchor_ids, records, received_at):
+        used = np.unique(records['tag'])
+        tag_map = np.zeros(len(tag_ids), dtype=np.intp)
+        tag_map[used] = [self._intern(self.tag_ids, self.tag_index, tag_ids[t]) for t in used.tolist()]
+        anchor_map = np.array([self._intern(self.anchor_ids, self.anchor_index, a) for a in anchor_ids], dtype=np.intp)
+        self.chunks.append((tag_map[records['tag']], anchor_map[records['anchor']],
+                            records['seq'], records['distance'], records['sent_at']))
+        self._touch(received_at, len(records))
+
+    def encode(self):
+        chunks = self.chunks
+        if self.columns[0]:
+            chunks = chunks + [tuple(np.asarray(column) for column in self.columns)]
+        tag_index, anchor_index, seq, distance, sent_at = (np.concatenate(column) for column in zip(*chunks))
+        return encode_batch(self.tag_ids, self.anchor_ids, tag_index, anchor_index, distance, seq, sent_at)
+
+
+def shard_worker(shard, conn, results, anchor_positions, min_anchors, range_ttl=None, solver_name='linear',
+                 solver_options=None):
+    """Διεργασία ενός shard: κρατά τις αποστάσεις των tags της και τις λύνει μαζικά.
+
+    Διαβάζει όσα batches είναι διαθέσιμα, λύνει τα tags που άλλαξαν και στέλνει
+    στο results (shard, tag_ids, positions, timestamp, solve_ms, received_at, sent_at).
+    Με range_ttl οι αποστάσεις που δεν ανανεώθηκαν λήγουν (βλ. TimingWheel).
+    Οι λύσεις κρατιούνται και τοπικά, ως warm start του solver_name
+    (solver_options: max_anchors/selection/anchor_reach του make_solver).
+    """
+    # Τον τερματισμό τον αποφασίζει η κύρια διεργασία (στέλνει None)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    store = TagStateStore(anchor_positions.keys())
+    geometry_cache = AnchorGeometryCache(anchor_positions)
+    solver = make_solver(solver_name, geometry_cache, min_anchors, **(solver_options or {}))
+    range_expiry = TimingWheel(SHARD_EXPIRY_TICK_SECONDS) if range_ttl else None
+    dirty_rows = set()
+    oldest_received = oldest_sent = None
+
+    while True:
+        if range_expiry is not None:
+            now = time.time()
+            expiring = range_expiry.advance(now)
+            if len(expiring):
+                store.expire_ranges(expiring, now - range_ttl)
+                oldest = store.oldest_range_timestamps(expiring)
+                live = ~np.isnan(oldest)
+                range_expiry.schedule(expiring[live], oldest[live] + range_ttl)
+            if not conn.poll(SHARD_EXPIRY_TICK_SECONDS):
+                continue
+
+        message = conn.recv()
+        while True:
+            if message is None:
+                return
+            kind = message[0]
+            if kind == 'batch':
+                _, received_at, payload = message
+                tag_ids, anchor_ids, records = decode_batch(payload)
+                rows = store.set_ranges(tag_ids, anchor_ids, records['tag'], records['anchor'],
+                                        records['distance'], received_at)
+                if range_expiry is not None:
+                    range_expiry.schedule(rows, time.time() + range_ttl)
+                rows = rows[store.range_counts(rows) >= min_anchors]
+                if len(rows):
+                    if not dirty_rows:
+                        oldest_received = received_at
+                        oldest_sent = float(records['sent_at'].min())
+                    dirty_rows.update(rows.tolist())
+            elif kind == 'anchor':
+                _, anchor_id, position = message
+                geometry_cache.update_anchor(anchor_id, position)
+
+            # Ό,τι έχει ήδη φτάσει μπαίνει στην ίδια λύση
+            if not conn.poll():
+                break
+            message = conn.recv()
+
+        if not dirty_rows:
+            continue
+
+        rows = np.fromiter(dirty_rows, dtype=np.intp, count=len(dirty_rows))
+        rows.sort()
+        dirty_rows = set()
+
+        solve_start = time.perf_counter()
+        positions = solver.solve(store.ranges[rows], store.range_anchors[rows], store.anchor_ids, store.positions[rows])
+        solve_ms = (time.perf_counter() - solve_start) * 1000
+        solved = ~np.isnan(positions[:, 0])
+        store.set_positions(rows[solved], positions[solved], time.time())
+
+        results.put((shard, [store.tag_ids[row] for row in rows], positions, time.time(),
+                     solve_ms, oldest_received, oldest_sent))
+
+
+class ShardDispatcher:
+    """Μοιράζει τις αναφορές σε num_shards διεργασίες με βάση το hash του tag_id.
+
+    Κάθε tag ανήκει πάντα στο ίδιο shard, οπότε η κατάσταση των αποστάσεών
+    του ζει μόνο εκεί. Οι λύσεις όλων των shards έρχονται στην ουρά results
+    και η εγγύτητα υπολογίζεται κεντρικά, ώστε να βρίσκονται και ζεύγη tags
+    από διαφορετικά shards.
+    """
+
+    def __init__(self, num_shards, anchor_positions, min_anchors, range_ttl=None, solver_name='linear',
+                 solver_options=None):
+        self.num_shards = num_shards
+        self.results = _CONTEXT.Queue()
+        self._buffers = [_ShardBuffer() for _ in range(num_shards)]
+        self._shard_cache = {}
+        self._lock = threading.Lock()
+        self._connections = []
+        self._workers = []
+        self.batches_sent = [0] * num_shards
+        self.records_sent = [0] * num_shards
+
+        for shard in range(num_shards):
+            receiver, sender = _CONTEXT.Pipe(duplex=False)
+            worker = _CONTEXT.Process(
+                target=shard_worker,
+                args=(shard, receiver, self.results, anchor_positions, min_anchors, range_ttl, solver_name,
+                      solver_options),
+                daemon=True)
+            worker.start()
+            receiver.close()
+            self._connections.append(sender)
+            self._workers.append(worker)
+
+        self._running = True
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def _shard(self, tag_id):
+        shard = self._shard_cache.get(tag_id)
+        if shard is None:
+            shard = self._shard_cache[tag_id] = shard_for(tag_id, self.num_shards)
+        return shard
+
+    def submit(self, tag_id, anchor_id, seq, distance, sent_at, received_at):
+        """Μία αναφορά (από JSON μήνυμα)."""
+        shard = self._shard(tag_id)
+        with self._lock:
+            buffer = self._buffers[shard]
+            buffer.add(tag_id, anchor_id, seq, distance, sent_at, received_at)
+            if buffer.size >= SHARD_FLUSH_RECORDS:
+                self._send(shard)
+
+    def submit_batch(self, tag_ids, anchor_ids, records, received_at):
+        """Όλα τα records ενός binary batch, μοιρασμένα ανά shard."""
+        tag_shards = np.array([self._shard(tag_id) for tag_id in tag_ids], dtype=np.intp)
+        record_shards = tag_shards[records['tag']]
+        with self._lock:
+            for shard in np.unique(record_shards).tolist():
+                buffer = self._buffers[shard]
+                buffer.add_records(tag_ids, anchor_ids, records[record_shards == shard], received_at)
+                if buffer.size >= SHARD_FLUSH_RECORDS:
+                    self._send(shard)
+
+    def _send(self, shard):
+        buffer = self._buffers[shard]
+        if buffer.size == 0:
+            return
+        self._connections[shard].send(('batch', buffer.oldest_received, buffer.encode()))
+        self.batches_sent[shard] += 1
+        self.records_sent[shard] += buffer.size
+        buffer.clear()
+
+    def update_anchor(self, anchor_id, position):
+        """Νέα θέση anchor σε όλα τα shards, μετά από όσες αναφορές περιμένουν ήδη στους buffers."""
+        with self._lock:
+            for shard, connection in enumerate(self._connections):
+                self._send(shard)
+                connection.send(('anchor', anchor_id, position))
+
+    def flush(self):
+        with self._lock:
+            for shard in range(self.num_shards):
+                self._send(shard)
+
+    def _flush_periodically(self):
+        while self._running:
+            time.sleep(SHARD_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Shard dispatcher: flush failed: {e}")
+
+    def stats(self):
+        return {
+            'shards': self.num_shards,
+            'records_per_shard': list(self.records_sent),
+            'batches_per_shard': list(self.batches_sent)
+        }
+
+    def close(self, timeout=5.0):
+        """Στέλνει ό,τι απέμεινε, σταματά τους workers και τερματίζει την ουρά results."""
+        self._running = False
+        self._flusher.join(timeout=1.0)
+        self.flush()
+        with self._lock:
+            for connection in self._connections:
+                try:
+                    connection.send(None)
+                except Exception:
+                    pass
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+            if worker.is_alive():
+                worker.terminate()
+        self.results.put(None)
@@ -0,0 +1,179 @@
+import numpy as np
+
+# Κλειδί κελιού ως ένας int64: (cx + offset) * stride + (cy + offset), ώστε
+# τα κελιά να ταξινομούνται και να αναζητούνται με np.searchsorted
+_KEY_OFFSET = 1 << 30
+_KEY_STRIDE = 1 << 31
+
+# Γειτονικά κελιά που ελέγχονται από κάθε κελί (το ίδιο και το μισό της 3x3
+# γειτονιάς, ώστε κάθε ζεύγος κελιών να εξετάζεται μόνο μία φορά)
+_FORWARD_NEIGHBOURS = ((1, -1), (1, 0), (1, 1), (0, 1))
+_NEIGHBOUR_KEY_OFFSETS = (0,) + tuple(dx * _KEY_STRIDE + dy for dx, dy in _FORWARD_NEIGHBOURS)
+
+
+def _cross_pairs(starts_a, sizes_a, starts_b, sizes_b):
+    """Όλα τα ζεύγη δεικτών (i, j) με i στο [starts_a, starts_a + sizes_a) και j στο αντίστοιχο διάστημα του b."""
+    counts = sizes_a * sizes_b
+    group = np.repeat(np.arange(len(counts)), counts)
+    k = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    return starts_a[group] + k // sizes_b[group], starts_b[group] + k % sizes_b[group]
+
+
+class ProximityGrid:
+    """Ομοιόμορφο πλέγμα (cell size = όριο εγγύτητας) πάνω στις θέσεις των tags.
+
+    Οι θέσεις, τα timestamps και τα κλειδιά κελιών ζουν σε συνεχόμενους
+    πίνακες, μία θέση (slot) ανά tag. Δύο tags με απόσταση μικρότερη από
+    cell_size βρίσκονται πάντα στο ίδιο ή σε γειτονικό κελί, οπότε η
+    αναζήτηση ζευγών είναι ένα join των ταξινομημένων κλειδιών με τα κλειδιά
+    των γειτονικών κελιών, αντί για όλα τα ζεύγη. Σε κάθε αναζήτηση
+    ξαναταξινομούνται μόνο τα tags που άλλαξαν κελί από την προηγούμενη.
+    """
+
+    def __init__(self, cell_size, initial_capacity=64):
+        self.cell_size = cell_size
+        self._slot = {}
+        self._tag_ids = []
+        self._free_slots = []
+        self._next_order = 0
+        # Slots ταξινομημένα κατά κλειδί κελιού στην τελευταία αναζήτηση
+        self._sorted = np.empty(0, dtype=np.intp)
+        # Slots που άλλαξαν κελί, προστέθηκαν ή αφαιρέθηκαν από τότε
+        self._rebin = set()
+        self._allocate(max(1, initial_capacity))
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self._positions = np.full((capacity, 2), np.nan)
+        self._timestamps = np.full(capacity, np.nan)
+        self._keys = np.full(capacity, -1, dtype=np.int64)
+        self._order = np.zeros(capacity, dtype=np.int64)
+        self._active = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        used = len(self._tag_ids)
+        old = (self._positions, self._timestamps, self._keys, self._order, self._active)
+        self._allocate(self.capacity * 2)
+        new = (self._positions, self._timestamps, self._keys, self._order, self._active)
+        for old_array, new_array in zip(old, new):
+            new_array[:used] = old_array[:used]
+
+    def _slot_for(self, tag_id):
+        slot = self._slot.get(tag_id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._tag_ids[slot] = tag_id
+            else:
+                if len(self._tag_ids) == self.capacity:
+                    self._grow()
+                slot = len(self._tag_ids)
+                self._tag_ids.append(tag_id)
+            self._slot[tag_id] = slot
+            self._order[slot] = self._next_order
+            self._next_order += 1
+            self._active[slot] = True
+            self._keys[slot] = -1
+        return slot
+
+    def _cell_keys(self, positions):
+        cells = np.floor(positions / self.cell_size).astype(np.int64) + _KEY_OFFSET
+        return cells[:, 0] * _KEY_STRIDE + cells[:, 1]
+
+    def update(self, tag_id, position, timestamp):
+        """Καταχωρεί τη νέα θέση ενός tag και το μετακινεί στο σωστό κελί."""
+        self.update_many([tag_id], np.asarray(position, dtype=float)[None, :], timestamp)
+
+    def update_many(self, tag_ids, positions, timestamp):
+        """Όπως το update, για πολλά tags με το ίδιο timestamp (positions: πίνακας (n, 2))."""
+        if len(tag_ids) == 0:
+            return
+        slots = np.array([self._slot_for(tag_id) for tag_id in tag_ids], dtype=np.intp)
+        keys = self._cell_keys(positions)
+        moved = keys != self._keys[slots]
+        if moved.any():
+            self._rebin.update(slots[moved].tolist())
+            self._keys[slots[moved]] = keys[moved]
+        self._positions[slots] = positions
+        self._timestamps[slots] = timestamp
+
+    def remove(self, tag_id):
+        """Αφαιρεί ένα tag από το πλέγμα· επιστρέφει False αν δεν υπήρχε."""
+        slot = self._slot.pop(tag_id, None)
+        if slot is None:
+            return False
+        self._active[slot] = False
+        self._timestamps[slot] = np.nan
+        self._tag_ids[slot] = None
+        self._free_slots.append(slot)
+        self._rebin.add(slot)
+        return True
+
+    def __len__(self):
+        return len(self._slot)
+
+    def _sorted_slots(self):
+        """Τα ενεργά slots ταξινομημένα κατά κελί· ξαναταξινομούνται μόνο όσα άλλαξαν."""
+        if self._rebin:
+            changed = np.fromiter(self._rebin, dtype=np.intp, count=len(self._rebin))
+            self._rebin.clear()
+            is_changed = np.zeros(self.capacity, dtype=bool)
+            is_changed[changed] = True
+
+            kept = self._sorted[~is_changed[self._sorted]]
+            changed = changed[self._active[changed]]
+            changed = changed[np.argsort(self._keys[changed], kind='stable')]
+            at = np.searchsorted(self._keys[kept], self._keys[changed])
+            self._sorted = np.insert(kept, at, changed)
+        return self._sorted
+
+    def find_close_pairs(self, threshold, now, max_age):
+        """Επιστρέφει [(tag1, tag2, distance)] για τα πρόσφατα tags με απόσταση < threshold.
+
+        Τα ζεύγη έχουν την ίδια σειρά με τον πλήρη έλεγχο όλων των ζευγών
+        (σειρά πρώτης εμφάνισης των tags).
+        """
+        if threshold > self.cell_size:
+            raise ValueError("threshold must not exceed the grid cell size")
+
+        slots = self._sorted_slots()
+        slots = slots[now - self._timestamps[slots] <= max_age]
+        if len(slots) < 2:
+            return []
+
+        # Κάθε κελί ως συνεχόμενο διάστημα [start, start + size) του slots
+        keys = self._keys[slots]
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        sizes = np.diff(np.append(starts, len(keys)))
+        cells = keys[starts]
+
+        lefts, rights = [], []
+        for offset in _NEIGHBOUR_KEY_OFFSETS:
+            if offset == 0:
+                a = b = np.flatnonzero(sizes > 1)
+            else:
+                target = cells + offset
+                b = np.minimum(np.searchsorted(cells, target), len(cells) - 1)
+                a = np.flatnonzero(cells[b] == target)
+                b = b[a]
+            left, right = _cross_pairs(starts[a], sizes[a], starts[b], sizes[b])
+            if offset == 0:
+                left, right = left[left < right], right[left < right]
+            lefts.append(left)
+            rights.append(right)
+        left, right = np.concatenate(lefts), np.concatenate(rights)
+
+        positions = self._positions[slots]
+        diff = positions[left] - positions[right]
+        distances = np.sqrt(np.sum(diff**2, axis=1))
+        close = distances < threshold
+        first, second, distances = slots[left[close]], slots[right[close]], distances[close]
+
+        swap = self._order[first] > self._order[second]
+        first, second = np.where(swap, second, first), np.where(swap, first, second)
+        order = np.lexsort((self._order[second], self._order[first]))
+
+        tag_ids = self._tag_ids
+        return [(tag_ids[tag1], tag_ids[tag2], distance)
+                for tag1, tag2, distance in zip(first[order].tolist(), second[order].tolist(),
+                                                distances[order].tolist())]
@@ -1,199 +1,495 @@
-import json
-import time
-import numpy as np
-from datetime import datetime
-import csv
-import os
-from collections import defaultdict, deque
-
-class RTLSStatisticsLogger:
-    def __init__(self, log_file="rtls_statistics.json", csv_file="rtls_metrics.csv"):
-        self.log_file = log_file
-        self.csv_file = csv_file
-        self.session_start = time.time()
-        self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Μετρικές απόδοσης
-        self.response_times = deque(maxlen=1000)
-        self.positioning_accuracy = deque(maxlen=1000)
-        self.message_counts = defaultdict(int)
-        self.proximity_events = []
-        self.tag_activity = defaultdict(list)
-        
-        # Χρονικές μετρικές
-        self.last_message_time = {}
-        self.processing_times = deque(maxlen=1000)
-        self.trilateration_success_rate = {"success": 0, "failed": 0}
-        
-        # Δημιουργία CSV headers αν δεν υπάρχει το αρχείο
-        self.init_csv_file()
-        
-        print(f" Statistics Logger initialized - Session ID: {self.session_id}")
-    
-    def init_csv_file(self):
-        """Δημιουργεί το CSV αρχείο με headers αν δεν υπάρχει"""
-        if not os.path.exists(self.csv_file):
-            with open(self.csv_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp', 'session_id', 'tag_id', 'response_time_ms',
-                    'positioning_accuracy_m', 'trilateration_success', 
-                    'proximity_events_count', 'active_tags_count'
-                ])
-    
-    def log_message_received(self, tag_id, anchor_id):
-        """Καταγράφει την λήψη μηνύματος"""
-        current_time = time.time()
-        self.message_counts[f"{tag_id}_{anchor_id}"] += 1
-        
-        # Υπολογισμός response time
-        if tag_id in self.last_message_time:
-            response_time = (current_time - self.last_message_time[tag_id]) * 1000
-            self.response_times.append(response_time)
-        
-        self.last_message_time[tag_id] = current_time
-    
-    def log_positioning_attempt(self, tag_id, success, position=None, expected_position=None):
-        """Καταγράφει απόπειρα υπολογισμού θέσης"""
-        processing_start = time.time()
-        
-        if success:
-            self.trilateration_success_rate["success"] += 1
-            
-            # Υπολογισμός ακρίβειας (για simulation χρησιμοποιούμε τυχαία τιμή)
-            if position is not None:
-                # Προσομοίωση σφάλματος εντοπισμού (0-0.2m)
-                accuracy = np.random.uniform(0.01, 0.15)
-                self.positioning_accuracy.append(accuracy)
-        else:
-            self.trilateration_success_rate["failed"] += 1
-        
-        processing_time = (time.time() - processing_start) * 1000
-        self.processing_times.append(processing_time)
-        
-        # Καταγραφή δραστηριότητας tag 
-        self.tag_activity[tag_id].append({
-            'timestamp': time.time(),
-            'success': success,
-            'position': position.tolist() if position is not None else None
-        })
-
-    
-    def log_proximity_event(self, tag1, tag2, distance):
-        """Καταγράφει γεγονός εγγύτητας"""
-        event = {
-            'timestamp': time.time(),
-            'tag1': tag1,
-            'tag2': tag2,
-            'distance': distance,
-            'session_id': self.session_id
-        }
-        self.proximity_events.append(event)
-        print(f" Proximity Event: {tag1} ↔ {tag2} ({distance:.2f}m)")
-    
-    def get_real_time_stats(self):
-        """Επιστρέφει στατιστικά σε πραγματικό χρόνο"""
-        current_time = time.time()
-        session_duration = current_time - self.session_start
-        
-        stats = {
-            'session_info': {
-                'session_id': self.session_id,
-                'duration_seconds': round(session_duration, 2),
-                'start_time': datetime.fromtimestamp(self.session_start).isoformat()
-            },
-            'performance_metrics': {
-                'avg_response_time_ms': round(np.mean(self.response_times), 2) if self.response_times else 0,
-                'min_response_time_ms': round(np.min(self.response_times), 2) if self.response_times else 0,
-                'max_response_time_ms': round(np.max(self.response_times), 2) if self.response_times else 0,
-                'avg_processing_time_ms': round(np.mean(self.processing_times), 2) if self.processing_times else 0
-            },
-            'accuracy_metrics': {
-                'avg_positioning_accuracy_m': round(np.mean(self.positioning_accuracy), 4) if self.positioning_accuracy else 0,
-                'min_accuracy_m': round(np.min(self.positioning_accuracy), 4) if self.positioning_accuracy else 0,
-                'max_accuracy_m': round(np.max(self.positioning_accuracy), 4) if self.positioning_accuracy else 0,
-                'std_accuracy_m': round(np.std(self.positioning_accuracy), 4) if self.positioning_accuracy else 0
-            },
-            'system_metrics': {
-                'trilateration_success_rate': round(
-                    self.trilateration_success_rate["success"] / 
-                    max(1, sum(self.trilateration_success_rate.values())) * 100, 2
-                ),
-                'total_messages': sum(self.message_counts.values()),
-                'active_tags': len(self.tag_activity),
-                'proximity_events_count': len(self.proximity_events)
-            }
-        }
-        return stats
-    
-    def save_to_csv(self):
-        """Αποθηκεύει τρέχοντα στατιστικά στο CSV"""
-        stats = self.get_real_time_stats()
-        
-        with open(self.csv_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            for tag_id in self.tag_activity.keys():
-                writer.writerow([
-                    datetime.now().isoformat(),
-                    self.session_id,
-                    tag_id,
-                    stats['performance_metrics']['avg_response_time_ms'],
-                    stats['accuracy_metrics']['avg_positioning_accuracy_m'],
-                    stats['system_metrics']['trilateration_success_rate'],
-                    stats['system_metrics']['proximity_events_count'],
-                    stats['system_metrics']['active_tags']
-                ])
-    
-    def save_detailed_log(self):
-        """Αποθηκεύει αναλυτικό log σε JSON"""
-        detailed_data = {
-            'session_info': {
-                'session_id': self.session_id,
-                'start_time': datetime.fromtimestamp(self.session_start).isoformat(),
-                'end_time': datetime.now().isoformat(),
-                'duration_seconds': time.time() - self.session_start
-            },
-            'statistics': self.get_real_time_stats(),
-            'raw_data': {
-                'response_times': list(self.response_times),
-                'positioning_accuracy': list(self.positioning_accuracy),
-                'processing_times': list(self.processing_times),
-                'proximity_events': self.proximity_events,
-                'message_counts': dict(self.message_counts)
-            },
-            'tag_activity': {
-                tag_id: activities[-100:]
-                for tag_id, activities in self.tag_activity.items()
-            }
-        }
-        
-        with open(self.log_file, 'w') as f:
-            json.dump(detailed_data, f, indent=2)
-        
-        print(f" Statistics saved to {self.log_file}")
-    
-    def print_summary(self):
-        """Εκτυπώνει σύνοψη στατιστικών"""
-        stats = self.get_real_time_stats()
-        
-        print("\n" + "="*60)
-        print(" RTLS SYSTEM STATISTICS SUMMARY")
-        print("="*60)
-        print(f"Session ID: {stats['session_info']['session_id']}")
-        print(f"Duration: {stats['session_info']['duration_seconds']:.1f} seconds")
-        
-        print(f"\n PERFORMANCE METRICS:")
-        print(f"  Average Response Time: {stats['performance_metrics']['avg_response_time_ms']:.2f} ms")
-        print(f"  Processing Time: {stats['performance_metrics']['avg_processing_time_ms']:.2f} ms")
-        
-        print(f"\n ACCURACY METRICS:")
-        print(f"  Average Positioning Accuracy: {stats['accuracy_metrics']['avg_positioning_accuracy_m']:.4f} m")
-        print(f"  Standard Deviation: {stats['accuracy_metrics']['std_accuracy_m']:.4f} m")
-        
-        print(f"\n SYSTEM METRICS:")
-        print(f"  Trilateration Success Rate: {stats['system_metrics']['trilateration_success_rate']:.1f}%")
-        print(f"  Total Messages Processed: {stats['system_metrics']['total_messages']}")
-        print(f"  Active Tags: {stats['system_metrics']['active_tags']}")
-        print(f"  Proximity Events: {stats['system_metrics']['proximity_events_count']}")
-        print("="*60)
-
+import json
+import math
+import time
+import numpy as np
+from datetime import datetime
+import os
+from metrics_store import MetricsStore
+from streaming_stats import RunningStats, StreamingMetric, LogHistogram
+
+# Στάδια της διαδρομής μιας αναφοράς απόστασης μέχρι την εντολή κινητήρα
+LATENCY_STAGES = ('broker_transit', 'json_decode', 'batch_decode', 'solve', 'proximity', 'motor_publish', 'motor_ack',
+                  'end_to_end')
+# Στάδια που καταγράφονται ένα δείγμα ανά κύκλο του main loop ή ανά εντολή (όχι ανά μήνυμα) στον πίνακα latency
+CYCLE_LATENCY_STAGES = ('solve', 'proximity', 'motor_publish', 'end_to_end', 'decision', 'motor_ack')
+# Μετρικές με σύνοψη ανά διάστημα στον πίνακα metrics
+INTERVAL_METRICS = ('response',) + LATENCY_STAGES + ('decision',)
+METRICS_INTERVAL_SECONDS = 1.0
+
+# Πίνακες του metrics store (βλ. metrics_store.py), με interned tag ids
+ACTIVITY_DTYPE = np.dtype([('timestamp', '<f8'), ('tag', '<u4'), ('success', '?'), ('x', '<f8'), ('y', '<f8')])
+# Ένα record ανά encounter: λήξη (ώστε ο πίνακας να είναι σε χρονική σειρά), ζεύγος, ελάχιστη απόσταση, διάρκεια
+PROXIMITY_DTYPE = np.dtype([('timestamp', '<f8'), ('tag1', '<u4'), ('tag2', '<u4'), ('distance', '<f8'),
+                            ('duration', '<f8')])
+LATENCY_DTYPE = np.dtype([('timestamp', '<f8'), ('stage', '<u1'), ('latency_ms', '<f4')])
+TAG_INTERVAL_DTYPE = np.dtype([('timestamp', '<f8'), ('tag', '<u4'), ('messages', '<u4'), ('solved', '<u4'),
+                               ('failed', '<u4'), ('x', '<f4'), ('y', '<f4')])
+METRICS_DTYPE = np.dtype(
+    [('timestamp', '<f8'), ('messages', '<u4'), ('solved', '<u4'), ('failed', '<u4'), ('active_tags', '<u4'),
+     ('encounters_started', '<u4'), ('active_encounters', '<u4'), ('lost_messages', '<u4'), ('ingest_depth', '<f4')]
+    + [(f'{name}_{field}', '<u4' if field == 'count' else '<f4')
+       for name in INTERVAL_METRICS for field in ('count', 'avg', 'p95', 'p99', 'max')])
+
+STORE_TABLES = {
+    'metrics': METRICS_DTYPE,
+    'tags': TAG_INTERVAL_DTYPE,
+    'activity': ACTIVITY_DTYPE,
+    'encounters': PROXIMITY_DTYPE,
+    'latency': LATENCY_DTYPE
+}
+
+
+def _summarize(stats, histogram, digits):
+    """Στρογγυλεμένη σύνοψη ενός RunningStats (και percentiles αν δοθεί ιστόγραμμα)"""
+    if stats.count == 0:
+        return {'count': 0, 'avg': 0, 'min': 0, 'max': 0, 'std': 0, 'p50': 0, 'p95': 0, 'p99': 0}
+    summary = {
+        'count': stats.count,
+        'avg': round(stats.mean, digits),
+        'min': round(stats.min, digits),
+        'max': round(stats.max, digits),
+        'std': round(stats.std, digits)
+    }
+    percentiles = histogram.percentiles() if histogram is not None else {50: 0, 95: 0, 99: 0}
+    for q, value in percentiles.items():
+        # Το κέντρο του bucket μπορεί να ξεπερνά τα πραγματικά άκρα
+        summary[f'p{q}'] = round(min(max(value, stats.min), stats.max), digits)
+    return summary
+
+
+class RTLSStatisticsLogger:
+    def __init__(self, log_file="rtls_statistics.json", metrics_dir="rtls_metrics",
+                 stats_window_seconds=60.0, interval_seconds=METRICS_INTERVAL_SECONDS, clock=time.time):
+        self.log_file = log_file
+        self.clock = clock
+        self.session_start = time.time()
+        self.session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # Interned tag ids (για τα binary records) και στήλες ανά interned tag:
+        # τελευταίο μήνυμα (για το response time) και μηνύματα του διαστήματος
+        self.tag_names = []
+        self.tag_index = {}
+        self._last_message_at = np.full(64, np.nan)
+        self._interval_messages = np.zeros(64, dtype=np.uint32)
+
+        # Columnar store ανά session (metrics_dir=None: μόνο aggregates στη μνήμη).
+        # Οι log_* μαζεύουν records σε λίστες και το record_interval() τα δίνει
+        # στον background writer του store μία φορά ανά interval_seconds.
+        self.store = None
+        if metrics_dir is not None:
+            self.store = MetricsStore(os.path.join(metrics_dir, self.session_id), STORE_TABLES)
+        self.interval_seconds = interval_seconds
+        self._interval_start = None
+        self._interval_previous = {}
+        self._pending_activity = []
+        self._pending_encounters = []
+        self._pending_latencies = []
+        self._names_stored = 0
+
+        # Μετρικές απόδοσης (aggregates όλου του session και του παραθύρου)
+        self.response_time_stats = StreamingMetric(stats_window_seconds)
+        self.accuracy_stats = StreamingMetric(stats_window_seconds, histogram=False)
+        self.total_messages = 0
+        # Τελευταία απόπειρα θέσης ανά tag: (timestamp, success, x, y)
+        self.tag_activity = {}
+        
+        # Χρονικές μετρικές
+        self.decision_latency_stats = StreamingMetric(stats_window_seconds)
+        self.stage_latencies = {stage: StreamingMetric(stats_window_seconds) for stage in LATENCY_STAGES}
+
+        # Κενά στα sequence numbers ανά (tag, anchor), από τον SequenceTracker
+        # πριν από την ουρά εισόδου (ό,τι πετά η ουρά μετρά χωριστά)
+        self.lost_messages = 0
+        self.out_of_order_messages = 0
+        self.trilateration_success_rate = {"success": 0, "failed": 0}
+        self.cold_start_ms = None
+
+        # Ουρά εισόδου: βάθος κατά το άδειασμα και μετρητές drops/coalescing
+        self.ingest_depth = StreamingMetric(stats_window_seconds, histogram=False)
+        self.ingest_counters = {}
+        self.last_ingest_depth = 0
+
+        # Proximity encounters: έναρξη/λήξη αντί για ένα γεγονός ανά έλεγχο
+        self.encounters_started = 0
+        self.encounters_finished = 0
+        self.encounter_durations = RunningStats()
+        
+        print(f" Statistics Logger initialized - Session ID: {self.session_id}")
+    
+    def _intern_tag(self, tag_id):
+        index = self.tag_index.get(tag_id)
+        if index is None:
+            index = len(self.tag_names)
+            self.tag_names.append(tag_id)
+            self.tag_index[tag_id] = index
+            if index == len(self._last_message_at):
+                self._last_message_at = np.append(self._last_message_at, np.full(index, np.nan))
+                self._interval_messages = np.append(self._interval_messages, np.zeros(index, dtype=np.uint32))
+        return index
+
+    def log_message_received(self, tag_id, sent_at=None, received_at=None):
+        """Καταγράφει την λήψη μηνύματος (και transit αν ο simulator στέλνει sent_at)"""
+        current_time = received_at if received_at is not None else self.clock()
+        self.total_messages += 1
+        tag = self._intern_tag(tag_id)
+        self._interval_messages[tag] += 1
+        
+        # Υπολογισμός response time
+        last_message_at = self._last_message_at[tag]
+        if not math.isnan(last_message_at):
+            response_time = (current_time - last_message_at) * 1000
+            self.response_time_stats.add(response_time, current_time)
+        
+        self._last_message_at[tag] = current_time
+
+        if sent_at is not None:
+            self.stage_latencies['broker_transit'].add((current_time - sent_at) * 1000, current_time)
+
+    def log_batch_received(self, tag_ids, records, received_at):
+        """Όπως το log_message_received για όλα τα records ενός binary batch (βλ. wire_format)
+
+        Ανά tag του batch, όχι ανά record: το πρώτο record ενός tag δίνει το
+        response time από το προηγούμενο μήνυμά του και τα υπόλοιπα 0.
+        """
+        self.total_messages += len(records)
+
+        counts = np.bincount(records['tag'], minlength=len(tag_ids))
+        present = np.flatnonzero(counts)
+        names = [tag_ids[t] for t in present.tolist()]
+        tags = [self.tag_index.get(tag_id) for tag_id in names]
+        if None in tags:
+            tags = [self._intern_tag(tag_id) for tag_id in names]
+        tags = np.array(tags, dtype=np.intp)
+        self._interval_messages[tags] += counts[present].astype(np.uint32)
+
+        previous = self._last_message_at[tags]
+        previous = previous[~np.isnan(previous)]
+        response_times = np.zeros(len(previous) + len(records) - len(tags))
+        response_times[:len(previous)] = (received_at - previous) * 1000
+        self._last_message_at[tags] = received_at
+
+        self.response_time_stats.add_many(response_times, received_at)
+        self.stage_latencies['broker_transit'].add_many((received_at - records['sent_at']) * 1000, received_at)
+
+    def log_stage_latency(self, stage, latency_ms):
+        """Καταγράφει τη διάρκεια ενός σταδίου (βλ. LATENCY_STAGES)"""
+        now = self.clock()
+        self.stage_latencies[stage].add(latency_ms, now)
+        if self.store is not None and stage in CYCLE_LATENCY_STAGES:
+            self._pending_latencies.append((now, CYCLE_LATENCY_STAGES.index(stage), latency_ms))
+    
+    def log_positioning_attempt(self, tag_id, success, position=None, expected_position=None):
+        """Καταγράφει απόπειρα υπολογισμού θέσης"""
+        current_time = self.clock()
+        
+        if success:
+            self.trilateration_success_rate["success"] += 1
+            
+            # Υπολογισμός ακρίβειας (για simulation χρησιμοποιούμε τυχαία τιμή)
+            if position is not None:
+                # Προσομοίωση σφάλματος εντοπισμού (0-0.2m)
+                accuracy = np.random.uniform(0.01, 0.15)
+                self.accuracy_stats.add(accuracy, current_time)
+        else:
+            self.trilateration_success_rate["failed"] += 1
+        
+        # Καταγραφή δραστηριότητας tag 
+        x, y = (position[0], position[1]) if position is not None else (np.nan, np.nan)
+        self.tag_activity[tag_id] = (current_time, success, x, y)
+        if self.store is not None:
+            self._pending_activity.append((current_time, self._intern_tag(tag_id), success, x, y))
+
+    
+    def log_cold_start(self, startup_ms):
+        """Καταγράφει το χρόνο από την εκκίνηση μέχρι το πρώτο μήνυμα"""
+        self.cold_start_ms = startup_ms
+
+    def log_ingest(self, depth, counters, sequence_counters=None):
+        """Καταγράφει το βάθος και τους μετρητές της ουράς εισόδου (IngestQueue.stats) και τα κενά sequence (SequenceTracker.stats)"""
+        self.ingest_depth.add(depth, self.clock())
+        self.ingest_counters = counters
+        self.last_ingest_depth = depth
+        if sequence_counters is not None:
+            self.lost_messages = sequence_counters['lost']
+            self.out_of_order_messages = sequence_counters['out_of_order']
+
+    def log_decision_latency(self, latency_ms):
+        """Καταγράφει το χρόνο από τη λήψη αναφοράς μέχρι την απόφαση για τους κινητήρες"""
+        now = self.clock()
+        self.decision_latency_stats.add(latency_ms, now)
+        if self.store is not None:
+            self._pending_latencies.append((now, CYCLE_LATENCY_STAGES.index('decision'), latency_ms))
+
+    def log_proximity_enter(self, tag1, tag2, distance):
+        """Καταγράφει την έναρξη ενός encounter εγγύτητας"""
+        self.encounters_started += 1
+        print(f" Proximity Event: {tag1} ↔ {tag2} ({distance:.2f}m)")
+
+    def log_proximity_exit(self, encounter):
+        """Καταγράφει ένα encounter που έληξε (βλ. proximity_encounters.Encounter)"""
+        self.encounters_finished += 1
+        self.encounter_durations.add(encounter.duration)
+        if self.store is not None:
+            self._pending_encounters.append((encounter.start + encounter.duration, self._intern_tag(encounter.tag1),
+                                             self._intern_tag(encounter.tag2), encounter.min_distance,
+                                             encounter.duration))
+
+    def record_interval(self, force=False):
+        """Owner thread: κάθε interval_seconds στέλνει στο store τα records και τις συνόψεις του διαστήματος.
+
+        Καλείται συχνά (σε κάθε κύκλο του main loop) και τις περισσότερες
+        φορές απλώς επιστρέφει. force=True γράφει αμέσως (π.χ. στον τερματισμό).
+        """
+        if self.store is None:
+            return
+        now = self.clock()
+        if self._interval_start is None:
+            self._interval_start = now
+        if not force and now - self._interval_start < self.interval_seconds:
+            return
+        self._interval_start = now
+
+        self.store.append_names(self.tag_names[self._names_stored:])
+        self._names_stored = len(self.tag_names)
+
+        activity = np.array(self._pending_activity, dtype=ACTIVITY_DTYPE)
+        self._pending_activity = []
+        self.store.append('activity', activity)
+        if self._pending_encounters:
+            self.store.append('encounters', np.array(self._pending_encounters, dtype=PROXIMITY_DTYPE))
+            self._pending_encounters = []
+        if self._pending_latencies:
+            self.store.append('latency', np.array(self._pending_latencies, dtype=LATENCY_DTYPE))
+            self._pending_latencies = []
+
+        tags = self._tag_interval_rows(now, activity)
+        self.store.append('tags', tags)
+        self.store.append('metrics', self._metrics_interval_row(now, len(tags)))
+
+    def _tag_interval_rows(self, now, activity):
+        """Μία γραμμή ανά tag που έστειλε ή εντοπίστηκε στο διάστημα."""
+        message_tags = np.flatnonzero(self._interval_messages).astype(np.uint32)
+        message_counts = self._interval_messages[message_tags]
+        self._interval_messages[:] = 0
+
+        tags = np.union1d(message_tags, activity['tag'])
+        rows = np.zeros(len(tags), dtype=TAG_INTERVAL_DTYPE)
+        rows['timestamp'] = now
+        rows['tag'] = tags
+        rows['messages'][np.searchsorted(tags, message_tags)] = message_counts
+
+        position = np.searchsorted(tags, activity['tag'])
+        success = activity['success']
+        rows['solved'] = np.bincount(position[success], minlength=len(tags))
+        rows['failed'] = np.bincount(position[~success], minlength=len(tags))
+
+        # Τελευταία θέση του διαστήματος (NaN αν δεν εντοπίστηκε)
+        rows['x'] = rows['y'] = np.nan
+        located = position[success][::-1]
+        _, last = np.unique(located, return_index=True)
+        rows['x'][located[last]] = activity['x'][success][::-1][last]
+        rows['y'][located[last]] = activity['y'][success][::-1][last]
+        return rows
+
+    def _metrics_interval_row(self, now, active_tags):
+        """Συνόψεις του διαστήματος ως διαφορές από τα αθροιστικά του session."""
+        row = np.zeros(1, dtype=METRICS_DTYPE)
+        row['timestamp'] = now
+        row['active_tags'] = active_tags
+        row['ingest_depth'] = self.last_ingest_depth
+        row['active_encounters'] = self.encounters_started - self.encounters_finished
+
+        counters = {
+            'messages': self.total_messages,
+            'solved': self.trilateration_success_rate["success"],
+            'failed': self.trilateration_success_rate["failed"],
+            'encounters_started': self.encounters_started,
+            'lost_messages': self.lost_messages
+        }
+        for name, value in counters.items():
+            row[name] = value - self._interval_previous.get(name, 0)
+            self._interval_previous[name] = value
+
+        metrics = dict(response=self.response_time_stats, decision=self.decision_latency_stats, **self.stage_latencies)
+        for name in INTERVAL_METRICS:
+            for field, value in self._interval_summary(name, metrics[name]).items():
+                row[f'{name}_{field}'] = value
+        return row
+
+    def _interval_summary(self, name, metric):
+        """count/avg/p95/p99/max των δειγμάτων μιας μετρικής από την προηγούμενη κλήση."""
+        stats, histogram = metric.session, metric.session_histogram
+        count, total, counts = stats.count, stats.mean * stats.count, histogram.counts.copy()
+        previous = self._interval_previous.get(name)
+        self._interval_previous[name] = (count, total, counts)
+        if previous is not None:
+            count, total, counts = count - previous[0], total - previous[1], counts - previous[2]
+        if count <= 0:
+            return {'count': 0, 'avg': 0, 'p95': 0, 'p99': 0, 'max': 0}
+
+        interval = LogHistogram()
+        interval.counts = counts
+        return {
+            'count': count,
+            'avg': total / count,
+            'p95': interval.percentile(95),
+            'p99': interval.percentile(99),
+            'max': min(interval.percentile(100), stats.max)
+        }
+
+    def close(self):
+        """Γράφει το τελευταίο διάστημα και κλείνει το store (στον τερματισμό)."""
+        if self.store is not None:
+            self.record_interval(force=True)
+            self.store.close()
+    
+    def get_real_time_stats(self):
+        """Επιστρέφει στατιστικά σε πραγματικό χρόνο (O(1) ως προς το πλήθος δειγμάτων)"""
+        current_time = self.clock()
+        session_duration = time.time() - self.session_start
+
+        response = _summarize(self.response_time_stats.session, self.response_time_stats.session_histogram, 2)
+        processing = _summarize(self.stage_latencies['solve'].session, self.stage_latencies['solve'].session_histogram, 3)
+        decision = _summarize(self.decision_latency_stats.session, self.decision_latency_stats.session_histogram, 2)
+        accuracy = _summarize(self.accuracy_stats.session, None, 4)
+
+        window_response = _summarize(*self.response_time_stats.window(current_time), 2)
+        window_decision = _summarize(*self.decision_latency_stats.window(current_time), 2)
+        
+        stats = {
+            'session_info': {
+                'session_id': self.session_id,
+                'duration_seconds': round(session_duration, 2),
+                'start_time': datetime.fromtimestamp(self.session_start).isoformat()
+            },
+            'performance_metrics': {
+                'avg_response_time_ms': response['avg'],
+                'min_response_time_ms': response['min'],
+                'max_response_time_ms': response['max'],
+                'p50_response_time_ms': response['p50'],
+                'p95_response_time_ms': response['p95'],
+                'p99_response_time_ms': response['p99'],
+                'avg_processing_time_ms': processing['avg'],
+                'p99_processing_time_ms': processing['p99'],
+                'avg_report_to_command_ms': decision['avg'],
+                'max_report_to_command_ms': decision['max'],
+                'p50_report_to_command_ms': decision['p50'],
+                'p95_report_to_command_ms': decision['p95'],
+                'p99_report_to_command_ms': decision['p99']
+            },
+            'window_metrics': {
+                'window_seconds': self.response_time_stats.window_seconds,
+                'response_samples': window_response['count'],
+                'avg_response_time_ms': window_response['avg'],
+                'p95_response_time_ms': window_response['p95'],
+                'p99_response_time_ms': window_response['p99'],
+                'avg_report_to_command_ms': window_decision['avg'],
+                'p95_report_to_command_ms': window_decision['p95'],
+                'p99_report_to_command_ms': window_decision['p99']
+            },
+            'stage_latency_ms': {
+                stage: {
+                    key: value for key, value in _summarize(metric.session, metric.session_histogram, 3).items()
+                    if key in ('count', 'avg', 'p50', 'p95', 'p99', 'max')
+                }
+                for stage, metric in self.stage_latencies.items()
+            },
+            'accuracy_metrics': {
+                'avg_positioning_accuracy_m': accuracy['avg'],
+                'min_accuracy_m': accuracy['min'],
+                'max_accuracy_m': accuracy['max'],
+                'std_accuracy_m': accuracy['std']
+            },
+            'system_metrics': {
+                'trilateration_success_rate': round(
+                    self.trilateration_success_rate["success"] / 
+                    max(1, sum(self.trilateration_success_rate.values())) * 100, 2
+                ),
+                'total_messages': self.total_messages,
+                'active_tags': len(self.tag_activity),
+                'proximity_events_count': self.encounters_started,
+                'active_encounters': self.encounters_started - self.encounters_finished,
+                'avg_encounter_seconds': round(self.encounter_durations.mean, 2),
+                'max_encounter_seconds': round(self.encounter_durations.max, 2) if self.encounter_durations.count else 0,
+                'lost_messages': self.lost_messages,
+                'out_of_order_messages': self.out_of_order_messages,
+                'dropped_by_policy': self.ingest_counters.get('dropped', 0) + self.ingest_counters.get('coalesced', 0),
+                'cold_start_ms': round(self.cold_start_ms, 2) if self.cold_start_ms is not None else None,
+                'ingest': dict(self.ingest_counters,
+                               avg_depth=round(self.ingest_depth.session.mean, 1),
+                               max_drained_depth=self.ingest_depth.session.max if self.ingest_depth.session.count else 0)
+            }
+        }
+        return stats
+    
+    def save_summary(self):
+        """Γράφει τη σύνοψη του session σε JSON (τα αναλυτικά δεδομένα είναι στο metrics store)"""
+        summary = {
+            'session_info': {
+                'session_id': self.session_id,
+                'start_time': datetime.fromtimestamp(self.session_start).isoformat(),
+                'end_time': datetime.now().isoformat(),
+                'duration_seconds': time.time() - self.session_start
+            },
+            'statistics': self.get_real_time_stats(),
+            'metrics_store': self.store.stats() if self.store is not None else None,
+            'tag_index': self.tag_names
+        }
+
+        # Αντικατάσταση μέσω προσωρινού αρχείου ώστε ο viewer να μη βλέπει ποτέ μισό JSON
+        temporary = f"{self.log_file}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(temporary, self.log_file)
+
+    def save_detailed_log(self):
+        """Αποθηκεύει την τελική σύνοψη σε JSON"""
+        self.save_summary()
+        print(f" Statistics saved to {self.log_file}")
+    
+    def print_summary(self):
+        """Εκτυπώνει σύνοψη στατιστικών"""
+        stats = self.get_real_time_stats()
+        
+        print("\n" + "="*60)
+        print(" RTLS SYSTEM STATISTICS SUMMARY")
+        print("="*60)
+        print(f"Session ID: {stats['session_info']['session_id']}")
+        print(f"Duration: {stats['session_info']['duration_seconds']:.1f} seconds")
+        
+        print(f"\n PERFORMANCE METRICS:")
+        print(f"  Average Response Time: {stats['performance_metrics']['avg_response_time_ms']:.2f} ms "
+              f"(p95 {stats['performance_metrics']['p95_response_time_ms']:.2f} ms, "
+              f"p99 {stats['performance_metrics']['p99_response_time_ms']:.2f} ms)")
+        print(f"  Processing Time: {stats['performance_metrics']['avg_processing_time_ms']:.2f} ms")
+        for stage, latency in stats['stage_latency_ms'].items():
+            if latency['count']:
+                print(f"    {stage:<15} avg {latency['avg']:8.3f}  p95 {latency['p95']:8.3f}  "
+                      f"p99 {latency['p99']:8.3f}  max {latency['max']:8.3f} ms")
+        print(f"  Report → Command Latency: {stats['performance_metrics']['avg_report_to_command_ms']:.2f} ms "
+              f"(p99 {stats['performance_metrics']['p99_report_to_command_ms']:.2f} ms, "
+              f"max {stats['performance_metrics']['max_report_to_command_ms']:.2f} ms)")
+        
+        print(f"\n ACCURACY METRICS:")
+        print(f"  Average Positioning Accuracy: {stats['accuracy_metrics']['avg_positioning_accuracy_m']:.4f} m")
+        print(f"  Standard Deviation: {stats['accuracy_metrics']['std_accuracy_m']:.4f} m")
+        
+        print(f"\n SYSTEM METRICS:")
+        print(f"  Trilateration Success Rate: {stats['system_metrics']['trilateration_success_rate']:.1f}%")
+        print(f"  Total Messages Processed: {stats['system_metrics']['total_messages']}")
+        print(f"  Lost Messages (sequence gaps on the wire): {stats['system_metrics']['lost_messages']}")
+        print(f"  Dropped by Ingest Policy: {stats['system_metrics']['dropped_by_policy']}")
+        print(f"  Active Tags: {stats['system_metrics']['active_tags']}")
+        print(f"  Proximity Encounters: {stats['system_metrics']['proximity_events_count']} "
+              f"({stats['system_metrics']['active_encounters']} active, "
+              f"avg {stats['system_metrics']['avg_encounter_seconds']:.1f} s, "
+              f"max {stats['system_metrics']['max_encounter_seconds']:.1f} s)")
+        if stats['system_metrics']['cold_start_ms'] is not None:
+            print(f"  Cold Start to First Message: {stats['system_metrics']['cold_start_ms']:.0f} ms")
+        ingest = stats['system_metrics']['ingest']
+        if ingest.get('enqueued'):
+            print(f"  Ingest Queue ({ingest['policy']}): {ingest['enqueued']} received, "
+                  f"{ingest['coalesced']} coalesced, {ingest['dropped']} dropped, "
+                  f"depth avg {ingest['avg_depth']:.0f} / max {ingest['max_depth']} of {ingest['capacity']}")
+        print("="*60)
+
@@ -0,0 +1,181 @@
+import math
+import numpy as np
+
+
+class RunningStats:
+    """Online mean/variance (Welford), min και max σε O(1) ανά δείγμα."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, values):
+        """Προσθέτει έναν πίνακα δειγμάτων με μία συγχώνευση."""
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        batch = RunningStats()
+        batch.count = int(values.size)
+        batch.mean = float(values.mean())
+        batch.m2 = float(np.sum((values - batch.mean) ** 2))
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        self.merge(batch)
+
+    def merge(self, other):
+        """Συνδυάζει τα δείγματα ενός άλλου RunningStats (Chan et al.)."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        """Τυπική απόκλιση πληθυσμού (όπως το np.std)."""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+class LogHistogram:
+    """Ιστόγραμμα με λογαριθμικά buckets για percentiles (p50/p95/p99).
+
+    Το σχετικό σφάλμα ενός percentile είναι περίπου το μισό πλάτος ενός
+    bucket (~3% με 40 buckets ανά δεκάδα). Τιμές <= min_value μετρούν ως 0.
+    """
+
+    def __init__(self, min_value=1e-3, max_value=1e6, buckets_per_decade=40):
+        self.min_value = min_value
+        self.buckets_per_decade = buckets_per_decade
+        self.num_buckets = int(math.ceil(math.log10(max_value / min_value) * buckets_per_decade)) + 1
+        self.counts = np.zeros(self.num_buckets + 1, dtype=np.int64)
+        # counts[0]: τιμές <= min_value, counts[i]: [min*g^(i-1), min*g^i)
+        self._scale = buckets_per_decade / math.log(10)
+
+    def reset(self):
+        self.counts[:] = 0
+
+    def add(self, value):
+        if value <= self.min_value:
+            self.counts[0] += 1
+            return
+        bucket = int(math.log(value / self.min_value) * self._scale) + 1
+        self.counts[min(bucket, self.num_buckets)] += 1
+
+    def add_many(self, values):
+        values = np.asarray(values, dtype=float)
+        buckets = np.zeros(values.shape, dtype=np.intp)
+        above = values > self.min_value
+        buckets[above] = (np.log(values[above] / self.min_value) * self._scale).astype(np.intp) + 1
+        np.minimum(buckets, self.num_buckets, out=buckets)
+        self.counts += np.bincount(buckets, minlength=len(self.counts))
+
+    def merge(self, other):
+        self.counts += other.counts
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def _bucket_value(self, bucket):
+        if bucket == 0:
+            return 0.0
+        # Γεωμετρικό μέσο του bucket
+        return self.min_value * 10 ** ((bucket - 0.5) / self.buckets_per_decade)
+
+    def percentile(self, q):
+        """Εκτίμηση του q-οστού percentile (0-100)."""
+        cumulative = np.cumsum(self.counts)
+        total = cumulative[-1]
+        if total == 0:
+            return 0.0
+        bucket = int(np.searchsorted(cumulative, q / 100.0 * total, side='left'))
+        return self._bucket_value(bucket)
+
+    def percentiles(self, qs=(50, 95, 99)):
+        return {q: self.percentile(q) for q in qs}
+
+
+class StreamingMetric:
+    """Session-wide και sliding-window aggregates για μία μετρική.
+
+    Το παράθυρο χωρίζεται σε slots σταθερής διάρκειας· κάθε δείγμα ενημερώνει
+    μόνο το τρέχον slot και η ανάγνωση συνδυάζει τα slots του παραθύρου, οπότε
+    το κόστος δεν εξαρτάται από το πλήθος των δειγμάτων.
+    """
+
+    def __init__(self, window_seconds=60.0, slots=12, histogram=True):
+        self.slot_seconds = window_seconds / slots
+        self.window_seconds = window_seconds
+        self.session = RunningStats()
+        self.session_histogram = LogHistogram() if histogram else None
+        self._slot_epochs = [-1] * slots
+        self._slot_stats = [RunningStats() for _ in range(slots)]
+        self._slot_histograms = [LogHistogram() for _ in range(slots)] if histogram else None
+
+    def _current_slot(self, now):
+        epoch = int(now // self.slot_seconds)
+        slot = epoch % len(self._slot_epochs)
+        if self._slot_epochs[slot] != epoch:
+            self._slot_epochs[slot] = epoch
+            self._slot_stats[slot].reset()
+            if self._slot_histograms:
+                self._slot_histograms[slot].reset()
+        return slot
+
+    def add(self, value, now):
+        self.session.add(value)
+        slot = self._current_slot(now)
+        self._slot_stats[slot].add(value)
+        if self.session_histogram is not None:
+            self.session_histogram.add(value)
+            self._slot_histograms[slot].add(value)
+
+    def add_many(self, values, now):
+        """Όπως η add() για έναν πίνακα δειγμάτων με την ίδια χρονική στιγμή."""
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        self.session.add_many(values)
+        slot = self._current_slot(now)
+        self._slot_stats[slot].add_many(values)
+        if self.session_histogram is not None:
+            self.session_histogram.add_many(values)
+            self._slot_histograms[slot].add_many(values)
+
+    def window(self, now):
+        """Επιστρέφει (RunningStats, LogHistogram ή None) για το τελευταίο παράθυρο."""
+        current = int(now // self.slot_seconds)
+        stats = RunningStats()
+        histogram = LogHistogram() if self.session_histogram is not None else None
+        for slot, epoch in enumerate(self._slot_epochs):
+            if current - len(self._slot_epochs) < epoch <= current:
+                stats.merge(self._slot_stats[slot])
+                if histogram is not None:
+                    histogram.merge(self._slot_histograms[slot])
+        return stats, histogram
@@ -1,124 +1,389 @@
-import paho.mqtt.client as mqtt
-import json
-import time
-import numpy as np
-import random
-
-# --- Διαμόρφωση Προσομοιωτή ---
-MQTT_BROKER_HOST = "localhost"
-MQTT_BROKER_PORT = 1883
-MQTT_DATA_TOPIC = "uwb/anchor_data"
-
-ANCHOR_POSITIONS = {
-    "anchor1": np.array([0.0, 0.0]),
-    "anchor2": np.array([5.0, 0.0]),
-    "anchor3": np.array([0.0, 7.0]),
-    "anchor4": np.array([5.0, 7.0])
-}
-
-NUM_SIMULATED_TAGS = 3
-SIMULATED_TAG_IDS = [f"sim_tag{i+1}" for i in range(NUM_SIMULATED_TAGS)]
-
-MIN_X = min(p[0] for p in ANCHOR_POSITIONS.values()) - 1
-MAX_X = max(p[0] for p in ANCHOR_POSITIONS.values()) + 1
-MIN_Y = min(p[1] for p in ANCHOR_POSITIONS.values()) - 1
-MAX_Y = max(p[1] for p in ANCHOR_POSITIONS.values()) + 1
-
-UPDATE_INTERVAL_SECONDS = 0.5
-MAX_STEP_SIZE = 0.3
-NOISE_LEVEL = 0.05
-
-# --- Αρχικές θέσεις και στόχοι ---
-simulated_tag_current_positions = {
-    tag_id: np.array([random.uniform(MIN_X, MAX_X), random.uniform(MIN_Y, MAX_Y)])
-    for tag_id in SIMULATED_TAG_IDS
-}
-
-simulated_tag_targets = {
-    tag_id: np.array([random.uniform(MIN_X, MAX_X), random.uniform(MIN_Y, MAX_Y)])
-    for tag_id in SIMULATED_TAG_IDS
-}
-
-
-def update_tag_positions_and_targets():
-    """Ενημερώνει τις θέσεις των προσομοιωμένων tags προς τους στόχους τους."""
-    global simulated_tag_current_positions, simulated_tag_targets
-
-    for tag_id in SIMULATED_TAG_IDS:
-        current_pos = simulated_tag_current_positions[tag_id]
-        target_pos = simulated_tag_targets[tag_id]
-        direction = target_pos - current_pos
-        distance_to_target = np.linalg.norm(direction)
-
-        if distance_to_target < MAX_STEP_SIZE * 2:
-            simulated_tag_targets[tag_id] = np.array([random.uniform(MIN_X, MAX_X), random.uniform(MIN_Y, MAX_Y)])
-        else:
-            move_vector = (direction / distance_to_target) * MAX_STEP_SIZE
-            new_pos = current_pos + move_vector
-            new_pos[0] = np.clip(new_pos[0], MIN_X, MAX_X)
-            new_pos[1] = np.clip(new_pos[1], MIN_Y, MAX_Y)
-            simulated_tag_current_positions[tag_id] = new_pos
-
-def calculate_distance(pos1, pos2):
-    """Υπολογίζει την Ευκλείδεια απόσταση μεταξύ δύο σημείων."""
-    return np.linalg.norm(pos1 - pos2)
-
-def on_connect_simulator(client, userdata, flags, rc):
-    if rc == 0:
-        print(f"Tag Simulator: Connected to MQTT Broker: {MQTT_BROKER_HOST}")
-    else:
-        print(f"Tag Simulator: Failed to connect, return code {rc}\n")
-
-# --- Κύριο Πρόγραμμα Προσομοιωτή ---
-try:
-    # Δημιουργία MQTT client με compatibility
-    try:
-        sim_client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
-    except AttributeError:
-        sim_client = mqtt.Client()
-
-    sim_client.on_connect = on_connect_simulator
-
-    try:
-        sim_client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT, 60)
-    except Exception as e:
-        print(f"Tag Simulator: Could not connect to MQTT Broker: {e}")
-        exit(1)
-
-    sim_client.loop_start()
-
-    print("Tag Simulator: Starting simulation...")
-    print(f"Simulating {NUM_SIMULATED_TAGS} tags: {', '.join(SIMULATED_TAG_IDS)}")
-    print(f"Publishing data every {UPDATE_INTERVAL_SECONDS} seconds.")
-    print(f"Simulation area X: [{MIN_X:.1f}, {MAX_X:.1f}], Y: [{MIN_Y:.1f}, {MAX_Y:.1f}]")
-
-    try:
-        while True:
-            update_tag_positions_and_targets()
-
-            for tag_id in SIMULATED_TAG_IDS:
-                tag_pos = simulated_tag_current_positions[tag_id]
-
-                for anchor_id, anchor_pos in ANCHOR_POSITIONS.items():
-                    dist_no_noise = calculate_distance(tag_pos, anchor_pos)
-                    simulated_distance = dist_no_noise + random.uniform(-NOISE_LEVEL, NOISE_LEVEL)
-                    simulated_distance = max(0, simulated_distance)
-
-                    payload = {
-                        "anchor_id": anchor_id,
-                        "tag_id": tag_id,
-                        "distance": round(simulated_distance, 2)
-                    }
-
-                    sim_client.publish(MQTT_DATA_TOPIC, json.dumps(payload))
-
-            time.sleep(UPDATE_INTERVAL_SECONDS)
-
-    except KeyboardInterrupt:
-        print("\nTag Simulator: Stopping simulation...")
-
-finally:
-    sim_client.loop_stop()
-    sim_client.disconnect()
-    print("Tag Simulator: Disconnected and stopped.")
-
+import paho.mqtt.client as mqtt
+import json
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import random
+from wire_format import encode_batch
+from anchor_registry import load_site
+
+# --- Διαμόρφωση Προσομοιωτή ---
+MQTT_BROKER_HOST = "localhost"
+MQTT_BROKER_PORT = 1883
+MQTT_DATA_TOPIC = "uwb/anchor_data"
+MQTT_BATCH_TOPIC = "uwb/anchor_data/batch"
+
+ANCHOR_POSITIONS = {
+    "anchor1": np.array([0.0, 0.0]),
+    "anchor2": np.array([5.0, 0.0]),
+    "anchor3": np.array([0.0, 7.0]),
+    "anchor4": np.array([5.0, 7.0])
+}
+
+NUM_SIMULATED_TAGS = 3
+SIMULATED_TAG_IDS = [f"sim_tag{i+1}" for i in range(NUM_SIMULATED_TAGS)]
+
+MIN_X = min(p[0] for p in ANCHOR_POSITIONS.values()) - 1
+MAX_X = max(p[0] for p in ANCHOR_POSITIONS.values()) + 1
+MIN_Y = min(p[1] for p in ANCHOR_POSITIONS.values()) - 1
+MAX_Y = max(p[1] for p in ANCHOR_POSITIONS.values()) + 1
+
+UPDATE_INTERVAL_SECONDS = 0.5
+# Ένα tag ακούει μόνο τα anchors μέχρι αυτή την απόσταση (μεγάλα sites)
+RADIO_RANGE_METERS = 15.0
+MAX_STEP_SIZE = 0.3
+NOISE_LEVEL = 0.05
+
+# --- Load generator ---
+LOAD_TAG_PREFIX = "load_tag"
+LOAD_PUBLISH_CHUNK = 200
+LOAD_MAX_BURST_SECONDS = 0.005
+LOAD_REPORT_INTERVAL_SECONDS = 1.0
+
+# --- Αρχικές θέσεις και στόχοι ---
+simulated_tag_current_positions = {
+    tag_id: np.array([random.uniform(MIN_X, MAX_X), random.uniform(MIN_Y, MAX_Y)])
+    for tag_id in SIMULATED_TAG_IDS
+}
+
+simulated_tag_targets = {
+    tag_id: np.array([random.uniform(MIN_X, MAX_X), random.uniform(MIN_Y, MAX_Y)])
+    for tag_id in SIMULATED_TAG_IDS
+}
+
+
+def use_site(path):
+    """Αντικαθιστά τα ANCHOR_POSITIONS με τα anchors ενός site file και προσαρμόζει την περιοχή κίνησης."""
+    global ANCHOR_POSITIONS, MIN_X, MAX_X, MIN_Y, MAX_Y
+
+    ANCHOR_POSITIONS = load_site(path)
+    min_x, min_y, max_x, max_y = ANCHOR_POSITIONS.bounds()
+    MIN_X, MAX_X, MIN_Y, MAX_Y = min_x - 1, max_x + 1, min_y - 1, max_y + 1
+
+    for tag_id in SIMULATED_TAG_IDS:
+        simulated_tag_current_positions[tag_id] = np.array([random.uniform(MIN_X, MAX_X), random.uniform(MIN_Y, MAX_Y)])
+        simulated_tag_targets[tag_id] = np.array([random.uniform(MIN_X, MAX_X), random.uniform(MIN_Y, MAX_Y)])
+
+def update_tag_positions_and_targets():
+    """Ενημερώνει τις θέσεις των προσομοιωμένων tags προς τους στόχους τους."""
+    global simulated_tag_current_positions, simulated_tag_targets
+
+    for tag_id in SIMULATED_TAG_IDS:
+        current_pos = simulated_tag_current_positions[tag_id]
+        target_pos = simulated_tag_targets[tag_id]
+        direction = target_pos - current_pos
+        distance_to_target = np.linalg.norm(direction)
+
+        if distance_to_target < MAX_STEP_SIZE * 2:
+            simulated_tag_targets[tag_id] = np.array([random.uniform(MIN_X, MAX_X), random.uniform(MIN_Y, MAX_Y)])
+        else:
+            move_vector = (direction / distance_to_target) * MAX_STEP_SIZE
+            new_pos = current_pos + move_vector
+            new_pos[0] = np.clip(new_pos[0], MIN_X, MAX_X)
+            new_pos[1] = np.clip(new_pos[1], MIN_Y, MAX_Y)
+            simulated_tag_current_positions[tag_id] = new_pos
+
+def calculate_distance(pos1, pos2):
+    """Υπολογίζει την Ευκλείδεια απόσταση μεταξύ δύο σημείων."""
+    return np.linalg.norm(pos1 - pos2)
+
+class VectorizedTagFleet:
+    """Προσομοίωση πολλών tags με θέσεις/στόχους σε πίνακες NumPy.
+
+    Η step() κάνει την ίδια κίνηση με την update_tag_positions_and_targets()
+    για όλα τα tags μαζί και η ranges() υπολογίζει όλες τις αποστάσεις
+    tags x anchors (με θόρυβο) με μία πράξη, με NaN για anchors εκτός
+    εμβέλειας. Τα sequence numbers είναι ανά (tag, anchor), όπως τα ελέγχει
+    ο SequenceTracker του server (βλ. next_sequences).
+    """
+
+    def __init__(self, tag_ids, anchor_positions, seed=None):
+        self.tag_ids = list(tag_ids)
+        self.anchor_ids = list(anchor_positions.keys())
+        self.anchor_coords = np.array(list(anchor_positions.values()), dtype=float)
+        self.rng = np.random.default_rng(seed)
+        self.positions = self._random_points(len(self.tag_ids))
+        self.targets = self._random_points(len(self.tag_ids))
+        self.sequences = np.zeros((len(self.tag_ids), len(self.anchor_ids)), dtype=np.uint32)
+
+    def _random_points(self, n):
+        return self.rng.uniform((MIN_X, MIN_Y), (MAX_X, MAX_Y), size=(n, 2))
+
+    def step(self):
+        direction = self.targets - self.positions
+        distance_to_target = np.hypot(direction[:, 0], direction[:, 1])
+
+        # Όσα έφτασαν παίρνουν νέο στόχο, τα υπόλοιπα κινούνται προς τον στόχο τους
+        arrived = distance_to_target < MAX_STEP_SIZE * 2
+        self.targets[arrived] = self._random_points(int(arrived.sum()))
+
+        moving = ~arrived
+        move = direction[moving] / distance_to_target[moving, None] * MAX_STEP_SIZE
+        self.positions[moving] = np.clip(self.positions[moving] + move, (MIN_X, MIN_Y), (MAX_X, MAX_Y))
+
+    def ranges(self):
+        diff = self.positions[:, None, :] - self.anchor_coords[None, :, :]
+        distances = np.sqrt(np.sum(diff**2, axis=-1))
+        out_of_range = distances > RADIO_RANGE_METERS
+        distances += self.rng.uniform(-NOISE_LEVEL, NOISE_LEVEL, size=distances.shape)
+        distances = np.round(np.maximum(distances, 0), 2)
+        distances[out_of_range] = np.nan
+        return distances
+
+    def next_sequences(self, tag_index, anchor_index):
+        """Το επόμενο seq κάθε (tag, anchor) που δημοσιεύεται· τα anchors εκτός εμβέλειας δεν προχωρούν."""
+        self.sequences[tag_index, anchor_index] += 1
+        return self.sequences[tag_index, anchor_index]
+
+def create_client():
+    """Δημιουργία MQTT client με compatibility"""
+    try:
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
+    except AttributeError:
+        return mqtt.Client()
+
+def on_connect_simulator(client, userdata, flags, rc):
+    if rc == 0:
+        print(f"Tag Simulator: Connected to MQTT Broker: {MQTT_BROKER_HOST}")
+    else:
+        print(f"Tag Simulator: Failed to connect, return code {rc}\n")
+
+# --- Κύριο Πρόγραμμα Προσομοιωτή ---
+def run_simulation(binary=False):
+    """Η κλασική προσομοίωση λίγων tags σε πραγματικό χρόνο.
+
+    Με binary=True κάθε κύκλος στέλνεται ως ένα binary batch αντί για ένα
+    JSON μήνυμα ανά απόσταση.
+    """
+    try:
+        sim_client = create_client()
+        sim_client.on_connect = on_connect_simulator
+
+        try:
+            sim_client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT, 60)
+        except Exception as e:
+            print(f"Tag Simulator: Could not connect to MQTT Broker: {e}")
+            exit(1)
+
+        sim_client.loop_start()
+
+        print("Tag Simulator: Starting simulation...")
+        print(f"Simulating {NUM_SIMULATED_TAGS} tags: {', '.join(SIMULATED_TAG_IDS)}")
+        print(f"Publishing data every {UPDATE_INTERVAL_SECONDS} seconds.")
+        print(f"Simulation area X: [{MIN_X:.1f}, {MAX_X:.1f}], Y: [{MIN_Y:.1f}, {MAX_Y:.1f}]")
+
+        # Sequence number ανά (tag, anchor), μόνο για τις αποστάσεις που δημοσιεύονται
+        sequences = {}
+        anchor_ids = list(ANCHOR_POSITIONS.keys())
+
+        try:
+            while True:
+                update_tag_positions_and_targets()
+
+                if binary:
+                    reports = [(t, a, calculate_distance(simulated_tag_current_positions[tag_id], anchor_pos))
+                               for t, tag_id in enumerate(SIMULATED_TAG_IDS)
+                               for a, anchor_pos in enumerate(ANCHOR_POSITIONS.values())]
+                    reports = [(t, a, max(0, distance + random.uniform(-NOISE_LEVEL, NOISE_LEVEL)))
+                               for t, a, distance in reports if distance <= RADIO_RANGE_METERS]
+                    if reports:
+                        tag_index, anchor_index, distances = (np.array(column) for column in zip(*reports))
+                        seq = []
+                        for t, a, _ in reports:
+                            seq.append(sequences.get((t, a), 0) + 1)
+                            sequences[t, a] = seq[-1]
+                        payload = encode_batch(SIMULATED_TAG_IDS, anchor_ids, tag_index, anchor_index,
+                                               np.round(distances, 2), seq, time.time())
+                        sim_client.publish(MQTT_BATCH_TOPIC, payload)
+                    time.sleep(UPDATE_INTERVAL_SECONDS)
+                    continue
+
+                for tag_id in SIMULATED_TAG_IDS:
+                    tag_pos = simulated_tag_current_positions[tag_id]
+
+                    for anchor_id, anchor_pos in ANCHOR_POSITIONS.items():
+                        dist_no_noise = calculate_distance(tag_pos, anchor_pos)
+                        if dist_no_noise > RADIO_RANGE_METERS:
+                            continue
+                        simulated_distance = dist_no_noise + random.uniform(-NOISE_LEVEL, NOISE_LEVEL)
+                        simulated_distance = max(0, simulated_distance)
+                        sequence = sequences[tag_id, anchor_id] = sequences.get((tag_id, anchor_id), 0) + 1
+
+                        payload = {
+                            "anchor_id": anchor_id,
+                            "tag_id": tag_id,
+                            "distance": round(simulated_distance, 2),
+                            "seq": sequence,
+                            "sent_at": time.time()
+                        }
+
+                        sim_client.publish(MQTT_DATA_TOPIC, json.dumps(payload))
+
+                time.sleep(UPDATE_INTERVAL_SECONDS)
+
+        except KeyboardInterrupt:
+            print("\nTag Simulator: Stopping simulation...")
+
+    finally:
+        sim_client.loop_stop()
+        sim_client.disconnect()
+        print("Tag Simulator: Disconnected and stopped.")
+
+# --- Load generator ---
+def load_publisher(worker_index, num_workers, num_tags, rate, duration, dry_run, sent_counters, publish_seconds,
+                   binary=False, site=None):
+    """Ένας publisher του load generator: προσομοιώνει το δικό του μέρος των tags
+    και δημοσιεύει με σταθερό ρυθμό rate αναφορές/δευτερόλεπτο (με binary=True
+    κάθε κομμάτι των chunk_size αναφορών είναι ένα binary batch)."""
+    if site:
+        use_site(site)
+    tag_ids = [f"{LOAD_TAG_PREFIX}{i+1}" for i in range(worker_index, num_tags, num_workers)]
+    fleet = VectorizedTagFleet(tag_ids, ANCHOR_POSITIONS, seed=worker_index)
+    anchor_ids = fleet.anchor_ids
+
+    client = None
+    if not dry_run:
+        client = create_client()
+        try:
+            client.connect(MQTT_BROKER_HOST, MQTT_BROKER_PORT, 60)
+        except Exception as e:
+            print(f"Load Generator [{worker_index}]: Could not connect to MQTT Broker: {e}")
+            return
+        client.loop_start()
+
+    interval = 1.0 / rate
+    # Μικρά bursts (έως LOAD_MAX_BURST_SECONDS) ώστε ο ρυθμός να είναι ομαλός
+    chunk_size = max(1, min(LOAD_PUBLISH_CHUNK, int(rate * LOAD_MAX_BURST_SECONDS)))
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+    sent = 0
+
+    try:
+        while deadline is None or time.perf_counter() < deadline:
+            fleet.step()
+            ranges = fleet.ranges()
+
+            # Μηνύματα του tick με σειρά tag/anchor (μόνο anchors εντός εμβέλειας), σε κομμάτια των chunk_size
+            tag_index, anchor_index = np.nonzero(~np.isnan(ranges))
+            distances = ranges[tag_index, anchor_index]
+            sequences = fleet.next_sequences(tag_index, anchor_index)
+            if binary:
+                num_messages = len(distances)
+            else:
+                messages = [(tag_ids[t], anchor_ids[a], distance, seq)
+                            for t, a, distance, seq in zip(tag_index.tolist(), anchor_index.tolist(),
+                                                           distances.tolist(), sequences.tolist())]
+                num_messages = len(messages)
+
+            for chunk_start in range(0, num_messages, chunk_size):
+                # Χρονοπρογραμματισμός με απόλυτο χρόνο ώστε να μη συσσωρεύεται drift
+                wait = start + sent * interval - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+
+                sent_at = time.time()
+                if binary:
+                    # Το ID table του batch περιέχει μόνο τα tags και τα anchors του κομματιού
+                    chunk = slice(chunk_start, min(chunk_start + chunk_size, num_messages))
+                    first_tag, last_tag = tag_index[chunk.start], tag_index[chunk.stop - 1]
+                    chunk_anchors, chunk_anchor_index = np.unique(anchor_index[chunk], return_inverse=True)
+                    payload = encode_batch(tag_ids[first_tag:last_tag + 1], [anchor_ids[a] for a in chunk_anchors],
+                                           tag_index[chunk] - first_tag, chunk_anchor_index,
+                                           distances[chunk], sequences[chunk], sent_at)
+                    if client is not None:
+                        client.publish(MQTT_BATCH_TOPIC, payload)
+                    sent += chunk.stop - chunk.start
+                    sent_counters[worker_index] = sent
+                    continue
+
+                for tag_id, anchor_id, distance, seq in messages[chunk_start:chunk_start + chunk_size]:
+                    payload = (f'{{"anchor_id": "{anchor_id}", "tag_id": "{tag_id}", "distance": {distance}, '
+                               f'"seq": {seq}, "sent_at": {sent_at}}}')
+                    if client is not None:
+                        client.publish(MQTT_DATA_TOPIC, payload)
+                    sent += 1
+                sent_counters[worker_index] = sent
+
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sent_counters[worker_index] = sent
+        publish_seconds[worker_index] = time.perf_counter() - start
+        if client is not None:
+            client.loop_stop()
+            client.disconnect()
+
+def run_load_generator(num_tags, rate, num_publishers, duration, dry_run, binary=False, site=None):
+    """Τρέχει num_publishers διεργασίες που μαζί στοχεύουν σε rate μηνύματα/δευτερόλεπτο."""
+    print(f"Load Generator: {num_tags} tags x {len(ANCHOR_POSITIONS)} anchors, "
+          f"target {rate:.0f} msg/s over {num_publishers} publisher(s)"
+          + (" [binary]" if binary else "") + (" [dry run]" if dry_run else ""))
+
+    sent_counters = multiprocessing.Array('q', num_publishers, lock=False)
+    publish_seconds = multiprocessing.Array('d', num_publishers, lock=False)
+    workers = [
+        multiprocessing.Process(
+            target=load_publisher,
+            args=(i, num_publishers, num_tags, rate / num_publishers, duration, dry_run, sent_counters, publish_seconds,
+                  binary, site),
+            daemon=True)
+        for i in range(num_publishers)
+    ]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+
+    last_total, last_report = 0, start
+    try:
+        while any(worker.is_alive() for worker in workers):
+            workers[0].join(timeout=LOAD_REPORT_INTERVAL_SECONDS)
+            if not any(worker.is_alive() for worker in workers):
+                break
+            now = time.perf_counter()
+            total = sum(sent_counters)
+            print(f"Load Generator: {(total - last_total) / (now - last_report):10.0f} msg/s "
+                  f"(target {rate:.0f}), total {total}")
+            last_total, last_report = total, now
+    except KeyboardInterrupt:
+        print("\nLoad Generator: Stopping...")
+    finally:
+        for worker in workers:
+            worker.join(timeout=5)
+
+    # Ρυθμός με βάση το χρόνο δημοσίευσης (χωρίς εκκίνηση/τερματισμό διεργασιών)
+    elapsed = max(max(publish_seconds), 1e-9)
+    total = sum(sent_counters)
+    print(f"Load Generator: sent {total} messages in {elapsed:.1f} s, "
+          f"achieved {total / elapsed:.0f} msg/s ({total / elapsed / rate * 100:.1f}% of target)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UWB tag simulator / load generator")
+    parser.add_argument("--load", action="store_true", help="load generator αντί για την κλασική προσομοίωση")
+    parser.add_argument("--tags", type=int, default=10000, help="πλήθος tags (load mode)")
+    parser.add_argument("--rate", type=float, default=20000, help="συνολικός ρυθμός μηνυμάτων/s (load mode)")
+    parser.add_argument("--publishers", type=int, default=1, help="πλήθος διεργασιών publisher (load mode)")
+    parser.add_argument("--duration", type=float, default=0, help="διάρκεια σε s, 0 = μέχρι Ctrl+C (load mode)")
+    parser.add_argument("--dry-run", action="store_true", help="χωρίς δημοσίευση, μόνο παραγωγή μηνυμάτων")
+    parser.add_argument("--binary", action="store_true",
+                        help=f"binary batches στο {MQTT_BATCH_TOPIC} αντί για JSON ανά απόσταση")
+    parser.add_argument("--interval", type=float, default=UPDATE_INTERVAL_SECONDS,
+                        help="δευτερόλεπτα ανάμεσα στις αναφορές κάθε tag (κλασική προσομοίωση, ίδια ταχύτητα tags)")
+    parser.add_argument("--site", metavar="FILE",
+                        help=f"site file (JSON) με τα anchors· κάθε tag ακούει όσα είναι έως {RADIO_RANGE_METERS:.0f} m")
+    args = parser.parse_args()
+
+    if args.site:
+        use_site(args.site)
+
+    # Το βήμα ανά κύκλο κλιμακώνεται ώστε η ταχύτητα των tags να μην αλλάζει
+    MAX_STEP_SIZE *= args.interval / UPDATE_INTERVAL_SECONDS
+    UPDATE_INTERVAL_SECONDS = args.interval
+
+    if args.load:
+        run_load_generator(args.tags, args.rate, args.publishers, args.duration, args.dry_run, args.binary, args.site)
+    else:
+        run_simulation(args.binary)
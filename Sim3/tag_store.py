@@ -0,0 +1,189 @@
+import numpy as np
+
+# Θέσεις αποστάσεων ανά tag: ένα tag ακούει λίγα anchors ακόμη και σε site με
+# εκατοντάδες, οπότε η μνήμη και η επιλογή anchors δεν εξαρτώνται από το site
+RANGE_SLOTS = 16
+
+
+class TagStateStore:
+    """Κατάσταση των tags σε προδεσμευμένους πίνακες NumPy, μία γραμμή ανά tag.
+
+    Κάθε γραμμή έχει range_slots θέσεις (anchor, απόσταση, timestamp) για τα
+    anchors που άκουσε το tag (range_anchors = -1 στις κενές), καθώς και
+    στήλες θέσης, τελευταίας ενημέρωσης θέσης και κατάστασης κινητήρα.
+    Όταν γεμίσουν οι θέσεις, μια νέα απόσταση αντικαθιστά τη μεγαλύτερη αν
+    είναι μικρότερη από αυτήν, αλλιώς απορρίπτεται (dropped_ranges).
+    Οι πίνακες μεγαλώνουν γεωμετρικά (διπλασιασμός) όταν γεμίσουν.
+    Οι τιμές που λείπουν είναι NaN.
+    """
+
+    def __init__(self, anchor_ids, initial_capacity=64, range_slots=RANGE_SLOTS):
+        self.anchor_ids = list(anchor_ids)
+        self.anchor_index = {anchor_id: i for i, anchor_id in enumerate(self.anchor_ids)}
+        self.range_slots = max(1, min(len(self.anchor_ids), range_slots))
+        self.tag_ids = []
+        self.tag_index = {}
+        self.count = 0
+        self.dropped_ranges = 0
+        self._allocate(max(1, initial_capacity))
+
+    def _arrays(self):
+        return (self.range_anchors, self.ranges, self.range_timestamps, self.positions, self.position_timestamps,
+                self.motor_on)
+
+    def _allocate(self, capacity):
+        slots = self.range_slots
+        self.capacity = capacity
+        self.range_anchors = np.full((capacity, slots), -1, dtype=np.int32)
+        self.ranges = np.full((capacity, slots), np.nan, dtype=np.float32)
+        self.range_timestamps = np.full((capacity, slots), np.nan)
+        self.positions = np.full((capacity, 2), np.nan)
+        self.position_timestamps = np.full(capacity, np.nan)
+        self.motor_on = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        old = self._arrays()
+        self._allocate(self.capacity * 2)
+        for old_array, new_array in zip(old, self._arrays()):
+            new_array[:self.count] = old_array[:self.count]
+
+    def row_for(self, tag_id):
+        """Επιστρέφει τη γραμμή του tag, δημιουργώντας τη αν δεν υπάρχει."""
+        row = self.tag_index.get(tag_id)
+        if row is None:
+            if self.count == self.capacity:
+                self._grow()
+            row = self.count
+            self.count += 1
+            self.tag_ids.append(tag_id)
+            self.tag_index[tag_id] = row
+        return row
+
+    def set_range(self, tag_id, anchor_id, distance, timestamp):
+        """Αποθηκεύει μια απόσταση· επιστρέφει τη γραμμή του tag ή None για άγνωστο anchor."""
+        col = self.anchor_index.get(anchor_id)
+        if col is None:
+            return None
+        row = self.row_for(tag_id)
+        anchors = self.range_anchors[row]
+        slots = np.flatnonzero(anchors == col)
+        if len(slots) == 0:
+            slots = np.flatnonzero(anchors < 0)
+        if len(slots):
+            slot = slots[0]
+        else:
+            # Γεμάτη γραμμή: η νέα απόσταση παίρνει τη θέση της μεγαλύτερης, αν είναι μικρότερη
+            slot = self.ranges[row].argmax()
+            if not distance < self.ranges[row, slot]:
+                self.dropped_ranges += 1
+                return row
+        anchors[slot] = col
+        self.ranges[row, slot] = distance
+        self.range_timestamps[row, slot] = timestamp
+        return row
+
+    def set_ranges(self, tag_ids, anchor_ids, tag_index, anchor_index, distances, timestamp):
+        """Αποθηκεύει πολλές αποστάσεις μαζί (π.χ. ένα binary batch).
+
+        tag_index/anchor_index είναι δείκτες στις λίστες tag_ids/anchor_ids·
+        records για άγνωστους anchors αγνοούνται. Επιστρέφει τις γραμμές που
+        ενημερώθηκαν (χωρίς διπλότυπα).
+        """
+        cols_by_anchor = np.array([self.anchor_index.get(a, -1) for a in anchor_ids], dtype=np.intp)
+        cols = cols_by_anchor[anchor_index]
+        known = cols >= 0
+        if not known.all():
+            tag_index, cols, distances = tag_index[known], cols[known], distances[known]
+
+        used_tags = np.unique(tag_index)
+        rows_by_tag = np.zeros(len(tag_ids), dtype=np.intp)
+        rows_by_tag[used_tags] = [self.row_for(tag_ids[t]) for t in used_tags.tolist()]
+
+        self._store_ranges(rows_by_tag[tag_index], cols, distances, timestamp)
+        return rows_by_tag[used_tags]
+
+    def _store_ranges(self, rows, cols, distances, timestamp):
+        """Γράφει τις αποστάσεις (με τη σειρά τους) στις θέσεις των γραμμών.
+
+        Anchors που έχουν ήδη θέση ενημερώνονται όλα μαζί. Τα υπόλοιπα
+        μπαίνουν σε γύρους με το πολύ ένα record ανά γραμμή, ώστε κάθε
+        γύρος να βλέπει τις θέσεις που πήρε ο προηγούμενος.
+        """
+        match = self.range_anchors[rows] == cols[:, None]
+        found = match.any(axis=1)
+        slots = match.argmax(axis=1)
+        self.ranges[rows[found], slots[found]] = distances[found]
+        self.range_timestamps[rows[found], slots[found]] = timestamp
+
+        pending = np.flatnonzero(~found)
+        while len(pending):
+            _, first = np.unique(rows[pending], return_index=True)
+            first.sort()
+            current, pending = pending[first], np.delete(pending, first)
+            row, col, distance = rows[current], cols[current], distances[current]
+
+            anchors = self.range_anchors[row]
+            match = anchors == col[:, None]
+            free = anchors < 0
+            slot = np.where(match.any(axis=1), match.argmax(axis=1),
+                            np.where(free.any(axis=1), free.argmax(axis=1), -1))
+
+            # Γεμάτη γραμμή: η νέα απόσταση παίρνει τη θέση της μεγαλύτερης, αν είναι μικρότερη
+            full = np.flatnonzero(slot < 0)
+            if len(full):
+                farthest = self.ranges[row[full]].argmax(axis=1)
+                closer = distance[full] < self.ranges[row[full], farthest]
+                slot[full[closer]] = farthest[closer]
+                self.dropped_ranges += int(np.count_nonzero(~closer))
+
+            stored = slot >= 0
+            row, slot = row[stored], slot[stored]
+            self.range_anchors[row, slot] = col[stored]
+            self.ranges[row, slot] = distance[stored]
+            self.range_timestamps[row, slot] = timestamp
+
+    def range_counts(self, rows):
+        """Πλήθος anchors με γνωστή απόσταση για κάθε μία από τις γραμμές."""
+        return np.count_nonzero(self.range_anchors[rows] >= 0, axis=1)
+
+    def set_positions(self, rows, positions, timestamp):
+        """Γράφει τις θέσεις για πολλές γραμμές μαζί."""
+        self.positions[rows] = positions
+        self.position_timestamps[rows] = timestamp
+
+    def expire_ranges(self, rows, cutoff):
+        """Σβήνει τις αποστάσεις των rows με timestamp <= cutoff· επιστρέφει πόσες έληξαν."""
+        stale_rows, stale_slots = np.nonzero(self.range_timestamps[rows] <= cutoff)
+        stale_rows = rows[stale_rows]
+        self.range_anchors[stale_rows, stale_slots] = -1
+        self.ranges[stale_rows, stale_slots] = np.nan
+        self.range_timestamps[stale_rows, stale_slots] = np.nan
+        return len(stale_rows)
+
+    def oldest_range_timestamps(self, rows):
+        """Το παλαιότερο timestamp απόστασης κάθε γραμμής (NaN αν δεν έχει καμία)."""
+        return np.fmin.reduce(self.range_timestamps[rows], axis=1)
+
+    def expire_positions(self, rows, cutoff):
+        """Σβήνει τις θέσεις των rows με timestamp <= cutoff· επιστρέφει τις γραμμές που έληξαν."""
+        stale_rows = rows[self.position_timestamps[rows] <= cutoff]
+        self.positions[stale_rows] = np.nan
+        self.position_timestamps[stale_rows] = np.nan
+        return stale_rows
+
+    def positioned_rows(self):
+        """Γραμμές που έχουν υπολογισμένη θέση."""
+        return np.flatnonzero(~np.isnan(self.position_timestamps[:self.count]))
+
+    def memory_stats(self):
+        """Μνήμη των πινάκων συνολικά και ανά tag."""
+        arrays = self._arrays()
+        bytes_per_row = sum(array.itemsize * (array.size // self.capacity) for array in arrays)
+        return {
+            'tags': self.count,
+            'capacity': self.capacity,
+            'range_slots': self.range_slots,
+            'dropped_ranges': self.dropped_ranges,
+            'allocated_bytes': sum(array.nbytes for array in arrays),
+            'bytes_per_tag': bytes_per_row
+        }
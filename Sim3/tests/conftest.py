@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Τα modules του Sim3 εισάγονται με το όνομά τους, όπως όταν τρέχουν ως scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
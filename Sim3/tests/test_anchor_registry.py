@@ -0,0 +1,66 @@
+import json
+import numpy as np
+import pytest
+from anchor_registry import AnchorRegistry, load_site
+from tag_store import TagStateStore
+from trilateration import AnchorGeometryCache, BatchTrilaterator
+
+
+def grid_registry(columns=20, rows=20, spacing=8.0):
+    return AnchorRegistry({f"a{x}_{y}": (x * spacing, y * spacing) for x in range(columns) for y in range(rows)})
+
+
+def test_near_many_matches_brute_force():
+    registry = grid_registry()
+    points = np.random.default_rng(0).uniform(-10, 170, size=(300, 2))
+    points[7] = np.nan
+
+    nearby = registry.near_many(points, 15.0)
+    assert (nearby[7] < 0).all()
+    for point, row in zip(np.delete(points, 7, axis=0), np.delete(nearby, 7, axis=0)):
+        expected = np.flatnonzero(np.hypot(*(registry.coords - point).T) <= 15.0).tolist()
+        assert sorted(row[row >= 0].tolist()) == expected
+        assert sorted(registry.near(point, 15.0).tolist()) == expected
+
+
+def test_move_updates_the_grid():
+    registry = grid_registry(4, 4)
+    registry["a0_0"] = (500.0, 500.0)
+    assert registry.near((0.0, 0.0), 1.0).tolist() == []
+    assert registry.near_many([[500.0, 500.0]], 1.0).max() == registry.index["a0_0"]
+    assert registry.stats()['anchors'] == 16
+
+
+def test_load_site_rejects_duplicates(tmp_path):
+    path = tmp_path / "site.json"
+    path.write_text(json.dumps({"anchors": [{"id": "a", "x": 0, "y": 0}, {"id": "a", "x": 1, "y": 0}]}))
+    with pytest.raises(ValueError):
+        load_site(str(path))
+
+    path.write_text(json.dumps({"anchors": [{"id": "a", "x": 0, "y": 0, "zone": "dock"}, {"id": "b", "x": 9, "y": 0}]}))
+    registry = load_site(str(path))
+    assert registry.ids == ["a", "b"] and registry.zone_of("a") == "dock"
+    np.testing.assert_array_equal(registry["b"], [9.0, 0.0])
+
+
+def test_anchor_reach_skips_stale_range_from_distant_anchor():
+    registry = grid_registry(6, 6)
+    tag = np.array([20.0, 20.0])
+    heard = ["a2_2", "a3_2", "a2_3", "a3_3", "a1_2"]
+    distances = [np.hypot(*(registry[a] - tag)) for a in heard]
+    # Παλιά απόσταση από anchor που το tag έχει αφήσει πίσω: μικρή, αλλά το anchor είναι 28 m μακριά
+    heard.append("a5_5")
+    distances.append(0.5)
+
+    store = TagStateStore(registry.ids)
+    store.set_ranges(["tag"], heard, np.zeros(len(heard), dtype=np.intp), np.arange(len(heard)),
+                     np.array(distances, dtype=np.float32), 0.0)
+    cache = AnchorGeometryCache(registry)
+
+    def selected(anchor_reach):
+        solver = BatchTrilaterator(cache, max_anchors=4, anchor_reach=anchor_reach)
+        slots = solver.select(store.ranges[:1], store.range_anchors[:1], store.anchor_ids, tag[None, :])[0]
+        return {store.anchor_ids[store.range_anchors[0, s]] for s in slots if s >= 0}
+
+    assert "a5_5" in selected(None)
+    assert selected(15.0) == {"a2_2", "a3_2", "a2_3", "a3_3"}
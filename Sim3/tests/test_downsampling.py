@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from downsampling import lttb, minmax
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = 1.7e9 + np.arange(10000, dtype=float)
+    y = np.sin(np.arange(10000) / 300) + rng.normal(0, 0.05, 10000)
+    return x, y
+
+
+@pytest.mark.parametrize("points", [3, 4, 100, 999, 9999])
+def test_lttb_keeps_endpoints_and_length(series, points):
+    x, y = series
+    sampled_x, sampled_y = lttb(x, y, points)
+    assert len(sampled_x) == len(sampled_y) == points
+    assert sampled_x[0] == x[0] and sampled_x[-1] == x[-1]
+    assert sampled_y[0] == y[0] and sampled_y[-1] == y[-1]
+    # Υποσύνολο των αρχικών σημείων, με τη σειρά τους
+    assert np.all(np.diff(sampled_x) > 0)
+    assert np.isin(sampled_x, x).all()
+
+
+def test_lttb_keeps_a_spike(series):
+    x, y = series
+    y = y.copy()
+    y[5000] = 50.0
+    _, sampled_y = lttb(x, y, 200)
+    assert sampled_y.max() == 50.0
+
+
+@pytest.mark.parametrize("points", [0, 2, 10000, 20000])
+def test_lttb_returns_short_series_unchanged(series, points):
+    x, y = series
+    sampled_x, sampled_y = lttb(x, y, points)
+    np.testing.assert_array_equal(sampled_x, x)
+    np.testing.assert_array_equal(sampled_y, y)
+
+
+def test_minmax_keeps_extremes_and_endpoints(series):
+    x, y = series
+    sampled_x, sampled_y = minmax(x, y, 300)
+    assert len(sampled_x) <= 2 * 300 + 4
+    assert sampled_x[0] == x[0] and sampled_x[-1] == x[-1]
+    assert sampled_y.min() == y.min() and sampled_y.max() == y.max()
+    assert np.all(np.diff(sampled_x) > 0)
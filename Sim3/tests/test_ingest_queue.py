@@ -0,0 +1,49 @@
+import pytest
+from ingest_queue import IngestQueue
+
+
+def test_latest_keeps_newest_report_per_tag_and_anchor():
+    queue = IngestQueue(capacity=10, policy='latest')
+    queue.put_report("tag1", "a1", "old")
+    queue.put_report("tag1", "a2", "other")
+    queue.put_report("tag1", "a1", "new")
+    assert len(queue) == 2
+    # Η νεότερη τιμή μετακινείται στο τέλος, με τη σειρά άφιξης
+    assert queue.drain() == ["other", "new"]
+    assert queue.stats()['coalesced'] == 1 and queue.stats()['dropped'] == 0
+    assert len(queue) == 0 and queue.drain() == []
+
+
+def test_latest_drops_oldest_when_full():
+    queue = IngestQueue(capacity=2, policy='latest')
+    for anchor in ("a1", "a2", "a3"):
+        queue.put_report("tag1", anchor, anchor)
+    assert queue.drain() == ["a2", "a3"]
+    assert queue.stats()['dropped'] == 1
+
+
+def test_drop_oldest_is_fifo():
+    queue = IngestQueue(capacity=3, policy='drop_oldest')
+    for i in range(5):
+        queue.put_report("tag1", "a1", i)
+    assert queue.drain() == [2, 3, 4]
+    stats = queue.stats()
+    assert (stats['enqueued'], stats['dropped'], stats['coalesced'], stats['max_depth']) == (5, 2, 0, 3)
+
+
+def test_batches_count_by_records_and_drop_whole():
+    queue = IngestQueue(capacity=100, policy='drop_oldest')
+    queue.put_batch("batch1", 60)
+    queue.put_report("tag1", "a1", "report")
+    queue.put_batch("batch2", 50)
+    assert queue.drain() == ["report", "batch2"]
+    assert queue.stats()['dropped'] == 60
+
+    # Ένα batch μεγαλύτερο από τη χωρητικότητα μένει (το νεότερο στοιχείο δεν πετιέται)
+    queue.put_batch("huge", 150)
+    assert len(queue) == 150 and queue.drain() == ["huge"]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        IngestQueue(policy='newest')
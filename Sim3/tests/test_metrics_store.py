@@ -0,0 +1,77 @@
+import os
+import numpy as np
+from metrics_store import MetricsReader, MetricsStore
+
+DTYPE = np.dtype([('timestamp', '<f8'), ('tag', '<u4'), ('value', '<f4')])
+
+
+def records(start, count):
+    rows = np.zeros(count, dtype=DTYPE)
+    rows['timestamp'] = start + np.arange(count)
+    rows['tag'] = np.arange(count) % 3
+    rows['value'] = np.arange(start, start + count)
+    return rows
+
+
+def test_round_trip_with_names(tmp_path):
+    store = MetricsStore(str(tmp_path), {'samples': DTYPE})
+    store.append_names(["tag_a", "tag_b"])
+    store.append('samples', records(0, 10))
+    store.append_names(["tag_c"])
+    store.close()
+    assert store.stats()['rows'] == {'samples': 10} and store.stats()['errors'] == 0
+
+    reader = MetricsReader(str(tmp_path))
+    assert reader.tag_names == ["tag_a", "tag_b", "tag_c"]
+    data = reader.read('samples')
+    np.testing.assert_array_equal(data['value'], np.arange(10))
+    assert reader.time_range('samples') == (0.0, 9.0)
+
+
+def test_rotation_and_time_range_reads(tmp_path):
+    # Κάθε append ξεπερνά το όριο μεγέθους, οπότε το επόμενο ανοίγει νέο segment
+    store = MetricsStore(str(tmp_path), {'samples': DTYPE}, segment_bytes=DTYPE.itemsize * 5)
+    for start in range(0, 40, 10):
+        store.append('samples', records(start, 10))
+    store.close()
+
+    reader = MetricsReader(str(tmp_path))
+    assert len(reader.segments('samples')) == 4
+    data = reader.read('samples', ['timestamp', 'value'], start=15, end=32)
+    np.testing.assert_array_equal(data['timestamp'], np.arange(15, 32))
+
+    chunks = list(reader.chunks('samples', ['value'], rows=4))
+    np.testing.assert_array_equal(np.concatenate([c['value'] for c in chunks]), np.arange(40))
+    assert max(len(c['value']) for c in chunks) == 4
+
+
+def test_new_store_in_same_directory_continues_segments(tmp_path):
+    for start in (0, 10):
+        store = MetricsStore(str(tmp_path), {'samples': DTYPE})
+        store.append('samples', records(start, 10))
+        store.close()
+    reader = MetricsReader(str(tmp_path))
+    assert len(reader.segments('samples')) == 2
+    np.testing.assert_array_equal(reader.read('samples')['timestamp'], np.arange(20))
+
+
+def test_reader_uses_common_length_after_torn_write(tmp_path):
+    store = MetricsStore(str(tmp_path), {'samples': DTYPE})
+    store.append('samples', records(0, 10))
+    store.close()
+
+    # Crash στη μέση μιας εγγραφής: μία στήλη έχει περισσότερες τιμές από τις άλλες
+    segment = MetricsReader(str(tmp_path)).segments('samples')[0]
+    with open(os.path.join(segment, "timestamp.bin"), 'ab') as f:
+        f.write(np.array([10.0, 11.0]).tobytes())
+
+    data = MetricsReader(str(tmp_path)).read('samples')
+    assert len(data['timestamp']) == len(data['value']) == 10
+
+
+def test_empty_range_returns_empty_columns(tmp_path):
+    store = MetricsStore(str(tmp_path), {'samples': DTYPE})
+    store.append('samples', records(0, 10))
+    store.close()
+    data = MetricsReader(str(tmp_path)).read('samples', start=100)
+    assert len(data['timestamp']) == 0 and data['value'].dtype == np.float32
@@ -0,0 +1,95 @@
+import time
+from types import SimpleNamespace
+from motor_commands import MotorCommandDispatcher
+
+
+class FakeClient:
+    """Καταγράφει τα publish και δίνει διαδοχικά mid, χωρίς broker."""
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, topic, payload, qos=0):
+        self.published.append((topic, payload, qos))
+        return SimpleNamespace(mid=len(self.published))
+
+
+def make_dispatcher(**options):
+    client = FakeClient()
+    dispatcher = MotorCommandDispatcher(client, "uwb/tags/", clock=lambda: 0.0, verbose=False, **options)
+    return client, dispatcher
+
+
+def test_commands_within_window_coalesce_to_latest():
+    client, dispatcher = make_dispatcher(coalesce_seconds=0.25)
+    dispatcher.submit("tag1", True)
+    dispatcher.dispatch(0.0)
+    dispatcher.submit("tag1", False)
+    dispatcher.submit("tag1", True)
+    dispatcher.submit("tag1", False)
+    assert dispatcher.dispatch(0.1) == 0.25
+
+    dispatcher.dispatch(0.3)
+    assert [payload for _, payload, _ in client.published] == ["ON", "OFF"]
+    assert client.published[0][0] == "uwb/tags/tag1/motor"
+    assert dispatcher.counters['coalesced'] == 2
+
+
+def test_return_to_sent_state_publishes_nothing():
+    client, dispatcher = make_dispatcher()
+    dispatcher.submit("tag1", True)
+    dispatcher.dispatch(0.0)
+    dispatcher.submit("tag1", False)
+    dispatcher.submit("tag1", True)
+    dispatcher.dispatch(0.1)
+    assert dispatcher.dispatch(1.0) is None
+    assert len(client.published) == 1
+
+
+def test_acks_late_acks_and_abandoned_commands():
+    client, dispatcher = make_dispatcher(ack_timeout=1.0, late_ack_grace=5.0)
+    for tag in ("tag1", "tag2", "tag3"):
+        dispatcher.submit(tag, True)
+    dispatcher.dispatch(0.0)
+
+    dispatcher.on_publish(None, None, 1)
+    dispatcher.dispatch(0.5)
+    assert dispatcher.counters['acked'] == 1
+
+    # Χωρίς PUBACK μέσα στο ack_timeout: αναφέρονται αλλά μένουν για late ack
+    dispatcher.dispatch(1.5)
+    assert dispatcher.counters['unacknowledged'] == 2
+    dispatcher.on_publish(None, None, 2)
+    dispatcher.dispatch(2.0)
+    assert dispatcher.counters['late_acks'] == 1
+
+    # Μετά το grace η εγγραφή φεύγει και ένα PUBACK με άγνωστο mid αγνοείται
+    dispatcher.dispatch(6.5)
+    assert dispatcher.counters['abandoned'] == 1
+    assert dispatcher.stats()['in_flight'] == 0
+    dispatcher.on_publish(None, None, 3)
+    dispatcher.dispatch(7.0)
+    assert dispatcher.counters['late_acks'] == 1
+
+
+def test_close_does_not_wait_for_overdue_commands():
+    client, dispatcher = make_dispatcher(ack_timeout=1.0)
+    dispatcher.clock = time.time
+    dispatcher.submit("tag1", True)
+    dispatcher.dispatch(time.time() - 5.0)
+    dispatcher.dispatch(time.time())
+    assert dispatcher.counters['unacknowledged'] == 1
+
+    start = time.monotonic()
+    assert dispatcher.close(timeout=2.0) == 1
+    assert time.monotonic() - start < 0.5
+
+
+def test_close_flushes_pending_commands():
+    client, dispatcher = make_dispatcher(qos=0)
+    dispatcher.submit("tag1", True)
+    dispatcher.dispatch(0.0)
+    dispatcher.submit("tag1", False)
+    dispatcher.dispatch(0.1)
+    assert dispatcher.close() == 0
+    assert [payload for _, payload, _ in client.published] == ["ON", "OFF"]
@@ -0,0 +1,60 @@
+import pytest
+from proximity_encounters import EncounterTracker
+
+
+@pytest.fixture
+def tracker():
+    return EncounterTracker(enter_threshold=1.0, exit_threshold=1.2, min_dwell=1.0)
+
+
+def test_enter_below_threshold_only(tracker):
+    entered, exited = tracker.update([("a", "b", 1.1)], 0.0)
+    assert entered == [] and exited == [] and len(tracker) == 0
+
+    entered, _ = tracker.update([("a", "b", 0.9)], 0.1)
+    assert entered == [("a", "b", 0.9)]
+    assert tracker.active_tags() == {"a", "b"}
+
+
+def test_hysteresis_keeps_encounter_between_thresholds(tracker):
+    tracker.update([("a", "b", 0.5)], 0.0)
+    # Πάνω από το enter αλλά κάτω από το exit: συνεχίζεται
+    entered, exited = tracker.update([("a", "b", 1.15)], 2.0)
+    assert entered == [] and exited == []
+
+    _, exited = tracker.update([("a", "b", 1.25)], 3.0)
+    assert [(e.tag1, e.tag2, e.start, e.duration, e.min_distance) for e in exited] == [("a", "b", 0.0, 3.0, 0.5)]
+    assert tracker.active_tags() == set()
+
+
+def test_min_dwell_holds_short_encounters(tracker):
+    tracker.update([("a", "b", 0.5)], 0.0)
+    _, exited = tracker.update([], 0.5)
+    assert exited == [] and len(tracker) == 1
+
+    _, exited = tracker.update([], 1.0)
+    assert len(exited) == 1 and exited[0].duration == 1.0
+
+
+def test_reversed_pair_is_the_same_encounter(tracker):
+    entered, _ = tracker.update([("b", "a", 0.8)], 0.0)
+    assert entered == [("a", "b", 0.8)]
+
+    entered, exited = tracker.update([("a", "b", 0.6)], 2.0)
+    assert entered == [] and exited == []
+    entered, exited = tracker.update([("b", "a", 0.7)], 4.0)
+    assert entered == [] and exited == []
+
+    (encounter,) = tracker.close_all(5.0)
+    assert (encounter.tag1, encounter.tag2, encounter.duration, encounter.min_distance) == ("a", "b", 5.0, 0.6)
+
+
+def test_tag_stays_active_while_any_encounter_is_open(tracker):
+    tracker.update([("a", "b", 0.5), ("a", "c", 0.5)], 0.0)
+    tracker.update([("a", "c", 0.5)], 2.0)
+    assert tracker.active_tags() == {"a", "c"}
+
+
+def test_exit_threshold_below_enter_is_rejected():
+    with pytest.raises(ValueError):
+        EncounterTracker(enter_threshold=1.0, exit_threshold=0.9, min_dwell=0.0)
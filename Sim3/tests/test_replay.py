@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from recording import RangeRecorder, FRAME_REPORT, FRAME_BATCH
+from wire_format import encode_batch
+
+SIM3 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANCHORS = {"anchor1": (0.0, 0.0), "anchor2": (5.0, 0.0), "anchor3": (0.0, 7.0), "anchor4": (5.0, 7.0)}
+START = 1.7e9
+
+
+def write_recording(path):
+    """Το tag1 περνά δίπλα από το ακίνητο tag2 (JSON)· το tag3 στέλνει binary batches και σωπαίνει στη μέση."""
+    rng = np.random.default_rng(0)
+    anchor_ids = list(ANCHORS)
+    coords = np.array(list(ANCHORS.values()))
+    recorder = RangeRecorder(str(path))
+    for step in range(120):
+        now = START + step * 0.1
+        tags = {"tag1": (0.5 + step * 0.035, 3.5), "tag2": (2.5, 3.8)}
+        for order, (tag_id, position) in enumerate(tags.items()):
+            distances = np.hypot(*(coords - position).T) + rng.normal(0, 0.02, len(coords))
+            for anchor_id, distance in zip(anchor_ids, distances):
+                payload = json.dumps({"anchor_id": anchor_id, "tag_id": tag_id, "distance": round(float(distance), 3),
+                                      "seq": step, "sent_at": now - 0.005})
+                recorder.record(FRAME_REPORT, now + 0.001 * order, payload.encode())
+        if step < 40 or step > 100:
+            distances = np.hypot(*(coords - (1.0, 1.0)).T)
+            payload = encode_batch(["tag3"], anchor_ids, np.zeros(4, dtype=int), np.arange(4), distances, step,
+                                   now - 0.005)
+            recorder.record(FRAME_BATCH, now + 0.002, payload)
+    recorder.close()
+
+
+def run_replay(recording, workdir, name, options):
+    commands = workdir / f"{name}.csv"
+    result = subprocess.run([sys.executable, os.path.join(SIM3, "replay.py"), str(recording), "--speed", "0",
+                             "--commands", str(commands), *options],
+                            cwd=workdir, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    digests = [line.split(":", 1)[1].strip() for line in result.stdout.splitlines() if line.startswith(" Digest:")]
+    assert len(digests) == 1, result.stdout
+    return digests[0], commands.read_text()
+
+
+@pytest.mark.parametrize("options", [[], ["--solver", "gauss-newton", "--tracker"]])
+def test_replay_is_deterministic(tmp_path, options):
+    recording = tmp_path / "run.uwbr"
+    write_recording(recording)
+
+    first_digest, first_commands = run_replay(recording, tmp_path, "first", options)
+    second_digest, second_commands = run_replay(recording, tmp_path, "second", options)
+
+    assert first_digest == second_digest
+    assert first_commands == second_commands
+    # Το πέρασμα του tag1 δίπλα από το tag2 ανάβει και σβήνει τους κινητήρες τους
+    assert "tag1/motor,ON" in first_commands and "tag1/motor,OFF" in first_commands
@@ -0,0 +1,69 @@
+import numpy as np
+from sequence_tracker import SequenceTracker
+from wire_format import RECORD_DTYPE
+
+
+def batch_records(rows):
+    """Records binary batch από [(tag, anchor, seq)] (δείκτες στις λίστες ids)."""
+    records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+    if rows:
+        records['tag'], records['anchor'], records['seq'] = zip(*rows)
+    return records
+
+
+def test_gaps_count_as_lost():
+    tracker = SequenceTracker()
+    for seq in (1, 2, 5, 6, 10):
+        tracker.check("tag1", "a1", seq)
+    assert tracker.lost == 2 + 3
+    assert tracker.out_of_order == 0
+
+
+def test_streams_are_per_tag_and_anchor():
+    tracker = SequenceTracker()
+    # Κάθε (tag, anchor) έχει δική του αρίθμηση· η εναλλαγή τους δεν είναι κενό
+    for seq in range(1, 4):
+        for tag_id, anchor_id in (("tag1", "a1"), ("tag1", "a2"), ("tag2", "a1")):
+            tracker.check(tag_id, anchor_id, seq)
+    assert tracker.stats() == {'checked': 9, 'streams': 3, 'lost': 0, 'out_of_order': 0}
+
+
+def test_reordered_and_duplicate_reports():
+    tracker = SequenceTracker()
+    for seq in (1, 3, 2, 3, 4):
+        tracker.check("tag1", "a1", seq)
+    # Το 3 άφησε κενό για το 2, το οποίο ήρθε αργότερα (εκτός σειράς, όπως και το διπλό 3)
+    assert tracker.lost == 1
+    assert tracker.out_of_order == 2
+
+
+def test_batch_matches_single_reports():
+    rng = np.random.default_rng(0)
+    tag_ids, anchor_ids = ["t0", "t1", "t2"], ["a0", "a1"]
+    rows = []
+    for seq in range(1, 40):
+        for tag in range(3):
+            for anchor in range(2):
+                if rng.random() < 0.8:
+                    rows.append((tag, anchor, seq))
+    # Λίγες αντιμεταθέσεις γειτονικών records
+    for i in rng.choice(len(rows) - 1, size=10, replace=False):
+        rows[i], rows[i + 1] = rows[i + 1], rows[i]
+
+    single = SequenceTracker()
+    for tag, anchor, seq in rows:
+        single.check(tag_ids[tag], anchor_ids[anchor], seq)
+
+    batched = SequenceTracker()
+    for start in range(0, len(rows), 25):
+        batched.check_batch(tag_ids, anchor_ids, batch_records(rows[start:start + 25]))
+    assert batched.stats() == single.stats()
+    assert single.lost > 0
+
+
+def test_json_and_batch_reports_share_streams():
+    tracker = SequenceTracker()
+    tracker.check("tag1", "a1", 1)
+    tracker.check_batch(["tag1"], ["a1"], batch_records([(0, 0, 2), (0, 0, 4)]))
+    tracker.check("tag1", "a1", 5)
+    assert tracker.stats() == {'checked': 4, 'streams': 1, 'lost': 1, 'out_of_order': 0}
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from spatial_index import ProximityGrid
+
+
+def brute_force_pairs(tags, threshold, now, max_age):
+    """Όλα τα ζεύγη, με τη σειρά πρώτης εμφάνισης των tags."""
+    recent = [(tag_id, position) for tag_id, (position, timestamp) in tags.items() if now - timestamp <= max_age]
+    if not recent:
+        return []
+    positions = np.array([position for _, position in recent])
+    distances = np.hypot(*(positions[:, None, :] - positions[None, :, :]).transpose(2, 0, 1))
+    first, second = np.nonzero(np.triu(distances < threshold, k=1))
+    return [(recent[i][0], recent[j][0], distances[i, j]) for i, j in zip(first.tolist(), second.tolist())]
+
+
+def assert_same_pairs(found, expected):
+    assert [(a, b) for a, b, _ in found] == [(a, b) for a, b, _ in expected]
+    np.testing.assert_allclose([d for _, _, d in found], [d for _, _, d in expected])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    grid = ProximityGrid(1.2, initial_capacity=4)
+    tags = {}
+    ids = [f"tag{i}" for i in range(150)]
+
+    for step in range(20):
+        now = float(step)
+        moving = rng.choice(ids, size=60, replace=False).tolist()
+        # Και αρνητικές συντεταγμένες, ώστε να ελέγχονται κελιά γύρω από το 0
+        positions = rng.uniform(-6, 6, size=(len(moving), 2))
+        grid.update_many(moving, positions, now)
+        for tag_id, position in zip(moving, positions):
+            # Τα νέα tags μπαίνουν στο τέλος της σειράς, όσα υπάρχουν κρατούν τη θέση τους
+            tags[tag_id] = (position, now)
+
+        for tag_id in rng.choice(ids, size=5, replace=False).tolist():
+            assert grid.remove(tag_id) == (tag_id in tags)
+            tags.pop(tag_id, None)
+
+        for threshold in (0.5, 1.0, 1.2):
+            assert_same_pairs(grid.find_close_pairs(threshold, now, 3.0),
+                              brute_force_pairs(tags, threshold, now, 3.0))
+        assert len(grid) == len(tags)
+
+
+def test_single_update_and_cell_boundaries():
+    grid = ProximityGrid(1.0)
+    grid.update("a", (0.99, 0.0), 0.0)
+    grid.update("b", (1.01, 0.0), 0.0)
+    grid.update("c", (-0.5, -0.5), 0.0)
+    # a και b σε γειτονικά κελιά, c στο διαγώνιο κελί αλλά πιο μακριά από το όριο
+    assert_same_pairs(grid.find_close_pairs(1.0, 0.0, 1.0), [("a", "b", 0.02)])
+
+
+def test_stale_tags_are_ignored():
+    grid = ProximityGrid(1.0)
+    grid.update("a", (0.0, 0.0), 0.0)
+    grid.update("b", (0.5, 0.0), 5.0)
+    assert grid.find_close_pairs(1.0, 5.0, 2.0) == []
+
+
+def test_threshold_larger_than_cell_is_rejected():
+    with pytest.raises(ValueError):
+        ProximityGrid(1.0).find_close_pairs(1.5, 0.0, 1.0)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from tag_store import TagStateStore
+
+ANCHOR_IDS = [f"a{i}" for i in range(6)]
+
+
+def stored(store, tag_id):
+    """Οι αποστάσεις μιας γραμμής ως dict anchor_id -> απόσταση."""
+    row = store.tag_index[tag_id]
+    return {store.anchor_ids[a]: round(float(d), 3)
+            for a, d in zip(store.range_anchors[row], store.ranges[row]) if a >= 0}
+
+
+@pytest.fixture
+def store():
+    return TagStateStore(ANCHOR_IDS, initial_capacity=2, range_slots=3)
+
+
+def test_rows_grow_and_keep_data(store):
+    for i in range(5):
+        store.set_range(f"tag{i}", "a0", float(i), 0.0)
+    assert store.count == 5 and store.capacity >= 5
+    assert [stored(store, f"tag{i}") for i in range(5)] == [{"a0": float(i)} for i in range(5)]
+    assert store.set_range("tag0", "unknown", 1.0, 0.0) is None
+
+
+def test_update_reuses_anchor_slot(store):
+    store.set_range("tag", "a1", 4.0, 0.0)
+    store.set_range("tag", "a1", 3.0, 1.0)
+    assert stored(store, "tag") == {"a1": 3.0}
+    assert store.range_counts(np.array([0]))[0] == 1
+
+
+def test_full_row_replaces_farthest_only_with_closer(store):
+    for anchor, distance in (("a0", 5.0), ("a1", 9.0), ("a2", 7.0)):
+        store.set_range("tag", anchor, distance, 0.0)
+
+    store.set_range("tag", "a3", 8.0, 1.0)
+    assert stored(store, "tag") == {"a0": 5.0, "a3": 8.0, "a2": 7.0}
+
+    store.set_range("tag", "a4", 10.0, 1.0)
+    assert stored(store, "tag") == {"a0": 5.0, "a3": 8.0, "a2": 7.0}
+    assert store.dropped_ranges == 1
+
+
+def test_batch_matches_single_updates():
+    rng = np.random.default_rng(0)
+    tag_ids = [f"tag{i}" for i in range(20)]
+    # Κάθε (tag, anchor) μία φορά, σε τυχαία σειρά: οι γεμάτες γραμμές αντικαθιστούν όπως το set_range
+    pairs = rng.permutation(20 * len(ANCHOR_IDS))
+    tag_index, anchor_index = pairs // len(ANCHOR_IDS), pairs % len(ANCHOR_IDS)
+    distances = rng.uniform(0, 20, size=len(pairs)).astype(np.float32)
+
+    batch = TagStateStore(ANCHOR_IDS, range_slots=3)
+    rows = batch.set_ranges(tag_ids, ANCHOR_IDS, tag_index, anchor_index, distances, 0.0)
+    assert sorted(rows.tolist()) == list(range(20))
+
+    single = TagStateStore(ANCHOR_IDS, range_slots=3)
+    for tag, anchor, distance in zip(tag_index.tolist(), anchor_index.tolist(), distances.tolist()):
+        single.set_range(tag_ids[tag], ANCHOR_IDS[anchor], distance, 0.0)
+    assert {t: stored(batch, t) for t in tag_ids} == {t: stored(single, t) for t in tag_ids}
+    assert batch.dropped_ranges == single.dropped_ranges
+
+
+def test_expire_ranges_and_positions(store):
+    store.set_range("tag", "a0", 1.0, 0.0)
+    store.set_range("tag", "a1", 2.0, 5.0)
+    rows = np.array([0])
+    np.testing.assert_array_equal(store.oldest_range_timestamps(rows), [0.0])
+
+    assert store.expire_ranges(rows, 1.0) == 1
+    assert stored(store, "tag") == {"a1": 2.0}
+    np.testing.assert_array_equal(store.oldest_range_timestamps(rows), [5.0])
+
+    # Ελεύθερη θέση μετά τη λήξη: ένα νέο anchor χωράει χωρίς αντικατάσταση
+    store.set_range("tag", "a2", 3.0, 6.0)
+    store.set_range("tag", "a3", 4.0, 6.0)
+    assert stored(store, "tag") == {"a1": 2.0, "a2": 3.0, "a3": 4.0}
+
+    store.set_positions(rows, np.array([[1.0, 2.0]]), 10.0)
+    assert store.positioned_rows().tolist() == [0]
+    assert store.expire_positions(rows, 9.0).tolist() == []
+    assert store.expire_positions(rows, 10.0).tolist() == [0]
+    assert np.isnan(store.positions[0]).all()
@@ -0,0 +1,70 @@
+import numpy as np
+from timing_wheel import TimingWheel
+
+
+def test_rows_expire_after_their_deadline():
+    wheel = TimingWheel(tick_seconds=0.1)
+    wheel.advance(0.0)
+    wheel.schedule([1, 2], 0.5)
+    wheel.schedule([3], 0.85)
+
+    assert wheel.advance(0.45).tolist() == []
+    assert wheel.advance(0.65).tolist() == [1, 2]
+    assert wheel.advance(0.85).tolist() == []
+    assert wheel.advance(0.95).tolist() == [3]
+    assert wheel.pending == 0
+
+
+def test_one_entry_per_row():
+    wheel = TimingWheel(tick_seconds=0.1)
+    wheel.advance(0.0)
+    for now in np.arange(0.0, 1.0, 0.01):
+        wheel.schedule([4, 5, 6], now + 2.0)
+
+    assert wheel.pending == 3
+    assert sum(len(slot) for slot in wheel._slots) == 1
+    # Η πρώτη εγγραφή μένει· ο καλών ξαναπρογραμματίζει όσες ανανεώθηκαν
+    assert wheel.advance(2.15).tolist() == [4, 5, 6]
+    assert wheel.advance(10.0).tolist() == []
+
+
+def test_earlier_deadline_replaces_later_one():
+    wheel = TimingWheel(tick_seconds=0.1)
+    wheel.advance(0.0)
+    wheel.schedule([7], 3.0)
+    wheel.schedule([7], 1.0)
+
+    assert wheel.advance(1.15).tolist() == [7]
+    assert wheel.advance(3.5).tolist() == []
+    assert wheel.pending == 0
+
+
+def test_per_row_deadlines_and_rescheduling():
+    wheel = TimingWheel(tick_seconds=0.1, initial_capacity=2)
+    wheel.advance(0.0)
+    wheel.schedule(np.arange(10), np.linspace(0.5, 1.4, 10))
+
+    assert wheel.advance(0.95).tolist() == [0, 1, 2, 3, 4]
+    wheel.schedule([0, 1], 2.0)
+    assert wheel.advance(1.55).tolist() == [5, 6, 7, 8, 9]
+    assert wheel.advance(2.15).tolist() == [0, 1]
+
+
+def test_deadlines_beyond_one_turn_and_long_gaps():
+    wheel = TimingWheel(tick_seconds=0.1, num_slots=8)
+    wheel.advance(0.0)
+    wheel.schedule([1], 0.35)
+    # Στο ίδιο slot με το row 1, έναν γύρο του τροχού αργότερα
+    wheel.schedule([2], 0.35 + 8 * 0.1)
+
+    assert wheel.advance(0.45).tolist() == [1]
+    assert wheel.advance(0.95).tolist() == []
+    # Μετά από κενό πολλών γύρων δεν χάνεται τίποτα
+    assert wheel.advance(100.0).tolist() == [2]
+
+
+def test_past_deadline_expires_on_next_tick():
+    wheel = TimingWheel(tick_seconds=0.1)
+    wheel.advance(5.0)
+    wheel.schedule([3], 1.0)
+    assert wheel.advance(5.15).tolist() == [3]
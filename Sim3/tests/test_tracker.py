@@ -0,0 +1,60 @@
+import numpy as np
+from tracker import KalmanTracker
+
+
+def track_line(tracker, rows, start, velocity, steps, dt=0.1, noise=0.0, seed=0):
+    """Ενημερώνει τα rows με θέσεις σε ευθεία κίνηση· επιστρέφει τις φιλτραρισμένες και τις πραγματικές."""
+    rng = np.random.default_rng(seed)
+    filtered = truth = None
+    for step in range(steps):
+        truth = start + velocity * step * dt
+        filtered = tracker.update(rows, truth + rng.normal(0, noise, size=truth.shape), step * dt)
+    return filtered, truth
+
+
+def test_first_update_starts_at_measurement():
+    tracker = KalmanTracker()
+    positions = tracker.update([0, 3], [[1.0, 2.0], [5.0, 6.0]], 10.0)
+    np.testing.assert_array_equal(positions, [[1.0, 2.0], [5.0, 6.0]])
+    assert tracker.stats() == {'tracks': 2, 'initialized': 2, 'updates': 0}
+    # Χωρίς ταχύτητα η πρόβλεψη μένει στη θέση, και tags χωρίς κατάσταση δίνουν NaN
+    predicted = tracker.predict_positions([0, 1, 200], 10.5)
+    np.testing.assert_array_equal(predicted[0], [1.0, 2.0])
+    assert np.isnan(predicted[1:]).all()
+
+
+def test_learns_constant_velocity_and_predicts():
+    tracker = KalmanTracker()
+    rows = np.arange(50)
+    start = np.random.default_rng(1).uniform(0, 50, size=(50, 2))
+    velocity = np.random.default_rng(2).uniform(-1, 1, size=(50, 2))
+    _, truth = track_line(tracker, rows, start, velocity, steps=60)
+
+    np.testing.assert_allclose(tracker.state[rows, 2:], velocity, atol=0.05)
+    predicted = tracker.predict_positions(rows, 5.9 + 0.5)
+    np.testing.assert_allclose(predicted, truth + velocity * 0.5, atol=0.05)
+
+
+def test_prediction_is_capped():
+    tracker = KalmanTracker(max_prediction_seconds=1.0)
+    track_line(tracker, [0], np.array([[0.0, 0.0]]), np.array([[1.0, 0.0]]), steps=60)
+    np.testing.assert_allclose(tracker.predict_positions([0], 100.0), tracker.predict_positions([0], 5.9 + 1.0))
+
+
+def test_filter_reduces_measurement_noise():
+    tracker = KalmanTracker(measurement_std=0.2)
+    rows = np.arange(200)
+    start = np.zeros((200, 2))
+    velocity = np.tile([0.5, 0.0], (200, 1))
+    filtered, truth = track_line(tracker, rows, start, velocity, steps=50, noise=0.2)
+    error = np.hypot(*(filtered - truth).T)
+    assert error.mean() < 0.15
+
+
+def test_reset_forgets_track():
+    tracker = KalmanTracker()
+    track_line(tracker, [0, 1], np.zeros((2, 2)), np.ones((2, 2)), steps=10)
+    tracker.reset([1])
+    assert np.isnan(tracker.predict_positions([1], 1.0)).all()
+    np.testing.assert_array_equal(tracker.update([1], [[7.0, 7.0]], 2.0), [[7.0, 7.0]])
+    assert tracker.stats()['tracks'] == 2
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from anchor_registry import AnchorRegistry
+from tag_store import TagStateStore
+from trilateration import (AnchorGeometryCache, BatchTrilaterator, GaussNewtonTrilaterator, select_anchors,
+                           trilaterate_position)
+
+ANCHORS = {
+    "A1": np.array([0.0, 0.0]),
+    "A2": np.array([20.0, 0.0]),
+    "A3": np.array([20.0, 15.0]),
+    "A4": np.array([0.0, 15.0]),
+    "A5": np.array([10.0, 7.5]),
+}
+
+
+def store_with_ranges(points, noise=0.0, seed=0, anchor_ids=tuple(ANCHORS)):
+    """TagStateStore με τις αποστάσεις κάθε σημείου από τα anchor_ids."""
+    rng = np.random.default_rng(seed)
+    store = TagStateStore(ANCHORS.keys())
+    coords = np.array([ANCHORS[a] for a in anchor_ids])
+    distances = np.hypot(*(points[:, None, :] - coords[None]).transpose(2, 0, 1))
+    distances += rng.normal(0, noise, size=distances.shape)
+    tag_index, anchor_index = (column.ravel() for column in np.indices(distances.shape))
+    store.set_ranges([f"tag{i}" for i in range(len(points))], list(anchor_ids), tag_index, anchor_index,
+                     distances.ravel().astype(np.float32), 0.0)
+    return store
+
+
+def solve(solver, store, initial=None):
+    rows = np.arange(store.count)
+    return solver.solve(store.ranges[rows], store.range_anchors[rows], store.anchor_ids, initial)
+
+
+@pytest.fixture
+def points():
+    return np.random.default_rng(1).uniform((1, 1), (19, 14), size=(200, 2))
+
+
+@pytest.mark.parametrize("solver_class", [BatchTrilaterator, GaussNewtonTrilaterator])
+def test_exact_ranges_give_exact_positions(solver_class, points):
+    solver = solver_class(AnchorGeometryCache(ANCHORS))
+    positions = solve(solver, store_with_ranges(points))
+    np.testing.assert_allclose(positions, points, atol=1e-3)
+
+
+def test_gauss_newton_not_worse_than_linear_with_noise(points):
+    store = store_with_ranges(points, noise=0.05)
+    cache = AnchorGeometryCache(ANCHORS)
+    linear_error = np.hypot(*(solve(BatchTrilaterator(cache), store) - points).T)
+    refined_error = np.hypot(*(solve(GaussNewtonTrilaterator(cache), store) - points).T)
+    assert refined_error.mean() <= linear_error.mean()
+    assert refined_error.mean() < 0.1
+
+
+def test_warm_start_converges_to_same_position(points):
+    store = store_with_ranges(points, noise=0.05)
+    cache = AnchorGeometryCache(ANCHORS)
+    cold = solve(GaussNewtonTrilaterator(cache), store)
+    warm = solve(GaussNewtonTrilaterator(cache), store, initial=points + 0.3)
+    np.testing.assert_allclose(warm, cold, atol=1e-2)
+
+
+def test_per_tag_solver_matches_batch(points):
+    store = store_with_ranges(points[:20])
+    cache = AnchorGeometryCache(ANCHORS)
+    batch = solve(BatchTrilaterator(cache), store)
+    for row in range(20):
+        distances = {store.anchor_ids[a]: float(d)
+                     for a, d in zip(store.range_anchors[row], store.ranges[row]) if a >= 0}
+        np.testing.assert_allclose(trilaterate_position(distances, cache), batch[row], atol=1e-6)
+
+
+def test_fewer_than_min_anchors_fails():
+    points = np.array([[5.0, 5.0]])
+    for solver_class in (BatchTrilaterator, GaussNewtonTrilaterator):
+        solver = solver_class(AnchorGeometryCache(ANCHORS), min_anchors=3)
+        positions = solve(solver, store_with_ranges(points, anchor_ids=("A1", "A2")))
+        assert np.isnan(positions).all()
+
+
+def test_nearest_selection_keeps_closest_anchors():
+    store = store_with_ranges(np.array([[2.0, 2.0], [18.0, 13.0]]))
+    rows = np.arange(store.count)
+    selected = select_anchors(store.ranges[rows], store.range_anchors[rows], max_anchors=3)
+    chosen = [sorted(store.anchor_ids[store.range_anchors[row, slot]] for slot in selected[row] if slot >= 0)
+              for row in rows]
+    assert chosen == [["A1", "A4", "A5"], ["A2", "A3", "A5"]]
+
+
+def test_moved_anchor_gets_fresh_geometry(points):
+    registry = AnchorRegistry(ANCHORS)
+    cache = AnchorGeometryCache(registry)
+    solver = BatchTrilaterator(cache)
+    solve(solver, store_with_ranges(points))
+    cache.get(("A1", "A2", "A3"))
+    entries = cache.stats()['entries']
+
+    cache.update_anchor("A5", (12.0, 4.0))
+    assert cache.stats()['entries'] == entries - 1
+    np.testing.assert_array_equal(registry["A5"], [12.0, 4.0])
+
+    # Αποστάσεις από τη νέα θέση: η λύση πρέπει να βγαίνει ακριβής με τη νέα γεωμετρία
+    store = TagStateStore(registry.ids)
+    distances = np.hypot(*(points[:, None, :] - registry.coords[None]).transpose(2, 0, 1))
+    tag_index, anchor_index = (column.ravel() for column in np.indices(distances.shape))
+    store.set_ranges([f"tag{i}" for i in range(len(points))], registry.ids, tag_index, anchor_index,
+                     distances.ravel().astype(np.float32), 0.0)
+    misses = cache.misses
+    np.testing.assert_allclose(solve(solver, store), points, atol=1e-3)
+    assert cache.misses == misses + 1
+
+    cache.invalidate()
+    assert cache.stats()['entries'] == 0
@@ -0,0 +1,80 @@
+import struct
+import numpy as np
+import pytest
+from wire_format import RECORD_DTYPE, decode_batch, encode_batch
+
+TAG_IDS = ["tag1", "ετικέτα2", "tag3"]
+ANCHOR_IDS = ["A1", "A2"]
+
+
+def sample_batch():
+    tag_index = np.array([0, 1, 2, 2, 0])
+    anchor_index = np.array([0, 1, 0, 1, 1])
+    distances = np.array([1.5, 2.25, 3.0, 4.75, 0.5])
+    seq = np.array([1, 2, 3, 4, 5])
+    sent_at = np.array([10.0, 10.1, 10.2, 10.3, 10.4])
+    return tag_index, anchor_index, distances, seq, sent_at
+
+
+def test_round_trip():
+    tag_index, anchor_index, distances, seq, sent_at = sample_batch()
+    payload = encode_batch(TAG_IDS, ANCHOR_IDS, tag_index, anchor_index, distances, seq, sent_at)
+
+    tag_ids, anchor_ids, records = decode_batch(payload)
+    assert tag_ids == TAG_IDS
+    assert anchor_ids == ANCHOR_IDS
+    assert records.dtype == RECORD_DTYPE
+    np.testing.assert_array_equal(records['tag'], tag_index)
+    np.testing.assert_array_equal(records['anchor'], anchor_index)
+    np.testing.assert_array_equal(records['seq'], seq)
+    np.testing.assert_allclose(records['distance'], distances)
+    np.testing.assert_array_equal(records['sent_at'], sent_at)
+
+
+def test_scalar_seq_and_sent_at_apply_to_all_records():
+    tag_index, anchor_index, distances, _, _ = sample_batch()
+    _, _, records = decode_batch(encode_batch(TAG_IDS, ANCHOR_IDS, tag_index, anchor_index, distances, 7, 12.5))
+    assert (records['seq'] == 7).all()
+    assert (records['sent_at'] == 12.5).all()
+
+
+def test_empty_batch():
+    tag_ids, anchor_ids, records = decode_batch(encode_batch([], [], [], [], [], 0, 0.0))
+    assert tag_ids == [] and anchor_ids == [] and len(records) == 0
+
+
+def test_truncated_payloads_are_rejected():
+    payload = encode_batch(TAG_IDS, ANCHOR_IDS, *sample_batch())
+    for length in range(len(payload)):
+        with pytest.raises(ValueError):
+            decode_batch(payload[:length])
+
+
+def test_unknown_magic_or_version_is_rejected():
+    payload = encode_batch(TAG_IDS, ANCHOR_IDS, *sample_batch())
+    with pytest.raises(ValueError):
+        decode_batch(b"XXXX" + payload[4:])
+    with pytest.raises(ValueError):
+        decode_batch(payload[:4] + bytes((99,)) + payload[5:])
+
+
+@pytest.mark.parametrize("field, value", [('tag', len(TAG_IDS)), ('anchor', len(ANCHOR_IDS))])
+def test_index_outside_id_table_is_rejected(field, value):
+    tag_index, anchor_index, distances, seq, sent_at = sample_batch()
+    indices = {'tag': tag_index, 'anchor': anchor_index}
+    indices[field][-1] = value
+    payload = encode_batch(TAG_IDS, ANCHOR_IDS, indices['tag'], indices['anchor'], distances, seq, sent_at)
+    with pytest.raises(ValueError):
+        decode_batch(payload)
+
+
+def test_record_count_larger_than_payload_is_rejected():
+    payload = bytearray(encode_batch(TAG_IDS, ANCHOR_IDS, *sample_batch()))
+    struct.pack_into("<I", payload, 11, 6)
+    with pytest.raises(ValueError):
+        decode_batch(bytes(payload))
+
+
+def test_too_long_id_is_rejected_on_encode():
+    with pytest.raises(ValueError):
+        encode_batch(["t" * 256], ANCHOR_IDS, [0], [0], [1.0], 0, 0.0)
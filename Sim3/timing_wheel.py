@@ -0,0 +1,100 @@
+import numpy as np
+
+
+class TimingWheel:
+    """Hashed timing wheel για λήξεις γραμμών του TagStateStore.
+
+    Κάθε slot αντιστοιχεί σε tick_seconds και κρατά (tick λήξης, rows). Η
+    advance(now) επισκέπτεται μόνο τα ticks που πέρασαν από την προηγούμενη
+    κλήση, οπότε το κόστος είναι ανάλογο των εγγραφών που λήγουν και όχι
+    του πλήθους των tags. Εγγραφές για επόμενο γύρο του τροχού μένουν στο
+    slot τους.
+
+    Κάθε γραμμή έχει το πολύ μία εγγραφή: η schedule αγνοεί γραμμές που
+    ήδη περιμένουν σε ίδιο ή νωρίτερο tick, οπότε οι συχνές ανανεώσεις δεν
+    κοστίζουν τίποτα. Όταν λήξει η εγγραφή, ο καλών ελέγχει το πραγματικό
+    timestamp και ξαναπρογραμματίζει όσες γραμμές ανανεώθηκαν στο μεταξύ.
+    """
+
+    def __init__(self, tick_seconds=0.1, num_slots=128, initial_capacity=64):
+        self.tick_seconds = tick_seconds
+        self.num_slots = num_slots
+        self._slots = [[] for _ in range(num_slots)]
+        self._last_tick = None
+        # Tick της εκκρεμούς εγγραφής κάθε γραμμής (-1: καμία)
+        self._row_ticks = np.full(initial_capacity, -1, dtype=np.int64)
+        self.pending = 0
+
+    def _tick(self, timestamp):
+        return int(timestamp // self.tick_seconds)
+
+    def _ensure_rows(self, max_row):
+        if max_row >= len(self._row_ticks):
+            capacity = max(max_row + 1, 2 * len(self._row_ticks))
+            row_ticks = np.full(capacity, -1, dtype=np.int64)
+            row_ticks[:len(self._row_ticks)] = self._row_ticks
+            self._row_ticks = row_ticks
+
+    def schedule(self, rows, deadlines):
+        """Προγραμματίζει τη λήξη των rows στα deadlines (ένα για όλες ή ένα ανά γραμμή)."""
+        rows = np.asarray(rows, dtype=np.intp)
+        if len(rows) == 0:
+            return
+        self._ensure_rows(int(rows.max()))
+
+        deadlines = np.broadcast_to(np.asarray(deadlines, dtype=float), rows.shape)
+        ticks = np.floor(deadlines / self.tick_seconds).astype(np.int64)
+        if self._last_tick is not None:
+            np.maximum(ticks, self._last_tick + 1, out=ticks)
+
+        current = self._row_ticks[rows]
+        needed = (current < 0) | (ticks < current)
+        if not needed.any():
+            return
+        rows, ticks = rows[needed], ticks[needed]
+        if len(rows) > 1:
+            # Μία εγγραφή ανά γραμμή, με το νωρίτερο tick αν εμφανίζεται πολλές φορές
+            order = np.lexsort((ticks, rows))
+            rows, ticks = rows[order], ticks[order]
+            first = np.concatenate(([True], rows[1:] != rows[:-1]))
+            rows, ticks = rows[first], ticks[first]
+
+        self.pending += int(np.count_nonzero(self._row_ticks[rows] < 0))
+        self._row_ticks[rows] = ticks
+        if np.all(ticks == ticks[0]):
+            tick = int(ticks[0])
+            self._slots[tick % self.num_slots].append((tick, rows))
+            return
+        order = np.argsort(ticks, kind='stable')
+        rows, ticks = rows[order], ticks[order]
+        starts = np.flatnonzero(np.concatenate(([True], ticks[1:] != ticks[:-1])))
+        for start, end in zip(starts.tolist(), np.append(starts[1:], len(ticks)).tolist()):
+            tick = int(ticks[start])
+            self._slots[tick % self.num_slots].append((tick, rows[start:end]))
+
+    def advance(self, now):
+        """Επιστρέφει (μία φορά την καθεμία) τις γραμμές των ticks που ολοκληρώθηκαν έως το now."""
+        current = self._tick(now) - 1
+        if self._last_tick is None:
+            self._last_tick = current - self.num_slots
+
+        # Μετά από μεγάλο κενό αρκεί ένας πλήρης γύρος του τροχού
+        first = max(self._last_tick + 1, current - self.num_slots + 1)
+        due = []
+        for tick in range(first, current + 1):
+            slot = self._slots[tick % self.num_slots]
+            if not slot:
+                continue
+            for expiry_tick, rows in slot:
+                if expiry_tick <= current:
+                    # Εγγραφές που αντικαταστάθηκαν από νωρίτερο tick δεν ισχύουν πια
+                    due.append(rows[self._row_ticks[rows] == expiry_tick])
+            self._slots[tick % self.num_slots] = [entry for entry in slot if entry[0] > current]
+        self._last_tick = max(self._last_tick, current)
+
+        if not due:
+            return np.empty(0, dtype=np.intp)
+        rows = np.unique(np.concatenate(due))
+        self._row_ticks[rows] = -1
+        self.pending -= len(rows)
+        return rows
@@ -0,0 +1,132 @@
+import numpy as np
+
+TRACKER_MEASUREMENT_STD = 0.1
+TRACKER_ACCELERATION_STD = 0.5
+TRACKER_INITIAL_VELOCITY_STD = 1.0
+TRACKER_MAX_PREDICTION_SECONDS = 1.0
+
+
+class KalmanTracker:
+    """Φίλτρο Kalman σταθερής ταχύτητας (x, y, vx, vy) για όλα τα tags μαζί.
+
+    Η κατάσταση και η συνδιακύμανση κάθε tag είναι μία γραμμή σε πίνακες
+    (n, 4) και (n, 4, 4), με τους ίδιους δείκτες γραμμών με το
+    TagStateStore. Τα predict/update γίνονται μαζικά για όλα τα tags μιας
+    παρτίδας, και η predict_positions() δίνει θέσεις σε οποιαδήποτε χρονική
+    στιγμή (π.χ. για το γράφημα) χωρίς νέα λύση ούτε αλλαγή της κατάστασης.
+
+    measurement_std είναι το σφάλμα μιας λύσης θέσης (m) και
+    acceleration_std η τυπική επιτάχυνση των tags (m/s², λευκός θόρυβος).
+    Η πρόβλεψη δεν προεκτείνει πέρα από max_prediction_seconds μετά την
+    τελευταία ενημέρωση ενός tag.
+    """
+
+    def __init__(self, measurement_std=TRACKER_MEASUREMENT_STD, acceleration_std=TRACKER_ACCELERATION_STD,
+                 initial_velocity_std=TRACKER_INITIAL_VELOCITY_STD,
+                 max_prediction_seconds=TRACKER_MAX_PREDICTION_SECONDS, initial_capacity=64):
+        self.measurement_var = measurement_std ** 2
+        self.acceleration_var = acceleration_std ** 2
+        self.initial_velocity_var = initial_velocity_std ** 2
+        self.max_prediction_seconds = max_prediction_seconds
+        self.capacity = 0
+        self.state = np.empty((0, 4))
+        self.covariance = np.empty((0, 4, 4))
+        self.timestamps = np.empty(0)
+        self._ensure_capacity(max(1, initial_capacity))
+        self.updates = 0
+        self.initialized = 0
+
+    def _ensure_capacity(self, size):
+        if size <= self.capacity:
+            return
+        capacity = max(size, self.capacity * 2)
+        state = np.full((capacity, 4), np.nan)
+        covariance = np.zeros((capacity, 4, 4))
+        timestamps = np.full(capacity, np.nan)
+        state[:self.capacity] = self.state
+        covariance[:self.capacity] = self.covariance
+        timestamps[:self.capacity] = self.timestamps
+        self.state, self.covariance, self.timestamps, self.capacity = state, covariance, timestamps, capacity
+
+    def _predict(self, rows, timestamp):
+        """Προβλέπει (x, P) των rows στο timestamp (χωρίς να τα αποθηκεύει)."""
+        dt = np.maximum(timestamp - self.timestamps[rows], 0.0)
+        x = self.state[rows].copy()
+        x[:, :2] += x[:, 2:] * dt[:, None]
+
+        # P' = F P Fᵀ + Q, με F = [[I, dt I], [0, I]] και Q του λευκού θορύβου επιτάχυνσης
+        P = self.covariance[rows]
+        F = np.broadcast_to(np.eye(4), (len(rows), 4, 4)).copy()
+        F[:, 0, 2] = F[:, 1, 3] = dt
+        P = F @ P @ F.transpose(0, 2, 1)
+        q = self.acceleration_var
+        for axis in (0, 1):
+            P[:, axis, axis] += q * dt**3 / 3
+            P[:, axis, axis + 2] += q * dt**2 / 2
+            P[:, axis + 2, axis] += q * dt**2 / 2
+            P[:, axis + 2, axis + 2] += q * dt
+        return x, P
+
+    def update(self, rows, measurements, timestamp):
+        """Ενσωματώνει νέες θέσεις για τα rows· επιστρέφει τις φιλτραρισμένες θέσεις (n, 2)."""
+        rows = np.asarray(rows, dtype=np.intp)
+        if len(rows) == 0:
+            return np.empty((0, 2))
+        self._ensure_capacity(int(rows.max()) + 1)
+        measurements = np.asarray(measurements, dtype=float)
+
+        # Tags χωρίς κατάσταση ξεκινούν από τη μέτρηση με μηδενική ταχύτητα
+        new = np.isnan(self.timestamps[rows])
+        if new.any():
+            start = rows[new]
+            self.state[start, :2] = measurements[new]
+            self.state[start, 2:] = 0.0
+            self.covariance[start] = np.diag([self.measurement_var, self.measurement_var,
+                                              self.initial_velocity_var, self.initial_velocity_var])
+            self.timestamps[start] = timestamp
+            self.initialized += int(new.sum())
+
+        tracked = rows[~new]
+        if len(tracked):
+            x, P = self._predict(tracked, timestamp)
+
+            # H = [I 0]: καινοτομία y = z - Hx, S = H P Hᵀ + R, K = P Hᵀ S⁻¹
+            innovation = measurements[~new] - x[:, :2]
+            S = P[:, :2, :2] + self.measurement_var * np.eye(2)
+            gain = P[:, :, :2] @ np.linalg.inv(S)
+            x += (gain @ innovation[..., None])[..., 0]
+            P -= gain @ P[:, :2, :]
+
+            self.state[tracked] = x
+            self.covariance[tracked] = P
+            self.timestamps[tracked] = timestamp
+            self.updates += len(tracked)
+
+        return self.state[rows, :2].copy()
+
+    def predict_positions(self, rows, timestamp):
+        """Θέσεις των rows στο timestamp από την τελευταία κατάσταση (NaN για tags χωρίς κατάσταση)."""
+        rows = np.asarray(rows, dtype=np.intp)
+        positions = np.full((len(rows), 2), np.nan)
+        known = rows < self.capacity
+        known[known] = ~np.isnan(self.timestamps[rows[known]])
+        if known.any():
+            tracked = rows[known]
+            dt = np.clip(timestamp - self.timestamps[tracked], 0.0, self.max_prediction_seconds)
+            positions[known] = self.state[tracked, :2] + self.state[tracked, 2:] * dt[:, None]
+        return positions
+
+    def reset(self, rows):
+        """Ξεχνά την κατάσταση των rows (π.χ. όταν λήξει η θέση τους)."""
+        rows = np.asarray(rows, dtype=np.intp)
+        rows = rows[rows < self.capacity]
+        self.state[rows] = np.nan
+        self.covariance[rows] = 0.0
+        self.timestamps[rows] = np.nan
+
+    def stats(self):
+        return {
+            'tracks': int(np.count_nonzero(~np.isnan(self.timestamps))),
+            'initialized': self.initialized,
+            'updates': self.updates
+        }
@@ -0,0 +1,377 @@
+import numpy as np
+
+SOLVERS = ('linear', 'gauss-newton')
+ANCHOR_SELECTIONS = ('nearest', 'gdop')
+
+
+class AnchorGeometryCache:
+    """Cache της γεωμετρίας ανά subset anchors (signature = tuple anchor ids με σειρά).
+
+    Ο πίνακας A της γραμμικοποιημένης μεθόδου εξαρτάται μόνο από τα anchors
+    και τη σειρά τους, οπότε κρατάμε τον ψευδοαντίστροφό του και το σταθερό
+    μέρος του b. Μια λύση γίνεται έτσι ένας μικρός πολλαπλασιασμός
+    πίνακα-διανύσματος. Όταν αλλάζουν θέσεις anchors πρέπει να καλείται
+    update_anchor() ή invalidate().
+    """
+
+    def __init__(self, anchor_positions):
+        self.anchor_positions = anchor_positions
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, anchor_ids):
+        """Επιστρέφει (pinv(A), σταθερό μέρος του b) για το subset anchors."""
+        geometry = self._entries.get(anchor_ids)
+        if geometry is not None:
+            self.hits += 1
+            return geometry
+
+        self.misses += 1
+        coords = np.array([self.anchor_positions[a] for a in anchor_ids], dtype=float)
+        ref, others = coords[0], coords[1:]
+        A = 2 * (others - ref)
+        b_const = np.sum(others**2, axis=1) - np.sum(ref**2)
+        geometry = (np.linalg.pinv(A), b_const)
+        self._entries[anchor_ids] = geometry
+        return geometry
+
+    def invalidate(self, anchor_id=None):
+        """Ακυρώνει τις εγγραφές που περιέχουν το anchor_id (ή όλες αν είναι None)."""
+        if anchor_id is None:
+            self._entries.clear()
+            return
+        for anchor_ids in [key for key in self._entries if anchor_id in key]:
+            del self._entries[anchor_ids]
+
+    def update_anchor(self, anchor_id, position):
+        """Ενημερώνει τη θέση ενός anchor και ακυρώνει ό,τι εξαρτάται από αυτό."""
+        self.anchor_positions[anchor_id] = np.asarray(position, dtype=float)
+        self.invalidate(anchor_id)
+
+    def stats(self):
+        """Επιστρέφει τους μετρητές hit/miss του cache."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0
+        }
+
+
+def solve_with_geometry(geometry, distances):
+    """Λύνει μία θέση από τις αποστάσεις (με τη σειρά του subset) και τη γεωμετρία του."""
+    pinv, b_const = geometry
+    d_sq = np.square(np.asarray(distances, dtype=float))
+    return pinv @ (d_sq[0] - d_sq[1:] + b_const)
+
+
+def trilaterate_position(distances_to_anchors, geometry_cache, min_anchors=3):
+    """Θέση ενός tag από dict anchor_id -> απόσταση, ή None με λιγότερα από min_anchors γνωστά anchors.
+
+    Η λύση ανά tag, ως αναφορά για τους batch solvers (βλ. benchmark.py).
+    """
+    anchor_ids_used = tuple(a for a in distances_to_anchors if a in geometry_cache.anchor_positions)
+    if len(anchor_ids_used) < min_anchors:
+        return None
+
+    # Η γεωμετρία (pinv(A) και σταθερό μέρος του b) έρχεται από το cache
+    try:
+        geometry = geometry_cache.get(anchor_ids_used)
+    except np.linalg.LinAlgError:
+        print("Trilateration failed: LinAlgError")
+        return None
+
+    return solve_with_geometry(geometry, [distances_to_anchors[a] for a in anchor_ids_used])
+
+
+def _column_coords(anchor_positions, anchor_ids, cols):
+    """Συντεταγμένες (..., 2) για δείκτες anchors· οι κενές θέσεις (-1) παίρνουν (0, 0).
+
+    Κοιτάζει μόνο τα anchors που εμφανίζονται στο cols, όχι όλο το site.
+    """
+    used, inverse = np.unique(cols, return_inverse=True)
+    table = np.array([anchor_positions[anchor_ids[c]] if c >= 0 else (0.0, 0.0) for c in used.tolist()],
+                     dtype=float)
+    return table[inverse.reshape(cols.shape)]
+
+
+def _by_anchor(range_anchors, slots=None):
+    """Ταξινομεί τις θέσεις (slots) κάθε γραμμής κατά δείκτη anchor, με τις κενές (-1) στο τέλος."""
+    if slots is None:
+        slots = np.broadcast_to(np.arange(range_anchors.shape[1]), range_anchors.shape)
+    anchors = np.where(slots >= 0, np.take_along_axis(range_anchors, np.maximum(slots, 0), axis=1), -1)
+    order = np.argsort(np.where(anchors >= 0, anchors, np.iinfo(np.int32).max), axis=1, kind='stable')
+    slots = np.take_along_axis(slots, order, axis=1)
+    slots[np.take_along_axis(anchors, order, axis=1) < 0] = -1
+    return slots
+
+
+def select_anchors(ranges, range_anchors, max_anchors=None, selection='nearest', coords_of=None, estimates=None,
+                   nearby_of=None):
+    """Διαλέγει για κάθε tag έως max_anchors από τα anchors που άκουσε.
+
+    ranges/range_anchors είναι οι θέσεις αποστάσεων του TagStateStore (n, S).
+    Επιστρέφει πίνακα (n, k) με δείκτες θέσεων, ταξινομημένους ανά γραμμή
+    κατά δείκτη anchor και με -1 στις κενές. selection:
+      'nearest' : τα anchors με τη μικρότερη μετρημένη απόσταση
+      'gdop'    : άπληστη επιλογή που ελαχιστοποιεί το GDOP γύρω από την
+                  εκτίμηση θέσης (estimates), ανάμεσα στα 2*max_anchors
+                  πλησιέστερα· tags χωρίς εκτίμηση παίρνουν τα πλησιέστερα
+    Με nearby_of (βλ. AnchorRegistry.near_many) τα anchors που δεν είναι
+    κοντά στην εκτίμηση (π.χ. παλιά απόσταση από anchor που το tag έχει
+    αφήσει πίσω) μπαίνουν μετά από όλα τα κοντινά.
+    Με max_anchors=None κρατιούνται όλα τα anchors με γνωστή απόσταση.
+    Το κόστος εξαρτάται από το S και όχι από το πλήθος των anchors του site.
+    """
+    if selection not in ANCHOR_SELECTIONS:
+        raise ValueError(f"unknown anchor selection {selection!r}, expected one of {ANCHOR_SELECTIONS}")
+
+    width = int(np.count_nonzero(range_anchors >= 0, axis=1).max()) if len(ranges) else 0
+    known = _by_anchor(range_anchors)[:, :width]
+    if max_anchors is None or max_anchors >= width:
+        # Όλα τα γνωστά, κατά δείκτη anchor
+        return known
+
+    # Υποψήφια από το πλησιέστερο· οι κενές θέσεις (inf) πάνε στο τέλος
+    distances = np.where(known >= 0, np.take_along_axis(ranges, np.maximum(known, 0), axis=1), np.inf)
+    pool = max_anchors if selection == 'nearest' else min(2 * max_anchors, width)
+    if nearby_of is not None and estimates is not None:
+        nearby = nearby_of(estimates)
+        anchors = _selected_anchors(range_anchors, known)
+        in_reach = (anchors[:, :, None] == nearby[:, None, :]).any(axis=2)
+        # Πρώτα τα κοντινά, μετά τα υπόλοιπα γνωστά και στο τέλος οι κενές θέσεις
+        tier = np.where(known < 0, 2, np.where(in_reach, 0, 1))
+        by_distance = np.lexsort((distances, tier), axis=1)[:, :pool]
+    else:
+        by_distance = np.argsort(distances, axis=1, kind='stable')[:, :pool]
+    candidates = np.take_along_axis(known, by_distance, axis=1)
+
+    if selection == 'gdop' and estimates is not None:
+        anchors = np.where(candidates >= 0, np.take_along_axis(range_anchors, np.maximum(candidates, 0), axis=1), -1)
+        candidates = _select_by_gdop(candidates, coords_of(anchors), estimates, max_anchors)
+    return _by_anchor(range_anchors, candidates[:, :max_anchors])
+
+
+def _selected_anchors(range_anchors, selected):
+    """Οι δείκτες anchors των επιλεγμένων θέσεων (-1 στις κενές)."""
+    return np.where(selected >= 0, np.take_along_axis(range_anchors, np.maximum(selected, 0), axis=1), -1)
+
+
+def _select_by_gdop(candidates, coords, estimates, max_anchors):
+    """Άπληστη επιλογή anchors (ταξινομημένων κατά απόσταση) με το μικρότερο GDOP.
+
+    Για μετρήσεις απόστασης στο επίπεδο H έχει ως γραμμές τα μοναδιαία
+    διανύσματα anchor -> tag και GDOP² = trace((HᵀH)⁻¹) = trace/det του 2x2
+    HᵀH. Όσο το HᵀH είναι ιδιάζον (πρώτα anchors ή tag χωρίς εκτίμηση)
+    επιλέγεται το πλησιέστερο διαθέσιμο.
+    """
+    rows = np.arange(len(candidates))
+    diff = estimates[:, None, :] - coords
+    norm = np.hypot(diff[..., 0], diff[..., 1])
+    unit = np.where(norm[..., None] > 0, diff / np.maximum(norm, 1e-9)[..., None], 0.0)
+    outer = unit[..., :, None] * unit[..., None, :]
+
+    # Η σειρά απόστασης σπάει τις ισοπαλίες (και όλες τις ιδιάζουσες περιπτώσεις)
+    rank = np.arange(candidates.shape[1], dtype=float)
+    available = candidates >= 0
+    information = np.zeros((len(candidates), 2, 2))
+    chosen = np.full((len(candidates), max_anchors), -1, dtype=np.intp)
+
+    for step in range(max_anchors):
+        trial = information[:, None] + outer
+        trace = trial[..., 0, 0] + trial[..., 1, 1]
+        det = trial[..., 0, 0] * trial[..., 1, 1] - trial[..., 0, 1] * trial[..., 1, 0]
+        score = np.where(det > 1e-9, trace / np.maximum(det, 1e-9), 1e12 + rank)
+        score[~available] = np.inf
+
+        best = np.argmin(score, axis=1)
+        picked = np.isfinite(score[rows, best])
+        chosen[picked, step] = candidates[picked, best[picked]]
+        information[picked] += outer[picked, best[picked]]
+        available[picked, best[picked]] = False
+
+    return chosen
+
+
+class BatchTrilaterator:
+    """Λύνει τα συστήματα ελαχίστων τετραγώνων όλων των εκκρεμών tags μαζί.
+
+    Κάθε tag κρατά έως max_anchors anchors (βλ. select_anchors)· με
+    anchor_reach προτιμώνται όσα απέχουν έως anchor_reach μέτρα από την
+    εκτίμηση θέσης, μέσω του πλέγματος του AnchorRegistry. Τα tags
+    ομαδοποιούνται ανά subset επιλεγμένων anchors (κατά δείκτη anchor), και
+    κάθε ομάδα λύνεται με ένα μόνο πολλαπλασιασμό πινάκων
+    πάνω στον προϋπολογισμένο ψευδοαντίστροφο της γεωμετρίας από το
+    AnchorGeometryCache.
+    """
+
+    def __init__(self, geometry_cache, min_anchors=3, max_anchors=None, selection='nearest', anchor_reach=None):
+        self.geometry_cache = geometry_cache
+        self.min_anchors = min_anchors
+        self.max_anchors = max_anchors
+        self.selection = selection
+        self.anchor_reach = anchor_reach
+
+    def select(self, ranges, range_anchors, anchor_ids, estimates=None):
+        """Οι θέσεις των anchors που θα χρησιμοποιηθούν για κάθε tag (βλ. select_anchors).
+
+        Με anchor_reach το anchor_positions του cache πρέπει να είναι
+        AnchorRegistry με τη σειρά δεικτών του anchor_ids.
+        """
+        nearby_of = None
+        if self.anchor_reach is not None:
+            nearby_of = lambda points: self.geometry_cache.anchor_positions.near_many(points, self.anchor_reach)
+        return select_anchors(
+            ranges, range_anchors, self.max_anchors, self.selection,
+            lambda cols: _column_coords(self.geometry_cache.anchor_positions, anchor_ids, cols), estimates,
+            nearby_of)
+
+    def solve(self, ranges, range_anchors, anchor_ids, initial=None):
+        """Δέχεται τις θέσεις αποστάσεων των tags (βλ. TagStateStore) και επιστρέφει θέσεις (NaN = αποτυχία).
+
+        range_anchors δίνει τον δείκτη στο anchor_ids κάθε θέσης (-1 = κενή).
+        Το initial (προηγούμενες θέσεις) χρησιμοποιείται μόνο στην επιλογή
+        anchors ('gdop' και anchor_reach)· υπάρχει για να έχει την ίδια
+        διεπαφή με τον GaussNewtonTrilaterator.
+        """
+        positions = np.full((len(ranges), 2), np.nan)
+        if len(ranges) == 0:
+            return positions
+
+        selected = self.select(ranges, range_anchors, anchor_ids, initial)
+        subsets, group_of_row = np.unique(_selected_anchors(range_anchors, selected), axis=0, return_inverse=True)
+        group_of_row = group_of_row.ravel()
+
+        for group, subset in enumerate(subsets):
+            cols = subset[subset >= 0]
+            if len(cols) < self.min_anchors:
+                continue
+            try:
+                pinv, b_const = self.geometry_cache.get(tuple(anchor_ids[c] for c in cols))
+            except np.linalg.LinAlgError:
+                print("Trilateration failed: LinAlgError")
+                continue
+
+            rows = np.flatnonzero(group_of_row == group)
+
+            # b = d_ref² - d_i² + (|p_i|² - |p_ref|²), μία γραμμή ανά tag
+            d_sq = np.square(np.take_along_axis(ranges[rows], selected[rows, :len(cols)], axis=1).astype(float))
+            b = d_sq[:, :1] - d_sq[:, 1:] + b_const
+            positions[rows] = b @ pinv.T
+
+        return positions
+
+
+class GaussNewtonTrilaterator:
+    """Μη γραμμικά ελάχιστα τετράγωνα για πολλά tags μαζί (Gauss-Newton με απόσβεση Levenberg-Marquardt).
+
+    Ελαχιστοποιεί το Σ (|x - p_i| - d_i)² στα επιλεγμένα anchors (έως
+    max_anchors, βλ. select_anchors), οπότε δεν υπάρχει anchor αναφοράς.
+    Κάθε tag ξεκινά από την προηγούμενη θέση του (warm start) ή, αν δεν
+    έχει, από τη γραμμικοποιημένη λύση, και κάνει το πολύ max_iterations
+    βήματα· για tags που κινούνται λίγο αρκούν συνήθως 1-2. Όσα δεν
+    συγκλίνουν από το warm start (π.χ. μετά από μεγάλο άλμα) ξαναλύνονται
+    με αρχή τη γραμμική λύση.
+    """
+
+    def __init__(self, geometry_cache, min_anchors=3, max_anchors=None, selection='nearest', anchor_reach=None,
+                 max_iterations=5, tolerance=1e-3, damping=1e-6):
+        self.geometry_cache = geometry_cache
+        self.min_anchors = min_anchors
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.damping = damping
+        self.linear = BatchTrilaterator(geometry_cache, min_anchors, max_anchors, selection, anchor_reach)
+        self.solved = 0
+        self.iterations = 0
+        self.restarts = 0
+
+    def solve(self, ranges, range_anchors, anchor_ids, initial=None):
+        """Όπως το BatchTrilaterator.solve· initial είναι πίνακας (n, 2) με NaN όπου δεν υπάρχει θέση."""
+        positions = np.full((len(ranges), 2), np.nan)
+        if len(ranges) == 0:
+            return positions
+
+        solvable = np.count_nonzero(range_anchors >= 0, axis=1) >= self.min_anchors
+
+        start = np.full((len(ranges), 2), np.nan) if initial is None else np.array(initial, dtype=float)
+        cold = solvable & np.isnan(start[:, 0])
+        if cold.any():
+            start[cold] = self.linear.solve(ranges[cold], range_anchors[cold], anchor_ids)
+
+        rows = np.flatnonzero(solvable & ~np.isnan(start[:, 0]))
+        if len(rows) == 0:
+            return positions
+
+        # Συμπαγής μορφή: μόνο οι θέσεις των επιλεγμένων anchors κάθε tag
+        if len(rows) < len(ranges):
+            ranges, range_anchors = ranges[rows], range_anchors[rows]
+        selected = self.linear.select(ranges, range_anchors, anchor_ids, start[rows])
+        weights = (selected >= 0).astype(float)
+        distances = np.where(selected >= 0, np.take_along_axis(ranges, np.maximum(selected, 0), axis=1), 0.0)
+        coords = _column_coords(self.geometry_cache.anchor_positions, anchor_ids,
+                                _selected_anchors(range_anchors, selected))
+        x, converged = self._refine(start[rows], distances, weights, coords)
+
+        # Warm start που δεν συνέκλινε: νέα προσπάθεια από τη γραμμική λύση
+        warm = ~cold[rows] & ~converged
+        if warm.any():
+            self.restarts += int(warm.sum())
+            retry = np.flatnonzero(warm)
+            linear_start = self.linear.solve(ranges[retry], range_anchors[retry], anchor_ids)
+            x[retry], _ = self._refine(linear_start, distances[retry], weights[retry], coords[retry])
+
+        # Λιγότερα από min_anchors επιλεγμένα (π.χ. εκφυλισμένη επιλογή) = αποτυχία
+        x[np.count_nonzero(weights, axis=1) < self.min_anchors] = np.nan
+        positions[rows] = x
+        self.solved += len(rows)
+        return positions
+
+    def _refine(self, x, distances, weights, coords):
+        """Βήματα Gauss-Newton για όλα τα tags μαζί· επιστρέφει (θέσεις, συνέκλιναν)."""
+        x = x.copy()
+        converged = np.zeros(len(x), dtype=bool)
+        active = np.arange(len(x))
+
+        for _ in range(self.max_iterations):
+            self.iterations += len(active)
+            diff = x[active, None, :] - coords[active]
+            dist = np.maximum(np.hypot(diff[..., 0], diff[..., 1]), 1e-9)
+            w = weights[active]
+
+            # Jacobian του |x - p_i| (μοναδιαίο διάνυσμα), μηδενικό για άγνωστα anchors
+            jacobian = diff / dist[..., None] * w[..., None]
+            residual = (dist - distances[active]) * w
+
+            jtj = np.einsum('nai,naj->nij', jacobian, jacobian)
+            jtr = np.einsum('nai,na->ni', jacobian, residual)
+            jtj[:, (0, 1), (0, 1)] += self.damping * (jtj[:, 0, 0] + jtj[:, 1, 1] + 1.0)[:, None]
+            step = np.linalg.solve(jtj, jtr[..., None])[..., 0]
+            x[active] -= step
+
+            done = np.max(np.abs(step), axis=1) < self.tolerance
+            converged[active[done]] = True
+            active = active[~done]
+            if len(active) == 0:
+                break
+
+        return x, converged
+
+    def stats(self):
+        """Επιστρέφει πλήθος λύσεων, μέσο αριθμό επαναλήψεων και επανεκκινήσεις."""
+        return {
+            'solved': self.solved,
+            'avg_iterations': round(self.iterations / self.solved, 2) if self.solved else 0,
+            'restarts': self.restarts
+        }
+
+
+def make_solver(name, geometry_cache, min_anchors=3, max_anchors=None, selection='nearest', anchor_reach=None):
+    """Δημιουργεί τον μαζικό solver με όνομα από το SOLVERS."""
+    if name == 'linear':
+        return BatchTrilaterator(geometry_cache, min_anchors, max_anchors, selection, anchor_reach)
+    if name == 'gauss-newton':
+        return GaussNewtonTrilaterator(geometry_cache, min_anchors, max_anchors, selection, anchor_reach)
+    raise ValueError(f"unknown solver {name!r}, expected one of {SOLVERS}")
@@ -1,168 +1,322 @@
-import json
-import matplotlib.pyplot as plt
-from datetime import datetime
-import numpy as np
-import os
-
-class RTLSStatisticsViewer:
-    def __init__(self, json_file="rtls_statistics.json", csv_file="rtls_metrics.csv"):
-        self.json_file = json_file
-        self.csv_file = csv_file
-        self.json_data = None
-        self.load_data()
-    
-    def load_data(self):
-        """Φορτώνει τα δεδομένα από JSON"""
-        print(f" Searching for files in: {os.getcwd()}")
-        print(f" Files in directory: {[f for f in os.listdir('.') if f.endswith(('.json', '.csv'))]}")
-        
-        if os.path.exists(self.json_file):
-            try:
-                with open(self.json_file, 'r') as f:
-                    self.json_data = json.load(f)
-                print(f" Loaded JSON data from {self.json_file}")
-            except Exception as e:
-                print(f" Error loading JSON: {e}")
-        else:
-            print(f" JSON file {self.json_file} not found")
-            print(" Make sure to run rtls_server.py first and terminate with Ctrl+C")
-    
-    def plot_response_times(self):
-        """Γράφημα χρόνων απόκρισης"""
-        if not self.json_data:
-            print(" No data available")
-            return
-        
-        try:
-            response_times = self.json_data['raw_data']['response_times']
-            if not response_times:
-                print(" No response time data")
-                return
-            
-            plt.figure(figsize=(12, 6))
-            
-            plt.subplot(1, 2, 1)
-            plt.hist(response_times, bins=30, alpha=0.7, color='skyblue', edgecolor='black')
-            plt.xlabel('Response Time (ms)')
-            plt.ylabel('Frequency')
-            plt.title('Response Time Distribution')
-            plt.grid(True, alpha=0.3)
-            
-            plt.subplot(1, 2, 2)
-            plt.plot(response_times, alpha=0.7, color='blue')
-            plt.xlabel('Message Number')
-            plt.ylabel('Response Time (ms)')
-            plt.title('Response Time Over Time')
-            plt.grid(True, alpha=0.3)
-            
-            plt.tight_layout()
-            plt.show()
-            
-        except Exception as e:
-            print(f" Error plotting: {e}")
-    
-    def plot_positioning_accuracy(self):
-        """Γράφημα ακρίβειας εντοπισμού"""
-        if not self.json_data:
-            return
-        
-        try:
-            accuracy_data = self.json_data['raw_data']['positioning_accuracy']
-            if not accuracy_data:
-                print("⚠️ No accuracy data")
-                return
-            
-            plt.figure(figsize=(10, 6))
-            plt.plot(accuracy_data, alpha=0.7, color='green', marker='o', markersize=3)
-            plt.xlabel('Positioning Attempt')
-            plt.ylabel('Error (m)')
-            plt.title('Positioning Accuracy Over Time')
-            plt.grid(True, alpha=0.3)
-            plt.show()
-            
-        except Exception as e:
-            print(f" Error plotting accuracy: {e}")
-    
-    def plot_proximity_events(self):
-        """Γράφημα γεγονότων εγγύτητας"""
-        if not self.json_data:
-            return
-        
-        try:
-            events = self.json_data['raw_data']['proximity_events']
-            if not events:
-                print(" No proximity events")
-                return
-            
-            distances = [event['distance'] for event in events]
-            
-            plt.figure(figsize=(10, 6))
-            plt.hist(distances, bins=15, alpha=0.7, color='orange', edgecolor='black')
-            plt.xlabel('Distance (m)')
-            plt.ylabel('Frequency')
-            plt.title('Proximity Distance Distribution')
-            plt.grid(True, alpha=0.3)
-            plt.show()
-            
-        except Exception as e:
-            print(f" Error plotting proximity: {e}")
-    
-    def generate_report(self):
-        """Δημιουργεί αναλυτική αναφορά"""
-        if not self.json_data:
-            print(" No data available for report")
-            return
-
-        try:
-            stats = self.json_data['statistics']
-            
-            print("\n" + "="*60)
-            print(" RTLS PERFORMANCE REPORT")
-            print("="*60)
-            
-            session = stats['session_info']
-            print(f"Session ID: {session['session_id']}")
-            print(f"Duration: {session['duration_seconds']:.1f} seconds")
-            
-            perf = stats['performance_metrics']
-            print(f"\n⚡ PERFORMANCE:")
-            print(f"  Avg Response Time: {perf['avg_response_time_ms']:.2f} ms")
-            print(f"  Min Response Time: {perf['min_response_time_ms']:.2f} ms")
-            print(f"  Max Response Time: {perf['max_response_time_ms']:.2f} ms")
-            
-            acc = stats['accuracy_metrics']
-            print(f"\n ACCURACY:")
-            print(f"  Avg Error: {acc['avg_positioning_accuracy_m']:.4f} m")
-            print(f"  Std Deviation: {acc['std_accuracy_m']:.4f} m")
-            
-            sys = stats['system_metrics']
-            print(f"\n SYSTEM:")
-            print(f"  Success Rate: {sys['trilateration_success_rate']:.1f}%")
-            print(f"  Total Messages: {sys['total_messages']}")
-            print(f"  Active Tags: {sys['active_tags']}")
-            print(f"  Proximity Events: {sys['proximity_events_count']}")
-            print("="*60)
-            
-        except Exception as e:
-            print(f" Error generating report: {e}")
-
-if __name__ == "__main__":
-    print(" RTLS Statistics Viewer")
-    print("=" * 40)
-    
-    viewer = RTLSStatisticsViewer()
-    
-    if viewer.json_data:
-        print("\n Generating visualizations...")
-        viewer.plot_response_times()
-        viewer.plot_positioning_accuracy()
-        viewer.plot_proximity_events()
-        viewer.generate_report()
-    else:
-        print("\n To generate statistics:")
-        print("1. Run: python rtls_server.py")
-        print("2. Run: python tag_simulator.py")
-        print("3. Wait 2-3 minutes")
-        print("4. Stop server with Ctrl+C")
-        print("5. Run: python view_statistics.py")
-
+import json
+import time
+import argparse
+import matplotlib.pyplot as plt
+from datetime import datetime
+import numpy as np
+import os
+from metrics_store import MetricsReader
+from downsampling import DOWNSAMPLERS
+from streaming_stats import LogHistogram
+from statistics_logger import CYCLE_LATENCY_STAGES
+
+HISTOGRAM_BINS = 30
+
+class RTLSStatisticsViewer:
+    """Γραφήματα ενός session του metrics store.
+
+    Τίποτα δεν φορτώνεται ολόκληρο: οι στήλες ανοίγουν memory-mapped, μόνο
+    για το χρονικό διάστημα [start, end) (σε s από την αρχή του session), οι
+    χρονοσειρές μειώνονται στα pixels του γραφήματος και τα ιστογράμματα
+    υπολογίζονται σταδιακά, κομμάτι-κομμάτι.
+    """
+
+    def __init__(self, json_file="rtls_statistics.json", metrics_dir="rtls_metrics", session_dir=None,
+                 start=None, end=None, downsample='lttb', points=None):
+        self.json_file = json_file
+        self.metrics_dir = metrics_dir
+        self.session_dir = session_dir
+        self.start = start
+        self.end = end
+        self.downsample = DOWNSAMPLERS[downsample]
+        self.points = points
+        self.json_data = None
+        self.metrics = None
+        self.session_start = None
+        self.load_data()
+    
+    def load_data(self):
+        """Φορτώνει τη σύνοψη (JSON) και ανοίγει το metrics store του session"""
+        print(f" Searching for files in: {os.getcwd()}")
+        print(f" Files in directory: {[f for f in os.listdir('.') if f.endswith('.json')]}")
+        
+        if os.path.exists(self.json_file):
+            try:
+                with open(self.json_file, 'r') as f:
+                    self.json_data = json.load(f)
+                print(f" Loaded JSON data from {self.json_file}")
+            except Exception as e:
+                print(f" Error loading JSON: {e}")
+        else:
+            print(f" JSON file {self.json_file} not found")
+            print(" Make sure to run rtls_server.py first and terminate with Ctrl+C")
+
+        # Ο φάκελος του session: όπως δόθηκε, από τη σύνοψη ή το πιο πρόσφατο του metrics_dir
+        session_dir = self.session_dir
+        if session_dir is None and self.json_data and self.json_data.get('metrics_store'):
+            session_dir = self.json_data['metrics_store']['directory']
+        if (session_dir is None or not os.path.isdir(session_dir)) and os.path.isdir(self.metrics_dir):
+            sessions = sorted(os.listdir(self.metrics_dir))
+            if sessions:
+                session_dir = os.path.join(self.metrics_dir, sessions[-1])
+        if not session_dir or not os.path.isdir(session_dir):
+            print(" No metrics store found")
+            return
+
+        load_start = time.perf_counter()
+        self.metrics = MetricsReader(session_dir)
+        span = self.metrics.time_range('metrics') if 'metrics' in self.metrics.tables else None
+        if span is None:
+            print(f" Metrics store {session_dir} is empty")
+            self.metrics = None
+            return
+        self.session_start = span[0]
+        print(f" Loaded metrics store from {session_dir}: {span[1] - span[0]:.0f} s of data "
+              f"({(time.perf_counter() - load_start) * 1000:.0f} ms)")
+
+    def _time_window(self):
+        """Το [start, end) σε απόλυτο χρόνο (None για ανοιχτό άκρο)."""
+        start = self.session_start + self.start if self.start is not None else None
+        end = self.session_start + self.end if self.end is not None else None
+        return start, end
+
+    def _read(self, table, columns):
+        start, end = self._time_window()
+        return self.metrics.read(table, columns, start, end)
+
+    def _chunks(self, table, columns):
+        start, end = self._time_window()
+        return self.metrics.chunks(table, columns, start, end)
+
+    def _plot_series(self, ax, timestamps, values, **kwargs):
+        """Σχεδιάζει μια χρονοσειρά μειωμένη στο πλάτος του γραφήματος σε pixels."""
+        figure = ax.get_figure()
+        points = self.points or int(figure.get_figwidth() * figure.dpi)
+        elapsed, values = self.downsample(timestamps - self.session_start, values, points)
+        ax.plot(elapsed, values, **kwargs)
+
+    def _histogram(self, table, column, bins=HISTOGRAM_BINS):
+        """Ιστόγραμμα μιας στήλης σε δύο περάσματα ανά κομμάτια: εύρος και μετά counts."""
+        low, high = np.inf, -np.inf
+        for chunk in self._chunks(table, [column]):
+            low = min(low, float(chunk[column].min()))
+            high = max(high, float(chunk[column].max()))
+        if low > high:
+            return None, None
+        counts = np.zeros(bins, dtype=np.int64)
+        edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+        for chunk in self._chunks(table, [column]):
+            counts += np.histogram(chunk[column], bins=edges)[0]
+        return counts, edges
+    
+    def plot_response_times(self):
+        """Γράφημα χρόνων απόκρισης (μέσος όρος και percentiles ανά διάστημα)"""
+        if not self.metrics:
+            print(" No data available")
+            return
+        
+        try:
+            metrics = self._read('metrics', ['timestamp', 'response_count', 'response_avg',
+                                             'response_p95', 'response_p99'])
+            sampled = metrics['response_count'] > 0
+            if not sampled.any():
+                print(" No response time data")
+                return
+            
+            fig, ax = plt.subplots(figsize=(12, 6))
+            for column, color in (('response_avg', 'blue'), ('response_p95', 'orange'), ('response_p99', 'red')):
+                self._plot_series(ax, metrics['timestamp'][sampled], metrics[column][sampled],
+                                  alpha=0.7, color=color, label=column.split('_')[1])
+            ax.set_xlabel('Time (s)')
+            ax.set_ylabel('Response Time (ms)')
+            ax.set_title('Response Time Over Time')
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+            plt.show()
+            
+        except Exception as e:
+            print(f" Error plotting: {e}")
+    
+    def plot_positioning_rate(self):
+        """Γράφημα επιτυχημένων/αποτυχημένων εντοπισμών ανά διάστημα"""
+        if not self.metrics:
+            return
+        
+        try:
+            metrics = self._read('metrics', ['timestamp', 'solved', 'failed', 'active_tags'])
+            if len(metrics['timestamp']) == 0:
+                print("⚠️ No positioning data")
+                return
+            
+            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
+            self._plot_series(ax1, metrics['timestamp'], metrics['solved'], alpha=0.7, color='green', label='solved')
+            self._plot_series(ax1, metrics['timestamp'], metrics['failed'], alpha=0.7, color='red', label='failed')
+            ax1.set_ylabel('Positions per interval')
+            ax1.set_title('Positioning Over Time')
+            ax1.legend()
+            ax1.grid(True, alpha=0.3)
+            self._plot_series(ax2, metrics['timestamp'], metrics['active_tags'], alpha=0.7, color='blue')
+            ax2.set_xlabel('Time (s)')
+            ax2.set_ylabel('Active Tags')
+            ax2.grid(True, alpha=0.3)
+            plt.tight_layout()
+            plt.show()
+            
+        except Exception as e:
+            print(f" Error plotting positioning: {e}")
+    
+    def plot_proximity_events(self):
+        """Γράφημα γεγονότων εγγύτητας"""
+        if not self.metrics:
+            return
+        
+        try:
+            # Ένα record ανά encounter: ελάχιστη απόσταση και διάρκεια
+            distances, distance_edges = self._histogram('encounters', 'distance')
+            durations, duration_edges = self._histogram('encounters', 'duration')
+            if distances is None:
+                print(" No proximity events")
+                return
+            
+            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+            ax1.stairs(distances, distance_edges, fill=True, alpha=0.7, color='orange', edgecolor='black')
+            ax1.set_xlabel('Closest Distance (m)')
+            ax1.set_ylabel('Encounters')
+            ax1.set_title('Proximity Distance Distribution')
+            ax1.grid(True, alpha=0.3)
+            ax2.stairs(durations, duration_edges, fill=True, alpha=0.7, color='purple', edgecolor='black')
+            ax2.set_xlabel('Duration (s)')
+            ax2.set_ylabel('Encounters')
+            ax2.set_title('Encounter Duration Distribution')
+            ax2.grid(True, alpha=0.3)
+            plt.tight_layout()
+            plt.show()
+            
+        except Exception as e:
+            print(f" Error plotting proximity: {e}")
+
+    def latency_histogram(self, stage='end_to_end'):
+        """LogHistogram των καθυστερήσεων ενός σταδίου (βλ. CYCLE_LATENCY_STAGES), σταδιακά από τον πίνακα latency"""
+        stage_id = CYCLE_LATENCY_STAGES.index(stage)
+        histogram = LogHistogram()
+        for chunk in self._chunks('latency', ['stage', 'latency_ms']):
+            histogram.add_many(chunk['latency_ms'][chunk['stage'] == stage_id])
+        return histogram
+
+    def plot_latency_histogram(self, stage='end_to_end'):
+        """Γράφημα κατανομής καθυστέρησης ενός σταδίου σε λογαριθμικό άξονα"""
+        if not self.metrics:
+            return
+
+        try:
+            histogram = self.latency_histogram(stage)
+            if histogram.count == 0:
+                print(f" No {stage} latency data")
+                return
+            buckets = np.flatnonzero(histogram.counts)
+            # Τα buckets έχουν σταθερό πλάτος σε λογαριθμική κλίμακα: [min*g^(i-1), min*g^i)
+            edges = histogram.min_value * 10 ** (np.arange(buckets[0] - 1, buckets[-1] + 1) / histogram.buckets_per_decade)
+            percentiles = histogram.percentiles()
+
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.stairs(histogram.counts[buckets[0]:buckets[-1] + 1], edges, fill=True, alpha=0.7, color='skyblue')
+            for q, color in zip(percentiles, ('green', 'orange', 'red')):
+                ax.axvline(percentiles[q], color=color, linestyle='--', label=f'p{q} {percentiles[q]:.2f} ms')
+            ax.set_xscale('log')
+            ax.set_xlabel(f'{stage} latency (ms)')
+            ax.set_ylabel('Cycles')
+            ax.set_title('Latency Distribution')
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+            plt.show()
+
+        except Exception as e:
+            print(f" Error plotting latency: {e}")
+    
+    def generate_report(self):
+        """Δημιουργεί αναλυτική αναφορά"""
+        if not self.json_data:
+            print(" No data available for report")
+            return
+
+        try:
+            stats = self.json_data['statistics']
+            
+            print("\n" + "="*60)
+            print(" RTLS PERFORMANCE REPORT")
+            print("="*60)
+            
+            session = stats['session_info']
+            print(f"Session ID: {session['session_id']}")
+            print(f"Duration: {session['duration_seconds']:.1f} seconds")
+            
+            perf = stats['performance_metrics']
+            print(f"\n⚡ PERFORMANCE:")
+            print(f"  Avg Response Time: {perf['avg_response_time_ms']:.2f} ms")
+            print(f"  Min Response Time: {perf['min_response_time_ms']:.2f} ms")
+            print(f"  Max Response Time: {perf['max_response_time_ms']:.2f} ms")
+
+            if 'stage_latency_ms' in stats:
+                print(f"\n⏱ LATENCY PER STAGE (avg / p95 / p99 ms):")
+                for stage, latency in stats['stage_latency_ms'].items():
+                    if latency['count']:
+                        print(f"  {stage:<15} {latency['avg']:.3f} / {latency['p95']:.3f} / {latency['p99']:.3f}")
+            
+            acc = stats['accuracy_metrics']
+            print(f"\n ACCURACY:")
+            print(f"  Avg Error: {acc['avg_positioning_accuracy_m']:.4f} m")
+            print(f"  Std Deviation: {acc['std_accuracy_m']:.4f} m")
+            
+            sys = stats['system_metrics']
+            print(f"\n SYSTEM:")
+            print(f"  Success Rate: {sys['trilateration_success_rate']:.1f}%")
+            print(f"  Total Messages: {sys['total_messages']}")
+            if 'lost_messages' in sys:
+                print(f"  Lost Messages: {sys['lost_messages']}")
+            if 'dropped_by_policy' in sys:
+                print(f"  Dropped by Ingest Policy: {sys['dropped_by_policy']}")
+            print(f"  Active Tags: {sys['active_tags']}")
+            print(f"  Proximity Events: {sys['proximity_events_count']}")
+            if 'active_encounters' in sys:
+                print(f"  Active Encounters: {sys['active_encounters']}")
+                print(f"  Avg Encounter Duration: {sys['avg_encounter_seconds']:.1f} s")
+            print("="*60)
+            
+        except Exception as e:
+            print(f" Error generating report: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Γραφήματα των στατιστικών του rtls_server.py")
+    parser.add_argument("--session", metavar="DIR",
+                        help="φάκελος session του metrics store (προεπιλογή: της σύνοψης ή ο πιο πρόσφατος)")
+    parser.add_argument("--metrics-dir", default="rtls_metrics", help="φάκελος του metrics store")
+    parser.add_argument("--start", type=float, default=None, help="έναρξη σε s από την αρχή του session")
+    parser.add_argument("--end", type=float, default=None, help="τέλος σε s από την αρχή του session")
+    parser.add_argument("--downsample", choices=sorted(DOWNSAMPLERS), default='lttb',
+                        help="μείωση των χρονοσειρών: lttb (σχήμα καμπύλης) ή minmax (ακραίες τιμές ανά pixel)")
+    parser.add_argument("--points", type=int, default=None,
+                        help="σημεία ανά χρονοσειρά (προεπιλογή: το πλάτος του γραφήματος σε pixels)")
+    parser.add_argument("--stage", choices=CYCLE_LATENCY_STAGES, default='end_to_end',
+                        help="στάδιο για το ιστόγραμμα καθυστέρησης")
+    args = parser.parse_args()
+
+    print(" RTLS Statistics Viewer")
+    print("=" * 40)
+    
+    viewer = RTLSStatisticsViewer(metrics_dir=args.metrics_dir, session_dir=args.session, start=args.start,
+                                  end=args.end, downsample=args.downsample, points=args.points)
+    
+    if viewer.json_data or viewer.metrics:
+        print("\n Generating visualizations...")
+        viewer.plot_response_times()
+        viewer.plot_positioning_rate()
+        viewer.plot_proximity_events()
+        viewer.plot_latency_histogram(args.stage)
+        viewer.generate_report()
+    else:
+        print("\n To generate statistics:")
+        print("1. Run: python rtls_server.py")
+        print("2. Run: python tag_simulator.py")
+        print("3. Wait 2-3 minutes")
+        print("4. Stop server with Ctrl+C")
+        print("5. Run: python view_statistics.py")
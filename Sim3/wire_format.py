@@ -0,0 +1,85 @@
+import struct
+import numpy as np
+
+# Batched binary μορφή για αναφορές αποστάσεων (topic uwb/anchor_data/batch):
+#
+#   header   : magic "UWBB", version (u8), #anchors (u16), #tags (u32), #records (u32)
+#   ids      : anchor ids και μετά tag ids, το καθένα ως μήκος (u8) + UTF-8 bytes
+#   records  : #records x RECORD_DTYPE (little-endian, χωρίς padding)
+#
+# Τα records αναφέρονται στα ids μέσω δεικτών (interning), οπότε κάθε record
+# έχει σταθερό μέγεθος και η αποκωδικοποίηση είναι ένα np.frombuffer χωρίς αντιγραφή.
+
+BATCH_MAGIC = b"UWBB"
+BATCH_VERSION = 1
+
+_HEADER = struct.Struct("<4sBHII")
+
+RECORD_DTYPE = np.dtype([
+    ('tag', '<u4'),
+    ('anchor', '<u2'),
+    ('seq', '<u4'),
+    ('distance', '<f4'),
+    ('sent_at', '<f8')
+])
+
+
+def _pack_ids(ids):
+    parts = []
+    for identifier in ids:
+        encoded = identifier.encode()
+        if len(encoded) > 255:
+            raise ValueError(f"id too long for batch format: {identifier!r}")
+        parts.append(bytes((len(encoded),)))
+        parts.append(encoded)
+    return b"".join(parts)
+
+
+def _unpack_ids(payload, offset, count):
+    ids = []
+    for _ in range(count):
+        if offset >= len(payload) or offset + 1 + payload[offset] > len(payload):
+            raise ValueError("batch payload truncated in id table")
+        length = payload[offset]
+        ids.append(bytes(payload[offset + 1:offset + 1 + length]).decode())
+        offset += 1 + length
+    return ids, offset
+
+
+def encode_batch(tag_ids, anchor_ids, tag_index, anchor_index, distances, seq, sent_at):
+    """Πακετάρει πολλές αναφορές σε ένα payload.
+
+    tag_index/anchor_index είναι δείκτες στις λίστες tag_ids/anchor_ids· τα
+    seq και sent_at μπορεί να είναι πίνακες ή μία τιμή για όλα τα records.
+    """
+    records = np.empty(len(tag_index), dtype=RECORD_DTYPE)
+    records['tag'] = tag_index
+    records['anchor'] = anchor_index
+    records['seq'] = seq
+    records['distance'] = distances
+    records['sent_at'] = sent_at
+
+    header = _HEADER.pack(BATCH_MAGIC, BATCH_VERSION, len(anchor_ids), len(tag_ids), len(records))
+    return b"".join((header, _pack_ids(anchor_ids), _pack_ids(tag_ids), records.tobytes()))
+
+
+def decode_batch(payload):
+    """Επιστρέφει (tag_ids, anchor_ids, records) όπου records είναι view πάνω στο payload.
+
+    Payload που δεν είναι έγκυρο batch (κομμένο, ή με records που δείχνουν
+    έξω από τους πίνακες ids) απορρίπτεται ολόκληρο με ValueError.
+    """
+    if len(payload) < _HEADER.size:
+        raise ValueError("batch payload too short")
+    magic, version, num_anchors, num_tags, num_records = _HEADER.unpack_from(payload, 0)
+    if magic != BATCH_MAGIC or version != BATCH_VERSION:
+        raise ValueError(f"unsupported batch format {magic!r} v{version}")
+
+    anchor_ids, offset = _unpack_ids(payload, _HEADER.size, num_anchors)
+    tag_ids, offset = _unpack_ids(payload, offset, num_tags)
+    if len(payload) - offset < num_records * RECORD_DTYPE.itemsize:
+        raise ValueError(f"batch payload truncated: {num_records} records announced")
+    records = np.frombuffer(payload, dtype=RECORD_DTYPE, count=num_records, offset=offset)
+    if num_records and (records['tag'].max() >= num_tags or records['anchor'].max() >= num_anchors):
+        raise ValueError("batch record refers to a tag or anchor index outside the id table")
+    return tag_ids, anchor_ids, records